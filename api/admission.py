@@ -0,0 +1,307 @@
+"""
+clang-tidy 行程的准入控制
+同時執行的 clang-tidy 數量以 CPU 核心數與可用記憶體為上限，其餘請求排隊；
+佇列滿時立即拒絕（API 回 429 + Retry-After），避免突發流量讓主機因記憶體不足而全部逾時。
+排隊時 interactive 類別優先於 batch，同類別內依公平鍵（使用者或題目）輪流取得名額。
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import resource
+except ImportError:  # 非 POSIX 平台沒有 rlimit
+    resource = None
+
+
+# 優先類別，越前面越優先
+PRIORITIES = ('interactive', 'batch')
+
+
+class QueueFull(Exception):
+    """等待佇列已滿"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("lint queue is full.")
+        self.retry_after = retry_after
+
+
+def available_memory() -> int | None:
+    """回傳可用記憶體位元組數（Linux 讀 MemAvailable，其他平台退回實體記憶體總量）"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_concurrency(memory_per_process: int) -> int:
+    """min(CPU 核心數, 可用記憶體 / 單一行程記憶體上限)，至少為 1"""
+    limit = os.cpu_count() or 1
+    memory = available_memory()
+    if memory and memory_per_process > 0:
+        limit = min(limit, memory // memory_per_process)
+    return max(1, limit)
+
+
+def apply_rlimits(pid: int, memory_bytes: int | None, cpu_seconds: int | None):
+    """對已啟動的子行程設定位址空間與 CPU 時間上限（僅 Linux 的 prlimit 支援）
+
+    不使用 preexec_fn：在多執行緒的伺服器中 fork 後執行 Python 程式碼可能死結。
+    """
+    if resource is None or not hasattr(resource, 'prlimit'):
+        return
+    try:
+        if memory_bytes:
+            resource.prlimit(pid, resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        if cpu_seconds:
+            # 超過軟上限收到 SIGXCPU，再多 1 秒則被 SIGKILL
+            resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    except (ProcessLookupError, PermissionError, ValueError):
+        pass
+
+
+class WaitQueue:
+    """依優先類別排序、同類別內依公平鍵輪流的等待佇列（呼叫端負責加鎖）"""
+
+    def __init__(self):
+        # 類別 -> {公平鍵: [票號, ...]}；服務過的鍵移到最後
+        self._classes = {priority: OrderedDict() for priority in PRIORITIES}
+        self._where = {}    # 票號 -> (類別, 公平鍵)
+
+    def __len__(self):
+        return len(self._where)
+
+    def push(self, ticket: int, priority: str, key):
+        self._classes[priority].setdefault(key, deque()).append(ticket)
+        self._where[ticket] = (priority, key)
+
+    def head(self) -> int | None:
+        """下一個取得名額的票號"""
+        for keys in self._classes.values():
+            if keys:
+                return next(iter(keys.values()))[0]
+        return None
+
+    def pop_head(self) -> int:
+        for keys in self._classes.values():
+            if keys:
+                key, tickets = next(iter(keys.items()))
+                ticket = tickets.popleft()
+                if tickets:
+                    keys.move_to_end(key)
+                else:
+                    del keys[key]
+                del self._where[ticket]
+                return ticket
+        raise IndexError("pop from an empty WaitQueue")
+
+    def remove(self, ticket: int):
+        priority, key = self._where.pop(ticket)
+        tickets = self._classes[priority][key]
+        tickets.remove(ticket)
+        if not tickets:
+            del self._classes[priority][key]
+
+    def count(self, priority: str) -> int:
+        return sum(len(tickets) for tickets in self._classes[priority].values())
+
+    def ahead_of(self, priority: str) -> int:
+        """優先順序不低於 priority 的等待數"""
+        rank = PRIORITIES.index(priority)
+        return sum(self.count(p) for p in PRIORITIES[:rank + 1])
+
+
+class AdmissionController:
+    """計數號誌，附有界等待佇列（優先類別 + 公平輪流）與各類別的等待時間統計
+
+    執行緒（acquire）與 asyncio 工作（acquire_async）共用同一個佇列。
+    """
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters = WaitQueue()
+        self._futures = {}           # asyncio 等待者：票號 -> future（交付名額時移除）
+        self._backlog = 0            # 已接受但尚未開始等待的非同步工作
+        self._next_ticket = 0
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+        self._admitted = dict.fromkeys(PRIORITIES, 0)
+        self._hold_avg = None        # 每次佔用時間的指數移動平均（秒）
+        self.admitted = 0
+        self.rejected = 0
+
+    def check(self, priority: str = PRIORITIES[0]):
+        """佇列已滿時拋出 QueueFull（不佔位，用於建立 run 之前的快速判斷）"""
+        with self._cond:
+            if self._is_full(priority):
+                self.rejected += 1
+                raise QueueFull(self._retry_after(priority))
+
+    def enqueue(self, priority: str = PRIORITIES[0]):
+        """非同步工作進入佇列；之後由工作執行緒以 acquire(bounded=False) 取得名額"""
+        with self._cond:
+            if self._is_full(priority):
+                self.rejected += 1
+                raise QueueFull(self._retry_after(priority))
+            self._backlog += 1
+
+    def dequeue(self):
+        with self._cond:
+            self._backlog -= 1
+
+    @contextmanager
+    def acquire(self, bounded: bool = True, priority: str = 'interactive', key=None):
+        """取得執行名額；bounded 時若需要排隊而佇列已滿則拋出 QueueFull
+
+        priority 為 PRIORITIES 之一；key 為公平鍵，同類別的不同鍵輪流取得名額。
+        """
+        start = time.perf_counter()
+        with self._cond:
+            if not self._try_acquire(bounded, priority):
+                ticket = self._enter_queue(priority, key)
+                try:
+                    while self._waiters.head() != ticket or self._active >= self.limit:
+                        self._cond.wait()
+                except BaseException:
+                    self._waiters.remove(ticket)
+                    self._notify()
+                    raise
+                self._waiters.pop_head()
+                self._active += 1
+                self._notify()
+            acquired = self._admitted_at(start, priority)
+
+        try:
+            yield acquired - start
+        finally:
+            self._release(acquired)
+
+    @asynccontextmanager
+    async def acquire_async(self, bounded: bool = True, priority: str = 'interactive', key=None):
+        """acquire 的 asyncio 版本：排隊時以 future 等待，不佔用執行緒"""
+        start = time.perf_counter()
+        with self._cond:
+            future = None
+            if not self._try_acquire(bounded, priority):
+                ticket = self._enter_queue(priority, key)
+                future = self._futures[ticket] = asyncio.get_running_loop().create_future()
+        if future is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._cond:
+                    if self._futures.pop(ticket, None) is not None:
+                        self._waiters.remove(ticket)
+                    else:
+                        self._active -= 1    # 名額已交付但來不及使用
+                    self._notify()
+                raise
+        with self._cond:
+            acquired = self._admitted_at(start, priority)
+
+        try:
+            yield acquired - start
+        finally:
+            self._release(acquired)
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = sorted(w for class_waits in self._waits.values() for w in class_waits)
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "queued": len(self._waiters) + self._backlog,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                **_wait_summary(waits),
+                "classes": {
+                    priority: {
+                        "queued": self._waiters.count(priority),
+                        "admitted": self._admitted[priority],
+                        **_wait_summary(sorted(self._waits[priority])),
+                    }
+                    for priority in PRIORITIES
+                },
+            }
+
+    def _try_acquire(self, bounded: bool, priority: str) -> bool:
+        """不需排隊時直接佔用名額；需要排隊而佇列已滿時拋出 QueueFull（必須持有 _cond）"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown priority: {priority}")
+        if not self._waiters and self._active < self.limit:
+            self._active += 1
+            return True
+        if bounded and self._is_full(priority):
+            self.rejected += 1
+            raise QueueFull(self._retry_after(priority))
+        return False
+
+    def _enter_queue(self, priority: str, key) -> int:
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._waiters.push(ticket, priority, key)
+        return ticket
+
+    def _admitted_at(self, start: float, priority: str) -> float:
+        self.admitted += 1
+        self._admitted[priority] += 1
+        acquired = time.perf_counter()
+        self._waits[priority].append(acquired - start)
+        return acquired
+
+    def _release(self, acquired: float):
+        held = time.perf_counter() - acquired
+        with self._cond:
+            self._active -= 1
+            self._hold_avg = held if self._hold_avg is None else 0.9 * self._hold_avg + 0.1 * held
+            self._notify()
+
+    def _notify(self):
+        """喚醒等待中的執行緒，並將空出的名額依序交付給排在最前面的 asyncio 等待者（必須持有 _cond）"""
+        self._cond.notify_all()
+        while self._waiters and self._active < self.limit:
+            future = self._futures.pop(self._waiters.head(), None)
+            if future is None:
+                return      # 最前面是執行緒，由 notify_all 喚醒後自行取得
+            self._waiters.pop_head()
+            self._active += 1
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+
+    def _is_full(self, priority: str = PRIORITIES[0]) -> bool:
+        """執行中 + 排在前面的等待數已達 limit + max_queue（較低優先的等待者不佔 priority 的佇列）"""
+        queued = self._waiters.ahead_of(priority) + self._backlog
+        return self._active + queued >= self.limit + self.max_queue
+
+    def _retry_after(self, priority: str = PRIORITIES[0]) -> int:
+        """以平均佔用時間估計排到的秒數（1~60）"""
+        hold = self._hold_avg or 1.0
+        queued = self._waiters.ahead_of(priority) + self._backlog
+        return min(60, max(1, math.ceil(hold * (queued + 1) / self.limit)))
+
+
+def _wait_summary(waits: list[float]) -> dict:
+    """已排序的等待秒數 -> 平均與 p95（毫秒）"""
+    return {
+        "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+        "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+    }
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
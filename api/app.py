@@ -4,18 +4,41 @@ Clang-Tidy Static Analysis API Server (FastAPI)
 提供靜態分析功能的 FastAPI 版本
 """
 
-from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 import subprocess
 import json
-import yaml
+import math
 import tempfile
-import shutil
 from pathlib import Path
-import sqlite3
+import os
+import random
+import uuid
+import asyncio
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import NamedTuple
+from api.admission import PRIORITIES, AdmissionController, QueueFull, apply_rlimits, default_concurrency
+from api.blobs import CODE_COLUMNS, CODE_JOIN, load_code, prepare as prepare_code, put as put_code, store as store_code
+from api.db import Database
+from api.metrics import Counter, Gauge, Histogram, Registry
+from api.pagination import build_page_query, page
+from api.cache import LintCache, make_key, module_identity
+from api.pch import PchManager
+from api.diagnostics import as_violation, load_check_profile, parse_line
+from api.ingest import BulkFormatError, iter_records
+from api.prescreen import prescreen
+from api.stats import config_hash, fetch as fetch_problem_stats, record as record_problem_stats
+from api.streams import StreamRegistry
+from api.workqueue import WorkQueue
+from api.workspace import WorkspacePool
+from scripts.generate_tidy_config import build_config, parse_args, render_config, write_config
 
 app = FastAPI(title="Clang-Tidy API", version="1.0.0")
 app.add_middleware(
@@ -31,75 +54,92 @@ BASE_DIR = Path(__file__).parent.parent
 BUILD_DIR = BASE_DIR / "build"
 MODULE_PATH = BUILD_DIR / "libMiscTidyModule.so"
 SCRIPT_PATH = BASE_DIR / "scripts" / "generate_tidy_config.py"
-CONFIG_DIR = BASE_DIR / "configs"
-DB_PATH = BASE_DIR / "api" / "database.db"
+CONFIG_DIR = Path(os.environ.get("CONFIG_DIR", BASE_DIR / "configs"))
+DB_PATH = Path(os.environ.get("DB_PATH", BASE_DIR / "api" / "database.db"))
+# clang-tidy 執行檔（可換成 benchmarks/fake_clang_tidy.py 做壓力測試）
+CLANG_TIDY = os.environ.get("CLANG_TIDY", "clang-tidy")
+# 批次與重新評測的背景工作池大小（單一提交的檢查在事件迴圈上執行，不佔用執行緒）
+LINT_WORKERS = int(os.environ.get("LINT_WORKERS", os.cpu_count() or 4))
+# 結果快取：記憶體 LRU 筆數與 SQLite 持久層容量上限
+LINT_CACHE_ENTRIES = int(os.environ.get("LINT_CACHE_ENTRIES", 1024))
+LINT_CACHE_MAX_BYTES = int(os.environ.get("LINT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# 批次檢查時每個 clang-tidy 行程負責的檔案數
+LINT_BATCH_CHUNK = int(os.environ.get("LINT_BATCH_CHUNK", 16))
+# 閒置連線池大小
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 16))
+# 預編譯標頭（設為 0 停用）
+PCH_DIR = BUILD_DIR / "pch"
+LINT_PCH = os.environ.get("LINT_PCH", "1") != "0"
+# 最多建立的 PCH 數（每個標頭集合一個）
+LINT_PCH_MAX_ENTRIES = int(os.environ.get("LINT_PCH_MAX_ENTRIES", 16))
+# 每個 run 串流保留的診斷事件數上限
+LINT_STREAM_BUFFER = int(os.environ.get("LINT_STREAM_BUFFER", 1000))
+# 詞法預篩的預設值（請求未指定 prescreen 時套用，設為 1 啟用）
+LINT_PRESCREEN = os.environ.get("LINT_PRESCREEN", "0") == "1"
+# 請求未指定 profile 時，以此機率對 run 啟用各檢查耗時分析（0~1）
+LINT_PROFILE_SAMPLE_RATE = float(os.environ.get("LINT_PROFILE_SAMPLE_RATE", 0))
+# 每個 clang-tidy 行程的位址空間上限（MiB）；同時執行數預設為 min(核心數, 可用記憶體 / 此上限)
+LINT_MEMORY_LIMIT_MB = int(os.environ.get("LINT_MEMORY_LIMIT_MB", 2048))
+LINT_CONCURRENCY = int(os.environ.get("LINT_CONCURRENCY", 0)) or default_concurrency(LINT_MEMORY_LIMIT_MB << 20)
+# 等待執行名額的請求上限，超過時回 429（兩者皆為每個行程各自的上限）
+LINT_QUEUE_SIZE = int(os.environ.get("LINT_QUEUE_SIZE", LINT_CONCURRENCY * 4))
+# 工作目錄池：放在 tmpfs 上重複使用（目錄不存在時退回系統暫存目錄）
+LINT_WORKSPACE_DIR = Path(os.environ.get("LINT_WORKSPACE_DIR", "/dev/shm"))
+LINT_WORKSPACES = int(os.environ.get("LINT_WORKSPACES", LINT_WORKERS * 2))
+# 非同步 run 的執行位置：local（API 行程內）或 db（寫入 lint_queue，由 python -m api.worker 執行）
+LINT_QUEUE_BACKEND = os.environ.get("LINT_QUEUE_BACKEND", "local")
+# 持久佇列的租約秒數（worker 每 1/3 租約送一次心跳）與每個 run 的最多嘗試次數
+LINT_QUEUE_LEASE_SEC = float(os.environ.get("LINT_QUEUE_LEASE_SEC", 60))
+LINT_QUEUE_MAX_ATTEMPTS = int(os.environ.get("LINT_QUEUE_MAX_ATTEMPTS", 3))
+# 新提交程式碼的壓縮方式（zlib；安裝 zstandard 時可設為 zstd）
+CODE_BLOB_CODEC = os.environ.get("CODE_BLOB_CODEC", "zlib")
+# 背景工作（重新評測）的心跳逾時秒數：超過此時間未更新的工作視為所屬行程已結束，記錄為 failed
+LINT_JOB_STALE_SEC = float(os.environ.get("LINT_JOB_STALE_SEC", 60))
+# 批次匯入：每個交易寫入的提交數、單筆紀錄大小上限（位元組）與回應列出的錯誤數上限
+SUBMISSION_BULK_BATCH = int(os.environ.get("SUBMISSION_BULK_BATCH", 1000))
+SUBMISSION_BULK_MAX_RECORD_BYTES = int(os.environ.get("SUBMISSION_BULK_MAX_RECORD_BYTES", 4 * 1024 * 1024))
+SUBMISSION_BULK_MAX_ERRORS = int(os.environ.get("SUBMISSION_BULK_MAX_ERRORS", 100))
 
 # 確保目錄存在
-CONFIG_DIR.mkdir(exist_ok=True)
-(BASE_DIR / "api").mkdir(exist_ok=True)
+CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+lint_executor = ThreadPoolExecutor(max_workers=LINT_WORKERS, thread_name_prefix="lint")
+background_tasks = set()   # 事件迴圈上執行中的非同步 lint
+job_owner = None           # 本行程建立的背景工作的擁有者（啟動時設定，每個 worker 行程不同）
+owned_jobs = set()         # 本行程尚未結束的背景工作，由心跳執行緒定期更新 heartbeat_at
+job_heartbeat_stop = threading.Event()
+db = Database(DB_PATH, pool_size=DB_POOL_SIZE)
+lint_cache = LintCache(db, memory_entries=LINT_CACHE_ENTRIES, max_db_bytes=LINT_CACHE_MAX_BYTES)
+pch_manager = PchManager(PCH_DIR, clang_tidy=CLANG_TIDY, max_entries=LINT_PCH_MAX_ENTRIES)
+stream_registry = StreamRegistry(LINT_STREAM_BUFFER)
+workspace_pool = WorkspacePool(LINT_WORKSPACE_DIR, size=LINT_WORKSPACES)
+admission = AdmissionController(LINT_CONCURRENCY, LINT_QUEUE_SIZE)
+work_queue = WorkQueue(db, lease_sec=LINT_QUEUE_LEASE_SEC, max_attempts=LINT_QUEUE_MAX_ATTEMPTS)
+
+# Prometheus 指標（GET /metrics）
+metrics = Registry()
+stage_seconds = metrics.register(Histogram(
+    "lint_stage_seconds", "Time spent in each stage of a lint run.", ["stage"]))
+clang_tidy_cpu_seconds = metrics.register(Histogram(
+    "lint_clang_tidy_cpu_seconds", "User + system CPU time of the clang-tidy process."))
+run_seconds = metrics.register(Histogram(
+    "lint_run_seconds", "Server-measured duration of a lint run, excluding queue wait.", ["status"]))
+runs_total = metrics.register(Counter("lint_runs_total", "Lint runs by final status.", ["status"]))
+timeouts_total = metrics.register(Counter("lint_timeouts_total", "Lint runs killed after timeout_sec."))
+rejected_total = metrics.register(Counter("lint_rejected_total", "Lint requests rejected with 429."))
+cache_hits_total = metrics.register(Counter("lint_cache_hits_total", "Lint runs answered from the result cache."))
+prescreen_passes_total = metrics.register(Counter(
+    "lint_prescreen_passes_total", "Lint runs passed by the lexical pre-screen."))
+queue_wait_seconds = metrics.register(Histogram(
+    "lint_queue_wait_seconds", "Time waiting for a clang-tidy slot, by priority class.", ["priority"]))
+queue_depth = metrics.register(Gauge("lint_queue_depth", "Async lint runs waiting for a worker."))
+runs_in_progress = metrics.register(Gauge("lint_runs_in_progress", "Lint runs currently executing."))
 
 
 def init_db():
     """初始化資料庫"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # submissions 表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS submissions (
-            id INTEGER PRIMARY KEY,
-            problem_id INTEGER NOT NULL,
-            code TEXT NOT NULL,
-            language TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            user_id INTEGER
-        )
-    ''')
-    
-    # requirements 表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS requirements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            problem_id INTEGER NOT NULL UNIQUE,
-            rules TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-    ''')
-    
-    # lint_runs 表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS lint_runs (
-            id TEXT PRIMARY KEY,
-            submission_id INTEGER NOT NULL,
-            problem_id INTEGER NOT NULL,
-            status TEXT NOT NULL,
-            violations_count INTEGER,
-            fixes_available BOOLEAN,
-            created_at TEXT NOT NULL,
-            completed_at TEXT,
-            error_message TEXT
-        )
-    ''')
-    
-    # lint_reports 表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS lint_reports (
-            id TEXT PRIMARY KEY,
-            submission_id INTEGER NOT NULL,
-            problem_id INTEGER NOT NULL,
-            run_id TEXT NOT NULL,
-            passed BOOLEAN NOT NULL,
-            violations TEXT NOT NULL,
-            total_violations INTEGER NOT NULL,
-            execution_time_ms INTEGER,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (run_id) REFERENCES lint_runs(id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    db.init_schema()
 
 
 def auth_dependency(authorization: str | None = Header(default=None)):
@@ -135,6 +175,25 @@ class RunBody(BaseModel):
     language_type: int | None = 1
     timeout_sec: int | None = 30
     export_fixes: bool | None = True
+    async_mode: bool | None = False
+    prescreen: bool | None = None
+    profile: bool | None = None
+    priority: str | None = None     # interactive（預設）或 batch
+
+
+class BatchRunBody(BaseModel):
+    problem_id: int
+    submission_ids: list[int] | None = None
+    timeout_sec: int | None = 30
+    jobs: int | None = None
+    async_mode: bool | None = False
+    priority: str | None = None     # 預設 batch
+
+
+class RelintBody(BaseModel):
+    timeout_sec: int | None = 30
+    jobs: int | None = None
+    priority: str | None = None     # 預設 batch
 
 
 class ReportResult(BaseModel):
@@ -155,6 +214,7 @@ class CreateSubmissionBody(BaseModel):
     problem_id: int
     code: str
     language: str = "cpp"
+    user_id: int | None = None
 
 
 # ==================== API 端點 ====================
@@ -163,18 +223,15 @@ class CreateSubmissionBody(BaseModel):
 def get_submission(submission_id: int, _auth: bool = Depends(auth_dependency)):
     """1. GET /submission/<submission> – 取得使用者提交程式碼"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute(
-            '''
-            SELECT id, problem_id, code, language, created_at
-            FROM submissions WHERE id = ?
-            ''',
-            (submission_id,)
-        )
-        
-        row = c.fetchone()
-        conn.close()
+        with db.connection() as c:
+            c.execute(
+                f'''
+                SELECT s.id, s.problem_id, {CODE_COLUMNS}, s.language, s.created_at
+                FROM submissions s {CODE_JOIN} WHERE s.id = ?
+                ''',
+                (submission_id,)
+            )
+            row = c.fetchone()
         
         if not row:
             raise HTTPException(status_code=404, detail="submission not found.")
@@ -182,9 +239,9 @@ def get_submission(submission_id: int, _auth: bool = Depends(auth_dependency)):
         return {
             "submission_id": row[0],
             "problem_id": row[1],
-            "code": row[2],
-            "language": row[3],
-            "created_at": row[4],
+            "code": load_code(*row[2:5]),
+            "language": row[5],
+            "created_at": row[6],
         }
     except HTTPException:
         raise
@@ -208,18 +265,14 @@ def save_requirements(body: RequirementsBody, _perm: bool = Depends(permission_d
                 raise HTTPException(status_code=400, detail=f"invalid rule: {rule}")
         
         # 儲存到資料庫
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
         now = datetime.now().isoformat()
-        
-        c.execute('''
-            INSERT OR REPLACE INTO requirements (problem_id, rules, created_at, updated_at)
-            VALUES (?, ?, ?, ?)
-        ''', (problem_id, json.dumps(rules), now, now))
+        with db.transaction() as c:
+            c.execute('''
+                INSERT OR REPLACE INTO requirements (problem_id, rules, created_at, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (problem_id, json.dumps(rules), now, now))
         
         config_id = f"cfg_{problem_id}"
-        conn.commit()
-        conn.close()
         
         return {
             "message": "requirements saved.",
@@ -232,7 +285,7 @@ def save_requirements(body: RequirementsBody, _perm: bool = Depends(permission_d
 
 
 @app.post('/lint/generate')
-def generate_config(body: GenerateBody, _perm: bool = Depends(permission_dependency)):
+async def generate_config(body: GenerateBody, _perm: bool = Depends(permission_dependency)):
     """3. POST /lint/generate – 生成 .clang-tidy 檔案"""
     try:
         problem_id = body.problem_id
@@ -240,12 +293,10 @@ def generate_config(body: GenerateBody, _perm: bool = Depends(permission_depende
         if not problem_id or not rules:
             raise HTTPException(status_code=400, detail="missing problem_id or rules.")
         
-        # 建立題目配置目錄
         problem_config_dir = CONFIG_DIR / f"problem_{problem_id}"
-        problem_config_dir.mkdir(exist_ok=True)
-        
-        # 轉換規則為腳本參數
-        script_args = ['python3', str(SCRIPT_PATH)]
+
+        # 轉換規則為生成器參數
+        script_args = []
         for rule in rules:
             if rule.startswith('--forbid-functions='):
                 script_args.append('--forbid-functions')
@@ -253,29 +304,18 @@ def generate_config(body: GenerateBody, _perm: bool = Depends(permission_depende
                 script_args.extend(['--function-names', funcs])
             else:
                 script_args.append(rule)
-        
-        script_args.extend(['--output-dir', str(problem_config_dir)])
-        
-        # 執行生成腳本
-        result = subprocess.run(
-            script_args,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-        )
 
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"generation failed: {result.stderr}")
-        
-        # 讀取生成的配置
-        config_path = problem_config_dir / ".clang-tidy"
-        with open(config_path, 'r') as f:
-            config_content = f.read()
+        # 直接在行程內生成，內容未變時不重寫檔案
+        kwargs, _, warnings = parse_args(script_args)
+        config_content = render_config(build_config(**kwargs))
+        config_path, changed = await asyncio.to_thread(write_config, str(problem_config_dir), config_content)
         
         return {
             "message": f"Generated .clang-tidy for problem {problem_id}",
             "config_path": str(config_path),
             "config_content": config_content,
+            "changed": changed,
+            "warnings": warnings,
         }
     except HTTPException:
         raise
@@ -283,8 +323,501 @@ def generate_config(body: GenerateBody, _perm: bool = Depends(permission_depende
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _new_run_id(submission_id):
+    return f"run_{submission_id}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:6]}"
+
+
+def _new_report_id(submission_id):
+    return f"rpt_{submission_id}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:6]}"
+
+
+def _priority(value, default):
+    """驗證請求的優先類別"""
+    priority = value or default
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail="invalid priority.")
+    return priority
+
+
+def _fair_key(problem_id, user_id=None):
+    """同優先類別內輪流取得名額的單位：有使用者時為使用者，否則為題目"""
+    return f"user:{user_id}" if user_id is not None else f"problem:{problem_id}"
+
+
+def _pch_args(code, config_bytes, language_type, std_flag):
+    """可使用 PCH 時回傳額外的編譯參數"""
+    # misc-include-cleaner 依賴實際的 include 結構，不能預先載入標頭
+    if not LINT_PCH or b'misc-include-cleaner' in config_bytes:
+        return []
+    return pch_manager.args_for(code, language_type, std_flag)
+
+
+def _pch_key(pch_args):
+    """快取鍵中的 PCH 部分（檔名含工具鏈與標頭集合）"""
+    return f"pch={Path(pch_args[-1]).name if pch_args else 'none'}"
+
+
+def _run_streaming(cmd, cwd, timeout_sec, on_diagnostic, timings=None):
+    """執行 clang-tidy 並逐行讀取 stdout，每解析出一筆診斷就呼叫 on_diagnostic
+
+    stdout 不整份保留；stderr 導向暫存檔以免管線塞滿造成死結。回傳 (returncode, stderr)。
+    提供 timings 時記錄 clang_tidy（牆鐘）、clang_tidy_cpu 與 diagnostics_parse 秒數。
+    """
+    parse_seconds = 0.0
+    cpu_seconds = None
+    started = time.perf_counter()
+    with tempfile.TemporaryFile('w+') as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True, cwd=cwd)
+        apply_rlimits(proc.pid, LINT_MEMORY_LIMIT_MB << 20, math.ceil(timeout_sec) + 1)
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout_sec, kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                parse_start = time.perf_counter()
+                diagnostic = parse_line(line)
+                parse_seconds += time.perf_counter() - parse_start
+                if diagnostic is not None:
+                    on_diagnostic(diagnostic)
+            cpu_seconds = _wait_child(proc)
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+        if timings is not None:
+            timings['clang_tidy'] = time.perf_counter() - started - parse_seconds
+            timings['diagnostics_parse'] = parse_seconds
+            if cpu_seconds is not None:
+                timings['clang_tidy_cpu'] = cpu_seconds
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout_sec)
+        err.seek(0)
+        return proc.returncode, err.read()
+
+
+def _wait_child(proc):
+    """以 wait4 回收子行程並回傳其 CPU 秒數（若已被 Popen 回收則回傳 None）"""
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        proc.wait()
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def _wait_child_async(proc):
+    """等待子行程結束後以 wait4 回收，回傳 CPU 秒數
+
+    以 pidfd 在事件迴圈上等待（不佔用執行緒）；不支援 pidfd 的平台退回執行緒等待。
+    """
+    try:
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        return await asyncio.to_thread(_wait_child, proc)
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+    return _wait_child(proc)
+
+
+def _kill_group(proc):
+    """終止 clang-tidy 所在的整個行程群組（包含它啟動的子行程）"""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _run_streaming_async(cmd, cwd, timeout_sec, on_diagnostic, timings=None):
+    """_run_streaming 的 asyncio 版本：stdout 由事件迴圈讀取，on_diagnostic 為 coroutine 函式
+
+    clang-tidy 在獨立的行程群組中執行；逾時或工作被取消時終止整個群組並回收。
+    不使用 asyncio.create_subprocess_exec：其 child watcher 會先回收子行程，拿不到 CPU 時間。
+    """
+    loop = asyncio.get_running_loop()
+    parse_seconds = 0.0
+    cpu_seconds = None
+    timed_out = False
+    started = time.perf_counter()
+    with tempfile.TemporaryFile('w+') as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, cwd=cwd, start_new_session=True)
+        transport = None
+        try:
+            apply_rlimits(proc.pid, LINT_MEMORY_LIMIT_MB << 20, math.ceil(timeout_sec) + 1)
+            reader = asyncio.StreamReader(limit=1 << 20)
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), proc.stdout)
+            async with asyncio.timeout(timeout_sec):
+                async for line in reader:
+                    parse_start = time.perf_counter()
+                    diagnostic = parse_line(line.decode(errors='replace'))
+                    parse_seconds += time.perf_counter() - parse_start
+                    if diagnostic is not None:
+                        await on_diagnostic(diagnostic)
+                cpu_seconds = await _wait_child_async(proc)
+        except TimeoutError:
+            timed_out = True
+        finally:
+            if transport is not None:
+                transport.close()
+            else:
+                proc.stdout.close()
+            if proc.returncode is None:
+                _kill_group(proc)
+                cpu_seconds = await asyncio.shield(_wait_child_async(proc))
+
+        if timings is not None:
+            timings['clang_tidy'] = time.perf_counter() - started - parse_seconds
+            timings['diagnostics_parse'] = parse_seconds
+            if cpu_seconds is not None:
+                timings['clang_tidy_cpu'] = cpu_seconds
+
+        if timed_out:
+            raise subprocess.TimeoutExpired(cmd, timeout_sec)
+        err.seek(0)
+        return proc.returncode, err.read()
+
+
+async def _invoke_clang_tidy(code, config_bytes, std_flag, language_type, timeout_sec, export_fixes,
+                             extra_args=(), on_diagnostic=None, timings=None, check_profile=None):
+    """在工作目錄池中執行 clang-tidy，回傳 (returncode, stderr, violations, fixes_available)
+
+    違規清單直接由 stdout 解析；只有 export_fixes 時才匯出並讀取 fixes YAML。
+    提供 check_profile（dict）時啟用 --enable-check-profile，並填入各檢查的耗時。
+    on_diagnostic 為 coroutine 函式（例如 RunStream.publish_async）。
+    """
+    violations = []
+    fixes_available = False
+
+    async def collect(diagnostic):
+        violations.append(as_violation(diagnostic))
+        if on_diagnostic is not None:
+            await on_diagnostic(diagnostic)
+
+    if timings is None:
+        timings = {}
+
+    # 取得重複使用的工作目錄（.clang-tidy 未變時保留原檔）
+    setup_start = time.perf_counter()
+    with workspace_pool.acquire() as workspace:
+        tmpdir_path = workspace.path
+
+        # 決定檔案副檔名
+        ext = '.c' if language_type == 0 else '.cpp'
+        code_file = workspace.prepare(f"code{ext}", code, config_bytes)
+        timings['workspace_setup'] = time.perf_counter() - setup_start
+
+        # 準備 clang-tidy 命令
+        fixes_file = tmpdir_path / "fixes.yaml"
+
+        cmd = [
+            CLANG_TIDY,
+            str(code_file),
+            '-load', str(MODULE_PATH),
+        ]
+
+        if export_fixes:
+            cmd.extend(['-export-fixes', str(fixes_file)])
+
+        profile_dir = tmpdir_path / "profile"
+        if check_profile is not None:
+            cmd.extend(['--enable-check-profile', f'--store-check-profile={profile_dir}'])
+
+        cmd.extend(['--', std_flag, *extra_args])
+
+        # 執行 clang-tidy
+        returncode, stderr = await _run_streaming_async(cmd, tmpdir_path, timeout_sec, collect, timings)
+
+        # 只需知道是否產生了 fixes（YAML 可能很大，不在此解析）
+        if export_fixes:
+            try:
+                fixes_available = fixes_file.stat().st_size > 0
+            except FileNotFoundError:
+                fixes_available = False
+        if check_profile is not None and profile_dir.is_dir():
+            check_profile.update(await asyncio.to_thread(load_check_profile, profile_dir))
+
+    return returncode, stderr, violations, fixes_available
+
+
+def _mark_run_running(run_id):
+    with db.transaction() as c:
+        c.execute('''
+            UPDATE lint_runs SET status = ? WHERE id = ?
+        ''', ('running', run_id))
+
+
+def _finish_run(run_id, submission_id, problem_id, status, violations, fixes_available, error_message,
+                duration_ms, clang_tidy_ms, clang_tidy_cpu_ms, check_profile, lease_owner=None, config=None):
+    """寫回 run 結果；完成的 run 在同一交易中寫入 lint_reports（與各檢查耗時）並累加題目統計，回傳 report_id
+
+    config 為本次使用的設定的 config_hash（統計以此區分規則集）。
+
+    lease_owner（worker 執行的持久佇列工作）已不再持有租約時捨棄結果（工作已重新排隊，由其他 worker 寫回），回傳 None。
+    """
+    now = datetime.now().isoformat()
+    report_id = _new_report_id(submission_id) if status == 'finished' else None
+    with db.transaction() as c:
+        if lease_owner is not None and not work_queue.holds_lease(c, run_id, lease_owner):
+            return None
+        c.execute('''
+            UPDATE lint_runs
+            SET status = ?, violations_count = ?, fixes_available = ?,
+                completed_at = ?, error_message = ?,
+                duration_ms = ?, clang_tidy_ms = ?, clang_tidy_cpu_ms = ?
+            WHERE id = ?
+        ''', (status, len(violations), fixes_available, now,
+              error_message, duration_ms, clang_tidy_ms, clang_tidy_cpu_ms, run_id))
+        if report_id is not None:
+            c.execute('''
+                INSERT INTO lint_reports
+                (id, submission_id, problem_id, run_id, passed, violations,
+                 total_violations, execution_time_ms, created_at, config_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (report_id, submission_id, problem_id, run_id, not violations,
+                  json.dumps(violations), len(violations), duration_ms, now, config))
+            record_problem_stats(c, problem_id, config, [
+                (submission_id, not violations, violations, len(violations), duration_ms),
+            ])
+        if check_profile:
+            c.executemany('''
+                INSERT OR REPLACE INTO lint_check_profiles
+                (run_id, problem_id, check_name, wall_ms, user_ms, sys_ms, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(run_id, problem_id, name, t['wall'] * 1000, t['user'] * 1000, t['sys'] * 1000, now)
+                  for name, t in check_profile.items()])
+    return report_id
+
+
+class LintPlan(NamedTuple):
+    """啟動 clang-tidy 前可先決定的部分：預篩通過或快取命中時不需要執行名額"""
+    config_bytes: bytes
+    std_flag: str
+    prescreened: bool
+    pch_args: list[str]
+    cache_key: str | None
+    cached: dict | None
+    config_seconds: float
+
+    @property
+    def needs_clang_tidy(self) -> bool:
+        return not self.prescreened and self.cached is None
+
+
+def _plan_lint(code, problem_id, language_type, export_fixes, use_prescreen, profile):
+    """讀取配置並檢查預篩與快取（會讀檔與建置 PCH，在執行緒中呼叫）"""
+    config_start = time.perf_counter()
+    config_src = CONFIG_DIR / f"problem_{problem_id}" / ".clang-tidy"
+    config_bytes = config_src.read_bytes() if config_src.exists() else b""
+    config_seconds = time.perf_counter() - config_start
+    std_flag = '-std=c17' if language_type == 0 else '-std=c++17'
+
+    # 只有禁用規則且程式碼中找不到對應 token 時，不必啟動 clang-tidy
+    if use_prescreen and not profile and prescreen(code, config_bytes):
+        return LintPlan(config_bytes, std_flag, True, [], None, None, config_seconds)
+    # PCH 第一次使用時需要建置
+    pch_args = _pch_args(code, config_bytes, language_type, std_flag)
+    # 相同程式碼 + 相同配置 + 相同模組 + 相同 PCH => 直接沿用先前結果
+    cache_key = make_key(code, config_bytes, std_flag, module_identity(MODULE_PATH),
+                         f"export_fixes={bool(export_fixes)}", _pch_key(pch_args))
+    cached = None
+    if not profile and _has_violation_list(entry := lint_cache.get(cache_key)):
+        cached = entry
+    return LintPlan(config_bytes, std_flag, False, pch_args, cache_key, cached, config_seconds)
+
+
+async def _execute_lint(run_id, submission_id, code, problem_id, language_type, timeout_sec, export_fixes, use_prescreen=False,
+                        profile=False, priority='interactive', fair_key=None, admitted=False, lease_owner=None,
+                        plan=None):
+    """執行單一提交的檢查（預篩 -> 快取 -> clang-tidy），並將結果寫回 lint_runs 與 lint_reports
+
+    profile 時一律實際執行 clang-tidy，各檢查耗時寫入 lint_check_profiles。
+    clang-tidy 需先取得准入名額（依 priority 與 fair_key 排隊）；admitted 表示已在佇列中（非同步工作），不受佇列上限限制。
+    lease_owner 為 worker 的租約持有者，失去租約時結果不寫回（見 _finish_run）。
+    plan 為呼叫端已計算的 LintPlan（/lint/run 依此決定是否需要准入），未提供時在此計算。
+    各階段耗時記錄於 lint_stage_seconds，總耗時與 clang-tidy 牆鐘/CPU 時間寫入 lint_runs。
+    資料庫與快取存取在執行緒中進行，等待 clang-tidy 時不佔用執行緒。
+    """
+    started = time.perf_counter()
+    timings = {}
+    await asyncio.to_thread(_mark_run_running, run_id)
+    timings['db_update'] = time.perf_counter() - started
+    runs_in_progress.inc()
+
+    # 非同步模式的 run 會有對應的串流，逐筆發佈診斷
+    stream = stream_registry.get(run_id)
+
+    violations = []
+    fixes_available = False
+    report_id = None
+    cache_hit = False
+    prescreened = False
+    check_profile = {} if profile else None
+    try:
+        if plan is None:
+            plan = await asyncio.to_thread(_plan_lint, code, problem_id, language_type, export_fixes,
+                                           use_prescreen, profile)
+        timings['config_load'] = plan.config_seconds
+        prescreened = plan.prescreened
+        if prescreened:
+            status, error_message = 'finished', None
+        elif plan.cached is not None:
+            status, error_message = 'finished', None
+            violations = plan.cached["violations"]
+            fixes_available = plan.cached["fixes_available"]
+            cache_hit = True
+        else:
+            async with admission.acquire_async(bounded=not admitted, priority=priority,
+                                               key=fair_key or _fair_key(problem_id)) as waited:
+                timings['admission_wait'] = waited
+                queue_wait_seconds.observe(waited, priority=priority)
+                returncode, stderr, violations, fixes_available = await _invoke_clang_tidy(
+                    code, plan.config_bytes, plan.std_flag, language_type, timeout_sec, export_fixes, plan.pch_args,
+                    on_diagnostic=stream.publish_async if stream else None, timings=timings,
+                    check_profile=check_profile)
+            status = 'finished' if returncode in [0, 1] else 'failed'
+            error_message = stderr if status == 'failed' else None
+            if status == 'finished':
+                await asyncio.to_thread(lint_cache.put, plan.cache_key, {
+                    "violations_count": len(violations),
+                    "violations": violations,
+                    "fixes_available": fixes_available,
+                })
+    except subprocess.TimeoutExpired:
+        # 逾時也要結束 run 記錄，避免停留在 running
+        status, error_message = 'timeout', 'clang-tidy timeout.'
+        raise
+    except QueueFull:
+        status, error_message = 'failed', 'lint queue is full.'
+        raise
+    except asyncio.CancelledError:
+        status, error_message = 'failed', 'lint cancelled.'
+        raise
+    except Exception as e:
+        status, error_message = 'failed', f"clang-tidy runtime error: {str(e)}"
+        raise
+    finally:
+        duration_ms = _ms(time.perf_counter() - started)
+        clang_tidy_ms = _ms(timings.get('clang_tidy'))
+        clang_tidy_cpu_ms = _ms(timings.get('clang_tidy_cpu'))
+
+        # 更新 run 記錄
+        update_start = time.perf_counter()
+        report_id = await asyncio.shield(asyncio.to_thread(
+            _finish_run, run_id, submission_id, problem_id, status, violations, fixes_available, error_message,
+            duration_ms, clang_tidy_ms, clang_tidy_cpu_ms, check_profile, lease_owner,
+            config_hash(plan.config_bytes) if plan is not None else None))
+        timings['db_update'] += time.perf_counter() - update_start
+        _record_run_metrics(status, timings, time.perf_counter() - started, cache_hit, prescreened)
+        stream_registry.close(run_id, {
+            "status": status,
+            "violations_count": len(violations),
+            "fixes_available": fixes_available,
+            "error_message": error_message,
+        })
+
+    return {
+        "status": status,
+        "violations_count": len(violations),
+        "fixes_available": fixes_available,
+        "report_id": report_id,
+        "cache_hit": cache_hit,
+        "prescreened": prescreened,
+        "profiled": bool(check_profile),
+        "duration_ms": duration_ms,
+    }
+
+
+def _has_violation_list(cached):
+    """快取項目是否含違規清單（舊版快取只記錄違規數，視為未命中）"""
+    return cached is not None and "violations" in cached
+
+
+def _ms(seconds):
+    return None if seconds is None else int(round(seconds * 1000))
+
+
+def _record_run_metrics(status, timings, total_seconds, cache_hit, prescreened):
+    runs_in_progress.dec()
+    runs_total.inc(status=status)
+    run_seconds.observe(total_seconds, status=status)
+    if status == 'timeout':
+        timeouts_total.inc()
+    if cache_hit:
+        cache_hits_total.inc()
+    if prescreened:
+        prescreen_passes_total.inc()
+    cpu = timings.pop('clang_tidy_cpu', None)
+    if cpu is not None:
+        clang_tidy_cpu_seconds.observe(cpu)
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage=stage)
+
+
+async def _execute_lint_job(enqueued_at, plan, *args):
+    """背景工作入口：錯誤已記錄於 lint_runs，這裡只需吞掉例外"""
+    queue_depth.dec()
+    if plan.needs_clang_tidy:
+        admission.dequeue()
+    stage_seconds.observe(time.perf_counter() - enqueued_at, stage='queue_wait')
+    try:
+        await _execute_lint(*args, admitted=True, plan=plan)
+    except Exception:
+        pass
+
+
+def _spawn(coro):
+    """在事件迴圈上執行背景工作（保留參考，避免執行中的 task 被回收）"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def _fetch_submission_code(submission_id):
+    """回傳 (程式碼, 使用者)，不存在時回傳 None"""
+    with db.connection() as c:
+        c.execute(f'SELECT {CODE_COLUMNS}, s.user_id FROM submissions s {CODE_JOIN} WHERE s.id = ?',
+                  (submission_id,))
+        row = c.fetchone()
+    return (load_code(*row[:3]), row[3]) if row else None
+
+
+def _create_run(run_id, submission_id, problem_id):
+    with db.transaction() as c:
+        c.execute('''
+            INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (run_id, submission_id, problem_id, 'queued', datetime.now().isoformat()))
+
+
+def _create_queued_run(run_id, submission_id, problem_id, params, priority, fair_key):
+    """建立 run 記錄並寫入持久佇列（同一個交易）"""
+    with db.transaction() as c:
+        c.execute('''
+            INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (run_id, submission_id, problem_id, 'queued', datetime.now().isoformat()))
+        work_queue.enqueue(c, run_id, submission_id, problem_id, params, priority, fair_key)
+
+
 @app.post('/lint/run')
-def run_lint(body: RunBody):
+async def run_lint(body: RunBody):
     """4. POST /lint/run – 執行 Clang-Tidy 檢查"""
     try:
         submission_id = body.submission_id
@@ -292,111 +825,837 @@ def run_lint(body: RunBody):
         language_type = body.language_type or 1  # 0=C, 1=C++
         timeout_sec = body.timeout_sec or 30
         export_fixes = True if body.export_fixes is None else body.export_fixes
+        use_prescreen = LINT_PRESCREEN if body.prescreen is None else body.prescreen
+        if body.profile is None:
+            profile = LINT_PROFILE_SAMPLE_RATE > 0 and random.random() < LINT_PROFILE_SAMPLE_RATE
+        else:
+            profile = body.profile
+        priority = _priority(body.priority, 'interactive')
 
         if not submission_id or not problem_id:
             raise HTTPException(status_code=400, detail="invalid submission_id or missing code.")
         
         # 取得提交程式碼
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT code, language FROM submissions WHERE id = ?', (submission_id,))
-        row = c.fetchone()
+        with stage_seconds.time(stage='db_fetch'):
+            row = await asyncio.to_thread(_fetch_submission_code, submission_id)
         
         if not row:
-            conn.close()
             raise HTTPException(status_code=404, detail="submission not found.")
         
-        code, language = row
-        
+        code, user_id = row
+        fair_key = _fair_key(problem_id, user_id)
+        run_id = _new_run_id(submission_id)
+
+        # 持久佇列：建立 run 記錄並排入 lint_queue，由 api.worker 執行
+        if body.async_mode and LINT_QUEUE_BACKEND == 'db':
+            await asyncio.to_thread(_create_queued_run, run_id, submission_id, problem_id, {
+                "language_type": language_type,
+                "timeout_sec": timeout_sec,
+                "export_fixes": export_fixes,
+                "use_prescreen": use_prescreen,
+                "profile": profile,
+            }, priority, fair_key)
+            return JSONResponse(status_code=202, content={
+                "message": "clang-tidy queued.",
+                "run_id": run_id,
+                "status": "queued",
+            })
+
+        # 預篩通過或快取命中不會啟動 clang-tidy，不需要准入；
+        # 其餘在佇列已滿時直接回 429，不建立 run 記錄
+        plan = await asyncio.to_thread(_plan_lint, code, problem_id, language_type, export_fixes,
+                                       use_prescreen, profile)
+        if plan.needs_clang_tidy:
+            if body.async_mode:
+                admission.enqueue(priority)
+            else:
+                admission.check(priority)
+
         # 建立 run 記錄
-        run_id = f"run_{submission_id}_{int(datetime.now().timestamp())}"
-        now = datetime.now().isoformat()
-        c.execute('''
-            INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (run_id, submission_id, problem_id, 'running', now))
-        conn.commit()
-        
-        # 建立臨時工作目錄
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            
-            # 決定檔案副檔名
-            ext = '.c' if language_type == 0 else '.cpp'
-            code_file = tmpdir_path / f"code{ext}"
-            code_file.write_text(code)
-            
-            # 複製 .clang-tidy 配置
-            config_src = CONFIG_DIR / f"problem_{problem_id}" / ".clang-tidy"
-            if config_src.exists():
-                shutil.copy(config_src, tmpdir_path / ".clang-tidy")
-            
-            # 準備 clang-tidy 命令
-            std_flag = '-std=c17' if language_type == 0 else '-std=c++17'
-            fixes_file = tmpdir_path / "fixes.yaml"
-            
-            cmd = [
-                'clang-tidy',
-                str(code_file),
-                '-load', str(MODULE_PATH),
-            ]
-            
-            if export_fixes:
-                cmd.extend(['-export-fixes', str(fixes_file)])
-            
-            cmd.extend(['--', std_flag])
-            
-            # 執行 clang-tidy
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout_sec,
-                cwd=tmpdir_path,
-            )
-            
-            # 解析結果
-            violations_count = 0
-            fixes_available = False
-            
-            if export_fixes and fixes_file.exists():
-                with open(fixes_file, 'r') as f:
-                    fixes_data = yaml.safe_load(f)
-                    if fixes_data and 'Diagnostics' in fixes_data:
-                        violations_count = len(fixes_data['Diagnostics'])
-                        fixes_available = True
-            
-            # 更新 run 記錄
-            status = 'finished' if result.returncode in [0, 1] else 'failed'
-            c.execute('''
-                UPDATE lint_runs
-                SET status = ?, violations_count = ?, fixes_available = ?,
-                    completed_at = ?, error_message = ?
-                WHERE id = ?
-            ''', (status, violations_count, fixes_available, datetime.now().isoformat(),
-                  result.stderr if status == 'failed' else None, run_id))
-            conn.commit()
-        
-        conn.close()
+        try:
+            await asyncio.to_thread(_create_run, run_id, submission_id, problem_id)
+        except Exception:
+            if body.async_mode and plan.needs_clang_tidy:
+                admission.dequeue()
+            raise
+
+        job_args = (run_id, submission_id, code, problem_id, language_type, timeout_sec, export_fixes, use_prescreen, profile,
+                    priority, fair_key)
+
+        # 非同步模式：在事件迴圈上背景執行，立即回傳 202
+        if body.async_mode:
+            stream_registry.open(run_id)
+            queue_depth.inc()
+            _spawn(_execute_lint_job(time.perf_counter(), plan, *job_args))
+            return JSONResponse(status_code=202, content={
+                "message": "clang-tidy queued.",
+                "run_id": run_id,
+                "status": "queued",
+            })
+
+        outcome = await _execute_lint(*job_args, plan=plan)
         
         return {
             "message": "clang-tidy completed.",
             "run_id": run_id,
-            "status": status,
-            "violations_count": violations_count,
-            "fixes_available": fixes_available,
+            **outcome,
         }
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=500, detail="clang-tidy timeout.")
+    except QueueFull as e:
+        rejected_total.inc()
+        raise HTTPException(status_code=429, detail="lint queue is full.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"clang-tidy runtime error: {str(e)}")
+
+
+def _run_batch_chunk(workspace, files, timeout_sec, priority, fair_key):
+    """以單一 clang-tidy 行程檢查一組檔案，回傳 (returncode, stderr, {檔名: 違規清單})
+
+    批次不匯出 fixes，直接依 stdout 診斷的檔名拆回各檔案。
+    """
+    cmd = [
+        CLANG_TIDY,
+        '-p', str(workspace),
+        '-load', str(MODULE_PATH),
+        *(str(f) for f in files),
+    ]
+    violations = {}
+
+    def collect(diagnostic):
+        violations.setdefault(diagnostic.file, []).append(as_violation(diagnostic))
+
+    with admission.acquire(bounded=False, priority=priority, key=fair_key) as waited:
+        queue_wait_seconds.observe(waited, priority=priority)
+        returncode, stderr = _run_streaming(cmd, workspace, timeout_sec * len(files), collect)
+    return returncode, stderr, violations
+
+
+def _lint_batch_chunk(workspace, files, timeout_sec, priority, fair_key):
+    """檢查一組檔案，回傳 {檔名: (status, error_message, 違規清單)}
+
+    整組失敗或逾時（可能只是其中一個檔案造成 clang-tidy 當掉）時逐一重新檢查，其他檔案仍得到實際結果。
+    """
+    try:
+        returncode, stderr, violations = _run_batch_chunk(workspace, files, timeout_sec, priority, fair_key)
+        status = 'finished' if returncode in [0, 1] else 'failed'
+        error_message = stderr if status == 'failed' else None
+    except subprocess.TimeoutExpired:
+        status, error_message, violations = 'timeout', 'clang-tidy timeout.', {}
+    except Exception as e:
+        status, error_message, violations = 'failed', f"clang-tidy runtime error: {str(e)}", {}
+
+    if status != 'finished' and len(files) > 1:
+        results = {}
+        for path in files:
+            results.update(_lint_batch_chunk(workspace, [path], timeout_sec, priority, fair_key))
+        return results
+    return {
+        path.name: (status, error_message, violations.get(path.name, []) if status == 'finished' else [])
+        for path in files
+    }
+
+
+def _finish_batch_runs(problem_id, submissions, outcomes, config):
+    """寫回一組批次 run 的結果；完成的 run 在同一交易中寫入 lint_reports 並累加題目統計
+
+    submissions 為 run_id -> submission_id，config 為批次使用的設定的 config_hash。
+    """
+    completed_at = datetime.now().isoformat()
+    finished = [(run_id, o) for run_id, o in outcomes.items() if o["status"] == 'finished']
+    with db.transaction() as c:
+        c.executemany('''
+            UPDATE lint_runs
+            SET status = ?, violations_count = ?, fixes_available = ?,
+                completed_at = ?, error_message = ?
+            WHERE id = ?
+        ''', [
+            (o["status"], o["violations_count"], o["fixes_available"], completed_at,
+             o["error_message"], run_id)
+            for run_id, o in outcomes.items()
+        ])
+        c.executemany('''
+            INSERT INTO lint_reports
+            (id, submission_id, problem_id, run_id, passed, violations,
+             total_violations, execution_time_ms, created_at, config_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (_new_report_id(submissions[run_id]), submissions[run_id], problem_id, run_id,
+             not o["violations"], json.dumps(o["violations"]), len(o["violations"]), None, completed_at, config)
+            for run_id, o in finished
+        ])
+        record_problem_stats(c, problem_id, config, [
+            (submissions[run_id], not o["violations"], o["violations"], len(o["violations"]), None)
+            for run_id, o in finished
+        ])
+
+
+def _execute_batch(problem_id, runs, timeout_sec, jobs, on_progress=None, priority='batch'):
+    """批次檢查：同一工作目錄 + compile_commands.json，多個 clang-tidy 行程平行執行
+
+    runs 為 (run_id, submission_id, code, language_type) 清單；相同內容只分析一次。
+    每完成一組（快取命中或一個 chunk）就寫回 lint_runs，並以該組結果呼叫 on_progress。
+    各 chunk 以 priority 類別、題目為公平鍵取得准入名額，不會擋住 interactive 的請求。
+    """
+    config_src = CONFIG_DIR / f"problem_{problem_id}" / ".clang-tidy"
+    config_bytes = config_src.read_bytes() if config_src.exists() else b""
+    config = config_hash(config_bytes)
+    module_id = module_identity(MODULE_PATH)
+
+    with db.transaction() as c:
+        c.executemany('''
+            UPDATE lint_runs SET status = ? WHERE id = ?
+        ''', [('running', run[0]) for run in runs])
+
+    submissions = {run[0]: run[1] for run in runs}
+    outcomes = {}  # run_id -> 結果
+    pending = {}   # 快取鍵 -> (code, language_type, std_flag, pch_args, [run_id, ...])
+    for run_id, _submission_id, code, language_type in runs:
+        std_flag = '-std=c17' if language_type == 0 else '-std=c++17'
+        pch_args = _pch_args(code, config_bytes, language_type, std_flag)
+        cache_key = make_key(code, config_bytes, std_flag, module_id, "export_fixes=False", _pch_key(pch_args))
+        cached = lint_cache.get(cache_key)
+        if _has_violation_list(cached):
+            outcomes[run_id] = {
+                "status": 'finished',
+                "violations_count": cached["violations_count"],
+                "violations": cached["violations"],
+                "fixes_available": cached["fixes_available"],
+                "cache_hit": True,
+                "error_message": None,
+            }
+        elif cache_key in pending:
+            pending[cache_key][4].append(run_id)
+        else:
+            pending[cache_key] = (code, language_type, std_flag, pch_args, [run_id])
+
+    if outcomes:
+        _finish_batch_runs(problem_id, submissions, outcomes, config)
+        if on_progress is not None:
+            on_progress(dict(outcomes))
+
+    if pending:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            workspace = Path(tmpdir)
+            if config_bytes:
+                (workspace / ".clang-tidy").write_bytes(config_bytes)
+
+            # 每個不同內容寫成一個檔案，並產生 compile_commands.json
+            files = {}
+            entries = []
+            for cache_key, (code, language_type, std_flag, pch_args, _run_ids) in pending.items():
+                ext = '.c' if language_type == 0 else '.cpp'
+                path = workspace / f"{cache_key[:24]}{ext}"
+                path.write_text(code)
+                files[path.name] = cache_key
+                entries.append({
+                    "directory": str(workspace),
+                    "file": str(path),
+                    "arguments": [
+                        'clang' if language_type == 0 else 'clang++', std_flag,
+                        *pch_args, '-c', str(path),
+                    ],
+                })
+            (workspace / "compile_commands.json").write_text(json.dumps(entries))
+
+            paths = [workspace / name for name in files]
+            chunks = [paths[i:i + LINT_BATCH_CHUNK] for i in range(0, len(paths), LINT_BATCH_CHUNK)]
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                futures = {pool.submit(_lint_batch_chunk, workspace, chunk, timeout_sec, priority,
+                                       _fair_key(problem_id)): chunk
+                           for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    chunk_outcomes = {}
+                    results = future.result()
+
+                    for path in chunk:
+                        cache_key = files[path.name]
+                        status, error_message, file_violations = results[path.name]
+                        # 批次的暫存檔名以快取鍵命名，改回與單一 run 相同的檔名後才寫入報告與快取
+                        file_violations = [{**v, 'file': f"code{path.suffix}"} for v in file_violations]
+                        outcome = {
+                            "status": status,
+                            "violations_count": len(file_violations),
+                            "violations": file_violations,
+                            "fixes_available": False,
+                            "cache_hit": False,
+                            "error_message": error_message,
+                        }
+                        if status == 'finished':
+                            lint_cache.put(cache_key, {
+                                "violations_count": outcome["violations_count"],
+                                "violations": file_violations,
+                                "fixes_available": outcome["fixes_available"],
+                            })
+                        for run_id in pending[cache_key][4]:
+                            chunk_outcomes[run_id] = outcome
+
+                    _finish_batch_runs(problem_id, submissions, chunk_outcomes, config)
+                    outcomes.update(chunk_outcomes)
+                    if on_progress is not None:
+                        on_progress(chunk_outcomes)
+
+    return outcomes
+
+
+def _execute_batch_job(problem_id, runs, *args):
+    """背景執行緒入口：批次結果已記錄於 lint_runs；發生例外時其餘未完成的 run 記錄為 failed"""
+    try:
+        _execute_batch(problem_id, runs, *args)
+    except Exception as e:
+        _fail_runs([run[0] for run in runs], f"clang-tidy runtime error: {str(e)}")
+
+
+def _submit_batch_job(problem_id, runs, *args):
+    """在 lint_executor 背景執行批次；開始前被取消（關閉時 cancel_futures）的批次也將 run 記錄為 failed"""
+    def on_done(future):
+        if future.cancelled():
+            _fail_runs([run[0] for run in runs], "lint cancelled by shutdown.")
+
+    lint_executor.submit(_execute_batch_job, problem_id, runs, *args).add_done_callback(on_done)
+
+
+def _fail_runs(run_ids, error_message):
+    """將尚未完成（queued/running）的 run 記錄為 failed"""
+    completed_at = datetime.now().isoformat()
+    with db.transaction() as c:
+        c.executemany('''
+            UPDATE lint_runs SET status = 'failed', completed_at = ?, error_message = ?
+            WHERE id = ? AND status IN ('queued', 'running')
+        ''', [(completed_at, error_message, run_id) for run_id in run_ids])
+
+
+@app.post('/lint/run/batch')
+def run_lint_batch(body: BatchRunBody, _perm: bool = Depends(permission_dependency)):
+    """POST /lint/run/batch – 批次執行 Clang-Tidy 檢查（重新評測用）"""
+    try:
+        problem_id = body.problem_id
+        timeout_sec = body.timeout_sec or 30
+        jobs = body.jobs or os.cpu_count() or 1
+        priority = _priority(body.priority, 'batch')
+
+        if not problem_id:
+            raise HTTPException(status_code=400, detail="missing problem_id.")
+
+        # 取得提交程式碼（未指定 submission_ids 時取整個題目）
+        rows = []
+        with db.connection() as c:
+            if body.submission_ids:
+                ids = list(dict.fromkeys(body.submission_ids))
+                for i in range(0, len(ids), 500):
+                    part = ids[i:i + 500]
+                    c.execute(f'''
+                        SELECT s.id, {CODE_COLUMNS}, s.language FROM submissions s {CODE_JOIN}
+                        WHERE s.problem_id = ? AND s.id IN ({",".join("?" * len(part))})
+                    ''', (problem_id, *part))
+                    rows.extend(c.fetchall())
+            else:
+                c.execute(f'''
+                    SELECT s.id, {CODE_COLUMNS}, s.language FROM submissions s {CODE_JOIN}
+                    WHERE s.problem_id = ?
+                ''', (problem_id,))
+                rows = c.fetchall()
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="no submissions found.")
+
+        # 一次建立所有 run 記錄
+        now = datetime.now().isoformat()
+        runs = [
+            (_new_run_id(submission_id), submission_id, load_code(code, codec, data), 0 if language == 'c' else 1)
+            for submission_id, code, codec, data, language in rows
+        ]
+        with db.transaction() as c:
+            c.executemany('''
+                INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(run_id, submission_id, problem_id, 'queued', now)
+                  for run_id, submission_id, _code, _lt in runs])
+
+        job_args = (problem_id, runs, timeout_sec, jobs, None, priority)
+
+        if body.async_mode:
+            _submit_batch_job(*job_args)
+            return JSONResponse(status_code=202, content={
+                "message": "batch queued.",
+                "total": len(runs),
+                "run_ids": [run[0] for run in runs],
+            })
+
+        outcomes = _execute_batch(*job_args)
+
+        return {
+            "message": "batch completed.",
+            "total": len(runs),
+            "results": [
+                {
+                    "submission_id": submission_id,
+                    "run_id": run_id,
+                    "status": outcomes[run_id]["status"],
+                    "violations_count": outcomes[run_id]["violations_count"],
+                    "fixes_available": outcomes[run_id]["fixes_available"],
+                    "cache_hit": outcomes[run_id]["cache_hit"],
+                }
+                for run_id, submission_id, _code, _lt in runs
+            ],
+        }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"clang-tidy runtime error: {str(e)}")
 
 
+def _execute_relint(job_id, problem_id, runs, timeout_sec, jobs, priority='batch'):
+    """背景重新評測：以批次流程執行，並隨每組結果更新 lint_jobs 進度"""
+    with db.transaction() as c:
+        c.execute('''
+            UPDATE lint_jobs SET status = ?, started_at = ? WHERE id = ? AND status = 'queued'
+        ''', ('running', datetime.now().isoformat(), job_id))
+
+    def on_progress(outcomes):
+        failed = sum(1 for o in outcomes.values() if o["status"] != 'finished')
+        with db.transaction() as c:
+            c.execute('''
+                UPDATE lint_jobs SET done = done + ?, failed = failed + ? WHERE id = ?
+            ''', (len(outcomes), failed, job_id))
+
+    try:
+        _execute_batch(problem_id, runs, timeout_sec, jobs, on_progress, priority)
+        status, error_message = 'finished', None
+    except Exception as e:
+        status, error_message = 'failed', f"relint error: {str(e)}"
+    try:
+        with db.transaction() as c:
+            c.execute('''
+                UPDATE lint_jobs SET status = ?, completed_at = ?, error_message = ? WHERE id = ?
+            ''', (status, datetime.now().isoformat(), error_message, job_id))
+    finally:
+        owned_jobs.discard(job_id)
+
+
+def _fail_job(c, job_id, error_message):
+    """將背景工作與其未完成的 run 記錄為 failed；須在交易內呼叫"""
+    completed_at = datetime.now().isoformat()
+    c.execute('''
+        UPDATE lint_runs SET status = 'failed', completed_at = ?, error_message = ?
+        WHERE job_id = ? AND status IN ('queued', 'running')
+    ''', (completed_at, error_message, job_id))
+    lost = c.rowcount
+    c.execute('''
+        UPDATE lint_jobs
+        SET status = 'failed', completed_at = ?, error_message = ?, done = done + ?, failed = failed + ?
+        WHERE id = ?
+    ''', (completed_at, error_message, lost, lost, job_id))
+
+
+def _fail_stale_jobs(c):
+    """心跳逾時（所屬行程已結束）的 queued/running 工作記錄為 failed，回傳筆數；須在交易內呼叫"""
+    c.execute('''
+        SELECT id FROM lint_jobs
+        WHERE status IN ('queued', 'running') AND COALESCE(heartbeat_at, 0) < ?
+    ''', (time.time() - LINT_JOB_STALE_SEC,))
+    stale = [row[0] for row in c.fetchall()]
+    for job_id in stale:
+        _fail_job(c, job_id, "relint worker lost.")
+    return len(stale)
+
+
+def _job_heartbeat():
+    """心跳執行緒：定期更新本行程背景工作的 heartbeat_at"""
+    while not job_heartbeat_stop.wait(LINT_JOB_STALE_SEC / 3):
+        job_ids = tuple(owned_jobs)
+        if not job_ids:
+            continue
+        try:
+            with db.transaction() as c:
+                c.execute(f'''
+                    UPDATE lint_jobs SET heartbeat_at = ?
+                    WHERE owner = ? AND id IN ({",".join("?" * len(job_ids))})
+                ''', (time.time(), job_owner, *job_ids))
+        except Exception as e:
+            print(f"⚠️  job heartbeat failed: {e}")
+
+
+@app.post('/lint/problems/{problem_id}/relint', status_code=202)
+def relint_problem(problem_id: int, body: RelintBody | None = None,
+                   _perm: bool = Depends(permission_dependency)):
+    """POST /lint/problems/<problem_id>/relint – 以目前規則重新評測題目的所有提交（背景執行）"""
+    try:
+        body = body or RelintBody()
+        timeout_sec = body.timeout_sec or 30
+        jobs = body.jobs or os.cpu_count() or 1
+        priority = _priority(body.priority, 'batch')
+
+        # 檢查與建立工作在同一個交易中，並行的請求不會同時通過
+        now = datetime.now().isoformat()
+        job_id = f"job_{problem_id}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:6]}"
+        with db.transaction() as c:
+            _fail_stale_jobs(c)
+            c.execute('''
+                SELECT id FROM lint_jobs
+                WHERE problem_id = ? AND kind = 'relint' AND status IN ('queued', 'running')
+            ''', (problem_id,))
+            active = c.fetchone()
+            # 程式碼於交易外讀取；相同程式碼（且相同語言）只分析一次
+            c.execute('''
+                SELECT id, language, COALESCE(code_hash, code) FROM submissions WHERE problem_id = ?
+            ''', (problem_id,))
+            rows = c.fetchall()
+            runs = [(_new_run_id(submission_id), submission_id, 0 if language == 'c' else 1)
+                    for submission_id, language, _source in rows]
+            unique_sources = len({(language, source) for _sid, language, source in rows})
+            if active is None and runs:
+                c.execute('''
+                    INSERT INTO lint_jobs
+                    (id, problem_id, kind, status, total, unique_sources, created_at, owner, heartbeat_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (job_id, problem_id, 'relint', 'queued', len(runs), unique_sources, now,
+                      job_owner, time.time()))
+                c.executemany('''
+                    INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at, job_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(run_id, submission_id, problem_id, 'queued', now, job_id)
+                      for run_id, submission_id, _lt in runs])
+
+        if active:
+            raise HTTPException(status_code=409, detail=f"relint already in progress: {active[0]}.")
+        if not runs:
+            raise HTTPException(status_code=404, detail="no submissions found.")
+
+        owned_jobs.add(job_id)
+        try:
+            ids = {run[1] for run in runs}
+            sources = {}
+            with db.connection() as c:
+                c.execute(f'''
+                    SELECT s.id, {CODE_COLUMNS} FROM submissions s {CODE_JOIN} WHERE s.problem_id = ?
+                ''', (problem_id,))
+                for submission_id, code, codec, data in c.fetchall():
+                    if submission_id in ids:
+                        sources[submission_id] = load_code(code, codec, data)
+            runs = [(run_id, submission_id, sources[submission_id], language_type)
+                    for run_id, submission_id, language_type in runs]
+            lint_executor.submit(_execute_relint, job_id, problem_id, runs, timeout_sec, jobs, priority)
+        except Exception as e:
+            owned_jobs.discard(job_id)
+            with db.transaction() as c:
+                _fail_job(c, job_id, f"relint error: {str(e)}")
+            raise
+
+        return {
+            "message": "relint queued.",
+            "job_id": job_id,
+            "total": len(runs),
+            "unique_sources": unique_sources,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get('/lint/jobs/{job_id}')
+def get_lint_job(job_id: str):
+    """GET /lint/jobs/<job_id> – 查詢背景工作進度"""
+    try:
+        with db.connection() as c:
+            c.execute('''
+                SELECT id, problem_id, kind, status, total, unique_sources, done, failed,
+                       created_at, started_at, completed_at, error_message
+                FROM lint_jobs WHERE id = ?
+            ''', (job_id,))
+            row = c.fetchone()
+
+        if not row:
+            raise HTTPException(status_code=404, detail="job not found.")
+
+        (job_id, problem_id, kind, status, total, unique_sources, done, failed,
+         created_at, started_at, completed_at, error_message) = row
+
+        # 以目前的平均速度估計剩餘時間
+        eta_sec = None
+        if status == 'running' and started_at and done:
+            elapsed = (datetime.now() - datetime.fromisoformat(started_at)).total_seconds()
+            eta_sec = round(elapsed / done * (total - done), 1)
+
+        return {
+            "job_id": job_id,
+            "problem_id": problem_id,
+            "kind": kind,
+            "status": status,
+            "total": total,
+            "unique_sources": unique_sources,
+            "done": done,
+            "failed": failed,
+            "progress": round(done / total, 4) if total else 1.0,
+            "eta_sec": eta_sec,
+            "created_at": created_at,
+            "started_at": started_at,
+            "completed_at": completed_at,
+            "error_message": error_message,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+RUN_LIST_COLUMNS = [
+    'id', 'submission_id', 'problem_id', 'status', 'violations_count', 'fixes_available',
+    'created_at', 'completed_at', 'error_message', 'duration_ms',
+]
+REPORT_LIST_COLUMNS = [
+    'id', 'submission_id', 'problem_id', 'run_id', 'passed', 'violations', 'total_violations',
+    'execution_time_ms', 'created_at',
+]
+
+
+@app.get('/lint/runs')
+def list_lint_runs(problem_id: int | None = None, submission_id: int | None = None,
+                   status: str | None = None, since: str | None = None, until: str | None = None,
+                   cursor: str | None = None, limit: int = 50,
+                   _auth: bool = Depends(auth_dependency)):
+    """GET /lint/runs – 依條件列出 run（由新到舊，cursor 分頁）"""
+    try:
+        sql, params = build_page_query(
+            'lint_runs', RUN_LIST_COLUMNS,
+            {'problem_id': problem_id, 'submission_id': submission_id, 'status': status},
+            since, until, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        with db.connection() as c:
+            c.execute(sql, params)
+            rows = c.fetchall()
+        rows, next_cursor = page(rows, limit, lambda row: (row[6], row[0]))
+        return {
+            "items": [
+                {
+                    "run_id": row[0],
+                    "submission_id": row[1],
+                    "problem_id": row[2],
+                    "status": row[3],
+                    "violations_count": row[4],
+                    "fixes_available": None if row[5] is None else bool(row[5]),
+                    "created_at": row[6],
+                    "completed_at": row[7],
+                    "error_message": row[8],
+                    "duration_ms": row[9],
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get('/lint/reports')
+def list_lint_reports(problem_id: int | None = None, submission_id: int | None = None,
+                      since: str | None = None, until: str | None = None,
+                      cursor: str | None = None, limit: int = 50,
+                      _auth: bool = Depends(auth_dependency)):
+    """GET /lint/reports – 依條件列出報告（由新到舊，cursor 分頁）"""
+    try:
+        sql, params = build_page_query(
+            'lint_reports', REPORT_LIST_COLUMNS,
+            {'problem_id': problem_id, 'submission_id': submission_id},
+            since, until, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        with db.connection() as c:
+            c.execute(sql, params)
+            rows = c.fetchall()
+        rows, next_cursor = page(rows, limit, lambda row: (row[8], row[0]))
+        return {
+            "items": [
+                {
+                    "report_id": row[0],
+                    "submission_id": row[1],
+                    "problem_id": row[2],
+                    "run_id": row[3],
+                    "passed": bool(row[4]),
+                    "violations": json.loads(row[5]),
+                    "total_violations": row[6],
+                    "execution_time_ms": row[7],
+                    "created_at": row[8],
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _fetch_run(run_id):
+    with db.connection() as c:
+        c.execute(
+            '''
+            SELECT id, submission_id, problem_id, status, violations_count,
+                   fixes_available, created_at, completed_at, error_message,
+                   duration_ms, clang_tidy_ms, clang_tidy_cpu_ms
+            FROM lint_runs WHERE id = ?
+            ''',
+            (run_id,)
+        )
+        return c.fetchone()
+
+
+@app.get('/lint/run/{run_id}')
+async def get_lint_run(run_id: str):
+    """GET /lint/run/<run_id> – 查詢檢查執行狀態"""
+    try:
+        row = await asyncio.to_thread(_fetch_run, run_id)
+
+        if not row:
+            raise HTTPException(status_code=404, detail="run not found.")
+
+        return {
+            "run_id": row[0],
+            "submission_id": row[1],
+            "problem_id": row[2],
+            "status": row[3],
+            "violations_count": row[4],
+            "fixes_available": None if row[5] is None else bool(row[5]),
+            "created_at": row[6],
+            "completed_at": row[7],
+            "error_message": row[8],
+            "duration_ms": row[9],
+            "clang_tidy_ms": row[10],
+            "clang_tidy_cpu_ms": row[11],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get('/lint/run/{run_id}/stream')
+async def stream_lint_run(run_id: str):
+    """GET /lint/run/<run_id>/stream – 以 SSE 即時串流診斷"""
+    stream = stream_registry.get(run_id)
+    if stream is None:
+        row = await asyncio.to_thread(_fetch_run_status, run_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="run not found.")
+
+    async def events():
+        if stream is not None:
+            reader = stream.attach()
+            try:
+                while True:
+                    batch, skipped, final = stream.read(reader)
+                    if skipped:
+                        yield _sse("skipped", {"count": skipped})
+                    for diagnostic in batch:
+                        yield _sse("diagnostic", diagnostic._asdict())
+                    if final is not None and not batch:
+                        yield _sse("done", final)
+                        return
+                    if not batch:
+                        await asyncio.sleep(0.02)
+            finally:
+                stream.detach(reader)
+
+        # 串流不在本行程（已結束或由其他 worker 執行）：輪詢資料庫直到完成
+        while True:
+            row = await asyncio.to_thread(_fetch_run_status, run_id)
+            if row is None or row["status"] not in ('queued', 'running'):
+                yield _sse("done", row)
+                return
+            yield ": waiting\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+def _fetch_run_status(run_id):
+    with db.connection() as c:
+        c.execute('''
+            SELECT status, violations_count, fixes_available, error_message
+            FROM lint_runs WHERE id = ?
+        ''', (run_id,))
+        row = c.fetchone()
+    if not row:
+        return None
+    return {
+        "status": row[0],
+        "violations_count": row[1],
+        "fixes_available": None if row[2] is None else bool(row[2]),
+        "error_message": row[3],
+    }
+
+
+@app.get('/lint/problems/{problem_id}/profile')
+def get_problem_profile(problem_id: int, _perm: bool = Depends(permission_dependency)):
+    """GET /lint/problems/<problem_id>/profile – 依檢查彙總 profile run 的耗時"""
+    try:
+        with db.connection() as c:
+            c.execute('''
+                SELECT check_name, COUNT(*), SUM(wall_ms), MAX(wall_ms), SUM(user_ms), SUM(sys_ms)
+                FROM lint_check_profiles WHERE problem_id = ?
+                GROUP BY check_name ORDER BY SUM(wall_ms) DESC
+            ''', (problem_id,))
+            rows = c.fetchall()
+            c.execute('''
+                SELECT COUNT(DISTINCT run_id) FROM lint_check_profiles WHERE problem_id = ?
+            ''', (problem_id,))
+            runs = c.fetchone()[0]
+
+        total_wall_ms = sum(row[2] for row in rows)
+        return {
+            "problem_id": problem_id,
+            "runs": runs,
+            "total_wall_ms": round(total_wall_ms, 3),
+            "checks": [
+                {
+                    "check": name,
+                    "runs": count,
+                    "total_wall_ms": round(wall, 3),
+                    "avg_wall_ms": round(wall / count, 3),
+                    "max_wall_ms": round(max_wall, 3),
+                    "user_ms": round(user, 3),
+                    "sys_ms": round(sys_ms, 3),
+                    "share": round(wall / total_wall_ms, 4) if total_wall_ms else 0.0,
+                }
+                for name, count, wall, max_wall, user, sys_ms in rows
+            ],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get('/lint/problems/{problem_id}/stats')
+def get_problem_stats(problem_id: int, _perm: bool = Depends(permission_dependency)):
+    """GET /lint/problems/<problem_id>/stats – 題目的違規統計（讀取增量維護的彙總表）"""
+    try:
+        with db.connection() as c:
+            stats = fetch_problem_stats(c, problem_id)
+        if stats is None:
+            raise HTTPException(status_code=404, detail="no reports for this problem.")
+        return stats
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post('/lint/report')
 def save_report(body: ReportBody, _perm: bool = Depends(permission_dependency)):
-    """5. POST /lint/report – 儲存靜態分析結果"""
+    """5. POST /lint/report – 儲存外部執行器的分析結果（/lint/run 已在完成時自行寫入報告）"""
     try:
         submission_id = body.submission_id
         problem_id = body.problem_id
@@ -406,29 +1665,31 @@ def save_report(body: ReportBody, _perm: bool = Depends(permission_dependency)):
         if not all([submission_id, problem_id, run_id, result]):
             raise HTTPException(status_code=400, detail="invalid report format.")
         
-        # 儲存報告
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        report_id = f"rpt_{submission_id}_{int(datetime.now().timestamp())}"
+        # 儲存報告（外部執行器的結果視為依題目目前的設定產生）
+        report_id = _new_report_id(submission_id)
         now = datetime.now().isoformat()
+        config_src = CONFIG_DIR / f"problem_{problem_id}" / ".clang-tidy"
+        config = config_hash(config_src.read_bytes() if config_src.exists() else b"")
         
-        c.execute('''
-            INSERT INTO lint_reports 
-            (id, submission_id, problem_id, run_id, passed, violations, 
-             total_violations, execution_time_ms, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            report_id, submission_id, problem_id, run_id,
-            bool(result.passed),
-            json.dumps(result.violations or []),
-            int(result.total_violations or 0),
-            result.execution_time_ms,
-            now
-        ))
-        
-        conn.commit()
-        conn.close()
+        with db.transaction() as c:
+            c.execute('''
+                INSERT INTO lint_reports 
+                (id, submission_id, problem_id, run_id, passed, violations, 
+                 total_violations, execution_time_ms, created_at, config_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                report_id, submission_id, problem_id, run_id,
+                bool(result.passed),
+                json.dumps(result.violations or []),
+                int(result.total_violations or 0),
+                result.execution_time_ms,
+                now,
+                config,
+            ))
+            record_problem_stats(c, problem_id, config, [
+                (submission_id, bool(result.passed), result.violations or [], int(result.total_violations or 0),
+                 result.execution_time_ms),
+            ])
         
         return {
             "message": "report saved.",
@@ -453,18 +1714,13 @@ def create_submission(body: CreateSubmissionBody):
         if not code or not problem_id:
             raise HTTPException(status_code=400, detail="missing code or problem_id.")
         
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
         now = datetime.now().isoformat()
-        
-        c.execute('''
-            INSERT INTO submissions (problem_id, code, language, created_at)
-            VALUES (?, ?, ?, ?)
-        ''', (problem_id, code, language, now))
-        
-        submission_id = c.lastrowid
-        conn.commit()
-        conn.close()
+        with db.transaction() as c:
+            c.execute('''
+                INSERT INTO submissions (problem_id, code, code_hash, language, created_at, user_id)
+                VALUES (?, '', ?, ?, ?, ?)
+            ''', (problem_id, store_code(c, code, CODE_BLOB_CODEC), language, now, body.user_id))
+            submission_id = c.lastrowid
         
         return {
             "message": "submission created.",
@@ -476,6 +1732,140 @@ def create_submission(body: CreateSubmissionBody):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _insert_submission_batch(items, lint):
+    """在單一交易中寫入一批提交，回傳 [(submission_id, run_id)]
+
+    程式碼在交易外先壓縮；lint 為 run 參數時一併建立 run：db 佇列在同一交易中排入 lint_queue，
+    local 則依題目交給背景批次檢查。
+    """
+    blobs = {}
+    for item in items:
+        if item.code not in blobs:
+            blobs[item.code] = prepare_code(item.code, CODE_BLOB_CODEC)
+    now = datetime.now().isoformat()
+    results = []
+    local_runs = {}  # problem_id -> [(run_id, submission_id, code, language_type), ...]
+    with db.transaction() as c:
+        for item in items:
+            c.execute('''
+                INSERT INTO submissions (problem_id, code, code_hash, language, created_at, user_id)
+                VALUES (?, '', ?, ?, ?, ?)
+            ''', (item.problem_id, put_code(c, blobs[item.code]), item.language, now, item.user_id))
+            submission_id = c.lastrowid
+            run_id = None
+            if lint is not None:
+                run_id = _new_run_id(submission_id)
+                language_type = 0 if item.language == 'c' else 1
+                c.execute('''
+                    INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (run_id, submission_id, item.problem_id, 'queued', now))
+                if LINT_QUEUE_BACKEND == 'db':
+                    work_queue.enqueue(c, run_id, submission_id, item.problem_id,
+                                       {**lint["params"], "language_type": language_type},
+                                       lint["priority"], _fair_key(item.problem_id, item.user_id))
+                else:
+                    local_runs.setdefault(item.problem_id, []).append(
+                        (run_id, submission_id, item.code, language_type))
+            results.append((submission_id, run_id))
+    for problem_id, runs in local_runs.items():
+        _submit_batch_job(problem_id, runs, lint["params"]["timeout_sec"], os.cpu_count() or 1, None,
+                          lint["priority"])
+    return results
+
+
+def _validation_error(e: ValidationError) -> str:
+    err = e.errors()[0]
+    loc = '.'.join(str(part) for part in err["loc"])
+    return f"{loc}: {err['msg']}." if loc else f"{err['msg']}."
+
+
+@app.post('/submissions/bulk', status_code=201)
+async def create_submissions_bulk(request: Request, lint: bool = False, priority: str | None = None,
+                                  timeout_sec: int = 30, _perm: bool = Depends(permission_dependency)):
+    """POST /submissions/bulk – 批次匯入提交（NDJSON 或 JSON 陣列，串流解析並分批寫入）"""
+    try:
+        lint_opts = None
+        if lint:
+            lint_opts = {
+                "priority": _priority(priority, 'batch'),
+                "params": {
+                    "timeout_sec": timeout_sec,
+                    "export_fixes": False,
+                    "use_prescreen": LINT_PRESCREEN,
+                    "profile": False,
+                },
+            }
+
+        submission_ids = []   # 依輸入順序，被拒絕的紀錄為 None
+        run_ids = []
+        errors = []
+        rejected = 0
+        aborted = None
+        batch = []            # [(index, CreateSubmissionBody), ...]
+        pending = None        # 寫入中的上一批：解析下一批的同時寫入資料庫
+
+        async def collect():
+            indexes, task = pending
+            for index, (submission_id, run_id) in zip(indexes, await task):
+                submission_ids[index] = submission_id
+                run_ids[index] = run_id
+
+        async def flush():
+            nonlocal pending, batch
+            if pending is not None:
+                await collect()
+                pending = None
+            if batch:
+                items = [item for _index, item in batch]
+                pending = ([index for index, _item in batch],
+                           asyncio.create_task(asyncio.to_thread(_insert_submission_batch, items, lint_opts)))
+                batch = []
+
+        try:
+            async for index, record, error in iter_records(request.stream(), SUBMISSION_BULK_MAX_RECORD_BYTES):
+                submission_ids.append(None)
+                run_ids.append(None)
+                if error is None:
+                    try:
+                        item = CreateSubmissionBody.model_validate(record)
+                        if not item.code or not item.problem_id:
+                            error = "missing code or problem_id."
+                    except ValidationError as e:
+                        error = _validation_error(e)
+                if error is not None:
+                    rejected += 1
+                    if len(errors) < SUBMISSION_BULK_MAX_ERRORS:
+                        errors.append({"index": index, "detail": error})
+                    continue
+                batch.append((index, item))
+                if len(batch) >= SUBMISSION_BULK_BATCH:
+                    await flush()
+        except BulkFormatError as e:
+            aborted = str(e)
+        await flush()
+        if pending is not None:
+            await collect()
+
+        content = {
+            "message": "submissions created." if aborted is None else f"bulk ingestion aborted: {aborted}",
+            "total": len(submission_ids),
+            "inserted": len(submission_ids) - rejected,
+            "rejected": rejected,
+            "submission_ids": submission_ids,
+            "run_ids": run_ids if lint else None,
+            "errors": errors,
+        }
+        if aborted is not None:
+            # 中止前的紀錄已寫入，一併回傳其 ID
+            return JSONResponse(status_code=400, content={"detail": aborted, **content})
+        return content
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get('/health')
 def health_check():
     """健康檢查"""
@@ -483,14 +1873,53 @@ def health_check():
         "status": "healthy",
         "module_exists": MODULE_PATH.exists(),
         "script_exists": SCRIPT_PATH.exists(),
+        "cache": lint_cache.stats(),
+        "pch": pch_manager.status() if LINT_PCH else None,
+        "admission": admission.stats(),
+        "queue": work_queue.stats() if LINT_QUEUE_BACKEND == 'db' else None,
     }
 
 
+@app.get('/metrics')
+def get_metrics():
+    """Prometheus 指標（text exposition format）"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.on_event("startup")
 def on_startup():
+    global job_owner
     init_db()
     print(f"✅ Database initialized at {DB_PATH}")
+    job_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    with db.transaction() as c:
+        lost = _fail_stale_jobs(c)
+    print(f"✅ Background jobs: owner {job_owner} (marked {lost} stale jobs failed)")
+    threading.Thread(target=_job_heartbeat, name="job-heartbeat", daemon=True).start()
     print(f"✅ Module path: {MODULE_PATH}")
     print(f"✅ Script path: {SCRIPT_PATH}")
     print(f"✅ Config directory: {CONFIG_DIR}")
+    print(f"✅ Lint workers: {LINT_WORKERS}")
+    print(f"✅ clang-tidy concurrency: {LINT_CONCURRENCY} (queue {LINT_QUEUE_SIZE})")
+    print(f"✅ Async lint backend: {LINT_QUEUE_BACKEND}")
+    removed = workspace_pool.cleanup_stale()
+    print(f"✅ Workspaces: {workspace_pool.root} (removed {removed} stale)")
+    if LINT_PCH:
+        lint_executor.submit(pch_manager.warm)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    for task in list(background_tasks):
+        task.cancel()
+    lint_executor.shutdown(wait=False, cancel_futures=True)
+    # 尚未開始的工作已被取消（批次的 run 由 _submit_batch_job 記錄為 failed）；執行中的工作會跑完並自行更新狀態
+    job_heartbeat_stop.set()
+    with db.transaction() as c:
+        for job_id in tuple(owned_jobs):
+            c.execute("SELECT status FROM lint_jobs WHERE id = ?", (job_id,))
+            if c.fetchone() == ('queued',):
+                _fail_job(c, job_id, "relint cancelled by shutdown.")
+    workspace_pool.close()
+    db.close()
 
@@ -0,0 +1,180 @@
+"""
+內容定址的程式碼儲存
+程式碼以 sha256 為鍵壓縮存於 code_blobs，submissions 只保存 code_hash（相同內容只存一份）。
+預設使用 zlib；安裝 zstandard 時可改用 zstd。尚未搬移的舊資料列仍從 submissions.code 讀取，
+以 python -m api.blobs migrate 搬移並輸出節省的空間。
+
+用法：
+  python -m api.blobs migrate --db api/database.db [--codec zstd] [--vacuum]
+  python -m api.blobs report --db api/database.db
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import sys
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from api.db import Database
+
+try:
+    import zstandard
+except ImportError:  # 選用依賴，未安裝時只能使用 zlib
+    zstandard = None
+
+CODECS = ('zlib', 'zstd') if zstandard else ('zlib',)
+
+# 查詢 submissions 時一併取出程式碼：FROM submissions s {CODE_JOIN}，SELECT ... {CODE_COLUMNS}
+CODE_COLUMNS = 's.code, b.codec, b.data'
+CODE_JOIN = 'LEFT JOIN code_blobs b ON b.hash = s.code_hash'
+
+
+def compress(code: str, codec: str = 'zlib') -> tuple[str, bytes]:
+    """回傳 (實際使用的 codec, 資料)；壓縮後沒有變小時以 raw 保存"""
+    raw = code.encode()
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed.")
+        data = zstandard.ZstdCompressor(level=10).compress(raw)
+    elif codec == 'zlib':
+        data = zlib.compress(raw, 9)
+    else:
+        raise ValueError(f"unknown codec: {codec}.")
+    return (codec, data) if len(data) < len(raw) else ('raw', raw)
+
+
+@lru_cache(maxsize=256)
+def decompress(codec: str, data: bytes) -> str:
+    """解壓縮（快取最近使用的內容：重新評測時同一份模板會被讀取多次）"""
+    if codec == 'raw':
+        return data.decode()
+    if codec == 'zlib':
+        return zlib.decompress(data).decode()
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    raise ValueError(f"unknown codec: {codec}.")
+
+
+def load_code(code: str, codec: str | None, data: bytes | None) -> str:
+    """由 CODE_COLUMNS 的三個欄位還原程式碼（舊資料列的 codec 為 NULL）"""
+    return code if codec is None else decompress(codec, data)
+
+
+def store(c: sqlite3.Cursor, code: str, codec: str = 'zlib') -> str:
+    """寫入 code_blobs（已存在時略過）並回傳 hash；須在交易內呼叫"""
+    raw = code.encode()
+    digest = hashlib.sha256(raw).hexdigest()
+    c.execute('SELECT 1 FROM code_blobs WHERE hash = ?', (digest,))
+    if c.fetchone() is None:
+        used, data = compress(code, codec)
+        c.execute('''
+            INSERT INTO code_blobs (hash, codec, data, size, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (digest, used, data, len(raw), datetime.now().isoformat()))
+    return digest
+
+
+def prepare(code: str, codec: str = 'zlib') -> tuple[str, str, bytes, int]:
+    """在交易外先計算 (hash, codec, 資料, 原始大小)，大量寫入時縮短持有寫入鎖的時間"""
+    raw = code.encode()
+    return (hashlib.sha256(raw).hexdigest(), *compress(code, codec), len(raw))
+
+
+def put(c: sqlite3.Cursor, blob: tuple[str, str, bytes, int]) -> str:
+    """寫入 prepare() 的結果（已存在時略過）並回傳 hash；須在交易內呼叫"""
+    digest, codec, data, size = blob
+    c.execute('''
+        INSERT OR IGNORE INTO code_blobs (hash, codec, data, size, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (digest, codec, data, size, datetime.now().isoformat()))
+    return digest
+
+
+def migrate(db: Database, codec: str = 'zlib', batch_size: int = 500) -> int:
+    """將舊資料列的程式碼搬入 code_blobs；分批交易，可中斷後重新執行。回傳搬移筆數"""
+    moved = 0
+    while True:
+        with db.transaction() as c:
+            c.execute('SELECT id, code FROM submissions WHERE code_hash IS NULL LIMIT ?', (batch_size,))
+            rows = c.fetchall()
+            for submission_id, code in rows:
+                c.execute("UPDATE submissions SET code = '', code_hash = ? WHERE id = ?",
+                          (store(c, code, codec), submission_id))
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+
+
+def space_report(c: sqlite3.Cursor) -> dict:
+    """程式碼的原始大小與實際儲存大小（位元組）"""
+    c.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(CASE WHEN s.code_hash IS NULL THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(COALESCE(b.size, length(CAST(s.code AS BLOB)))), 0),
+               COALESCE(SUM(CASE WHEN s.code_hash IS NULL THEN length(CAST(s.code AS BLOB)) ELSE 0 END), 0)
+        FROM submissions s LEFT JOIN code_blobs b ON b.hash = s.code_hash
+    ''')
+    submissions, unmigrated, raw_bytes, legacy_bytes = c.fetchone()
+    c.execute('SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM code_blobs')
+    blobs, blob_bytes = c.fetchone()
+    stored = legacy_bytes + blob_bytes
+    return {
+        "submissions": submissions,
+        "unmigrated": unmigrated,
+        "unique_sources": blobs,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored,
+        "saved_bytes": raw_bytes - stored,
+        "saved_ratio": round(1 - stored / raw_bytes, 4) if raw_bytes else 0.0,
+    }
+
+
+def _file_size(c: sqlite3.Cursor) -> int:
+    c.execute('PRAGMA page_count')
+    pages = c.fetchone()[0]
+    c.execute('PRAGMA page_size')
+    return pages * c.fetchone()[0]
+
+
+def _print_report(report: dict):
+    for key, value in report.items():
+        print(f"  {key:15s} {value:,}" if isinstance(value, int) else f"  {key:15s} {value:.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("migrate", "report"))
+    parser.add_argument("--db", default=str(Path(__file__).parent / "database.db"), help="資料庫路徑")
+    parser.add_argument("--codec", choices=CODECS, default='zlib', help="新寫入內容的壓縮方式")
+    parser.add_argument("--batch-size", type=int, default=500, help="每個交易搬移的筆數")
+    parser.add_argument("--vacuum", action="store_true", help="搬移後 VACUUM，將釋出的頁面還給檔案系統")
+    args = parser.parse_args(argv)
+
+    db = Database(Path(args.db))
+    db.init_schema()
+    try:
+        if args.command == "migrate":
+            with db.connection() as c:
+                before = _file_size(c)
+            moved = migrate(db, args.codec, args.batch_size)
+            print(f"migrated {moved:,} submissions")
+            if args.vacuum:
+                with db.connection() as c:
+                    c.execute('VACUUM')
+            with db.connection() as c:
+                after = _file_size(c)
+            print(f"database file: {before:,} -> {after:,} bytes")
+        with db.connection() as c:
+            _print_report(space_report(c))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Lint 結果快取
+以 (程式碼, .clang-tidy 內容, -std 旗標, 模組版本) 的雜湊為鍵，
+前層為記憶體 LRU，後層為 SQLite 的 lint_cache 表（依大小淘汰）
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from api.db import Database
+
+
+def module_identity(module_path: Path) -> str:
+    """以檔案大小與修改時間代表 libMiscTidyModule.so 的建置版本"""
+    try:
+        st = module_path.stat()
+    except OSError:
+        return "missing"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def make_key(code: str, config: bytes, std_flag: str, module_id: str, *extra: str) -> str:
+    """計算快取鍵；各欄位以長度前綴串接，避免邊界混淆"""
+    h = hashlib.sha256()
+    for part in (code.encode(), config, std_flag.encode(), module_id.encode(),
+                 *(e.encode() for e in extra)):
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class LintCache:
+    """兩層式 lint 結果快取（執行緒安全）"""
+
+    def __init__(self, db: Database, memory_entries: int = 1024, max_db_bytes: int = 64 * 1024 * 1024):
+        self.db = db
+        self.memory_entries = memory_entries
+        self.max_db_bytes = max_db_bytes
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_db = 0
+        self.misses = 0
+        # 持久層大小的估計值；超過上限時才重新精算並淘汰
+        self._db_bytes = None
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return result
+
+        with self.db.connection() as c:
+            c.execute('SELECT result FROM lint_cache WHERE key = ?', (key,))
+            row = c.fetchone()
+        if row:
+            with self.db.transaction() as c:
+                c.execute('UPDATE lint_cache SET last_used_at = ? WHERE key = ?',
+                          (datetime.now().isoformat(), key))
+
+        with self._lock:
+            if not row:
+                self.misses += 1
+                return None
+            self.hits_db += 1
+            result = json.loads(row[0])
+            self._remember(key, result)
+            return result
+
+    def put(self, key: str, result: dict):
+        payload = json.dumps(result)
+        now = datetime.now().isoformat()
+        with self.db.transaction() as c:
+            c.execute('''
+                INSERT OR REPLACE INTO lint_cache (key, result, size, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, payload, len(payload), now, now))
+            if self._db_bytes is None or self._db_bytes + len(payload) > self.max_db_bytes:
+                self._db_bytes = self._evict(c)
+            else:
+                self._db_bytes += len(payload)
+
+        with self._lock:
+            self._remember(key, result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "hits_memory": self.hits_memory,
+                "hits_db": self.hits_db,
+                "misses": self.misses,
+            }
+
+    def _remember(self, key: str, result: dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, c: sqlite3.Cursor) -> int:
+        """超過容量時，從最久未使用的項目開始刪除；回傳剩餘大小"""
+        c.execute('SELECT COALESCE(SUM(size), 0) FROM lint_cache')
+        total = c.fetchone()[0]
+        excess = total - self.max_db_bytes
+        if excess <= 0:
+            return total
+        c.execute('SELECT key, size FROM lint_cache ORDER BY last_used_at')
+        victims = []
+        for key, size in c.fetchall():
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+            total -= size
+        c.executemany('DELETE FROM lint_cache WHERE key = ?', victims)
+        return total
@@ -0,0 +1,341 @@
+"""
+SQLite 資料存取層
+所有端點共用的連線池：WAL 日誌、busy timeout 與調整過的 pragma，
+並以 transaction() 提供短交易（不應跨越 clang-tidy 子行程）
+"""
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+SCHEMA = [
+    # submissions 表
+    '''
+    CREATE TABLE IF NOT EXISTS submissions (
+        id INTEGER PRIMARY KEY,
+        problem_id INTEGER NOT NULL,
+        code TEXT NOT NULL,
+        language TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        user_id INTEGER,
+        code_hash TEXT
+    )
+    ''',
+    # code_blobs 表（內容定址、壓縮的程式碼；submissions.code_hash 引用，code 欄位留空）
+    '''
+    CREATE TABLE IF NOT EXISTS code_blobs (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    ''',
+    # requirements 表
+    '''
+    CREATE TABLE IF NOT EXISTS requirements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        problem_id INTEGER NOT NULL UNIQUE,
+        rules TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    ''',
+    # lint_runs 表
+    '''
+    CREATE TABLE IF NOT EXISTS lint_runs (
+        id TEXT PRIMARY KEY,
+        submission_id INTEGER NOT NULL,
+        problem_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        violations_count INTEGER,
+        fixes_available BOOLEAN,
+        created_at TEXT NOT NULL,
+        completed_at TEXT,
+        error_message TEXT,
+        duration_ms INTEGER,
+        clang_tidy_ms INTEGER,
+        clang_tidy_cpu_ms INTEGER,
+        job_id TEXT
+    )
+    ''',
+    # lint_reports 表
+    '''
+    CREATE TABLE IF NOT EXISTS lint_reports (
+        id TEXT PRIMARY KEY,
+        submission_id INTEGER NOT NULL,
+        problem_id INTEGER NOT NULL,
+        run_id TEXT NOT NULL,
+        passed BOOLEAN NOT NULL,
+        violations TEXT NOT NULL,
+        total_violations INTEGER NOT NULL,
+        execution_time_ms INTEGER,
+        created_at TEXT NOT NULL,
+        config_hash TEXT,
+        FOREIGN KEY (run_id) REFERENCES lint_runs(id)
+    )
+    ''',
+    # lint_check_profiles 表（--enable-check-profile 的各檢查耗時）
+    '''
+    CREATE TABLE IF NOT EXISTS lint_check_profiles (
+        run_id TEXT NOT NULL,
+        problem_id INTEGER NOT NULL,
+        check_name TEXT NOT NULL,
+        wall_ms REAL NOT NULL,
+        user_ms REAL NOT NULL,
+        sys_ms REAL NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, check_name),
+        FOREIGN KEY (run_id) REFERENCES lint_runs(id)
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_lint_check_profiles_problem
+        ON lint_check_profiles (problem_id, check_name)
+    ''',
+    # lint_jobs 表（背景重新評測工作的進度）
+    '''
+    CREATE TABLE IF NOT EXISTS lint_jobs (
+        id TEXT PRIMARY KEY,
+        problem_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        unique_sources INTEGER NOT NULL,
+        done INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        completed_at TEXT,
+        error_message TEXT,
+        owner TEXT,
+        heartbeat_at REAL
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_lint_jobs_problem
+        ON lint_jobs (problem_id, status)
+    ''',
+    # lint_queue 表（/lint/run 的持久工作佇列，由 api.worker 以租約領取；完成後刪除）
+    '''
+    CREATE TABLE IF NOT EXISTS lint_queue (
+        run_id TEXT PRIMARY KEY,
+        submission_id INTEGER NOT NULL,
+        problem_id INTEGER NOT NULL,
+        params TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at REAL NOT NULL,
+        lease_owner TEXT,
+        lease_expires_at REAL,
+        enqueued_at REAL NOT NULL,
+        last_error TEXT,
+        priority INTEGER NOT NULL DEFAULT 0,
+        fair_key TEXT,
+        FOREIGN KEY (run_id) REFERENCES lint_runs(id)
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_lint_queue_ready
+        ON lint_queue (status, available_at)
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_lint_queue_lease
+        ON lint_queue (status, lease_expires_at)
+    ''',
+    # lint_queue_cursors 表（各優先類別 + 公平鍵的排隊/執行中工作數與最近領取時間，
+    # 由 WorkQueue 於狀態變更時在同一交易中維護；領取時只讀取此表輪流，不必掃描整個佇列）
+    '''
+    CREATE TABLE IF NOT EXISTS lint_queue_cursors (
+        priority INTEGER NOT NULL,
+        fair_key TEXT NOT NULL,          -- 無公平鍵時為空字串
+        queued INTEGER NOT NULL,
+        leased INTEGER NOT NULL,
+        last_claimed_at REAL NOT NULL,
+        PRIMARY KEY (priority, fair_key)
+    )
+    ''',
+    # 舊版只記錄領取時間的表（已由 lint_queue_cursors 取代）
+    'DROP TABLE IF EXISTS lint_queue_keys',
+    # 題目統計（api.stats 於寫入 lint_reports 時增量維護）
+    '''
+    CREATE TABLE IF NOT EXISTS problem_stats (
+        problem_id INTEGER PRIMARY KEY,
+        runs INTEGER NOT NULL,
+        passes INTEGER NOT NULL,
+        violations INTEGER NOT NULL,
+        updated_at TEXT NOT NULL,
+        config_hash TEXT
+    )
+    ''',
+    # 已計入統計的提交（同一設定下每個提交只計入一次）
+    '''
+    CREATE TABLE IF NOT EXISTS problem_stats_submissions (
+        problem_id INTEGER NOT NULL,
+        submission_id INTEGER NOT NULL,
+        PRIMARY KEY (problem_id, submission_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS problem_check_stats (
+        problem_id INTEGER NOT NULL,
+        check_name TEXT NOT NULL,
+        violations INTEGER NOT NULL,
+        runs INTEGER NOT NULL,
+        PRIMARY KEY (problem_id, check_name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS problem_runtime_buckets (
+        problem_id INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (problem_id, bucket)
+    )
+    ''',
+    # lint_cache 表（內容定址的結果快取）
+    '''
+    CREATE TABLE IF NOT EXISTS lint_cache (
+        key TEXT PRIMARY KEY,
+        result TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        last_used_at TEXT NOT NULL
+    )
+    ''',
+]
+
+# 舊資料庫缺少的欄位於啟動時補上：(表, 欄位, 型別)
+COLUMNS = [
+    ('submissions', 'code_hash', 'TEXT'),
+    ('lint_runs', 'duration_ms', 'INTEGER'),
+    ('lint_runs', 'clang_tidy_ms', 'INTEGER'),
+    ('lint_runs', 'clang_tidy_cpu_ms', 'INTEGER'),
+    ('lint_runs', 'job_id', 'TEXT'),
+    ('lint_jobs', 'owner', 'TEXT'),
+    ('lint_jobs', 'heartbeat_at', 'REAL'),
+    ('lint_queue', 'priority', 'INTEGER NOT NULL DEFAULT 0'),
+    ('lint_queue', 'fair_key', 'TEXT'),
+    ('lint_reports', 'config_hash', 'TEXT'),
+    ('problem_stats', 'config_hash', 'TEXT'),
+]
+
+# 索引（於補欄位之後建立，可引用新欄位）
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_submissions_problem ON submissions (problem_id, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_runs_created ON lint_runs (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_runs_problem ON lint_runs (problem_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_runs_submission ON lint_runs (submission_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_runs_status ON lint_runs (status, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_runs_job ON lint_runs (job_id) WHERE job_id IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_lint_reports_created ON lint_reports (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_reports_problem ON lint_reports (problem_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_reports_submission ON lint_reports (submission_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_reports_run ON lint_reports (run_id)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_queue_class ON lint_queue (status, priority, fair_key, available_at)',
+    'CREATE INDEX IF NOT EXISTS idx_lint_queue_owner ON lint_queue (lease_owner) WHERE lease_owner IS NOT NULL',
+]
+
+# 資料補齊（於索引之後執行）
+BACKFILLS = [
+    # 升級前已在佇列中的工作：lint_queue_cursors 為空時由 lint_queue 計算一次
+    '''
+    INSERT INTO lint_queue_cursors (priority, fair_key, queued, leased, last_claimed_at)
+    SELECT priority, COALESCE(fair_key, ''), SUM(status = 'queued'), SUM(status = 'leased'), 0
+    FROM lint_queue
+    WHERE NOT EXISTS (SELECT 1 FROM lint_queue_cursors)
+    GROUP BY priority, COALESCE(fair_key, '')
+    ''',
+]
+
+PRAGMAS = [
+    'PRAGMA synchronous = NORMAL',    # WAL 下僅在 checkpoint 時 fsync
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -16000',     # 約 16 MiB page cache
+    'PRAGMA mmap_size = 268435456',
+]
+
+
+class Database:
+    """執行緒安全的 SQLite 連線池"""
+
+    def __init__(self, db_path: Path, pool_size: int = 8, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+    def init_schema(self):
+        """初始化資料庫（WAL 模式為持久設定，只需設定一次）"""
+        with self.connection() as c:
+            c.execute('PRAGMA journal_mode = WAL')
+        with self.transaction() as c:
+            for statement in SCHEMA:
+                c.execute(statement)
+            for table, column, column_type in COLUMNS:
+                c.execute(f'PRAGMA table_info({table})')
+                if column not in {row[1] for row in c.fetchall()}:
+                    c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+            for statement in INDEXES:
+                c.execute(statement)
+            for statement in BACKFILLS:
+                c.execute(statement)
+
+    @contextmanager
+    def connection(self):
+        """取得自動提交模式的連線（適用單一查詢）"""
+        conn = self._acquire()
+        try:
+            yield conn.cursor()
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """以 BEGIN IMMEDIATE 開啟寫入交易，離開時 commit，發生例外時 rollback"""
+        conn = self._acquire()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        finally:
+            self._release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None：交易邊界完全由 transaction() 控制
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
@@ -0,0 +1,139 @@
+"""
+clang-tidy 診斷解析
+直接從 clang-tidy 的文字輸出擷取診斷，不需要 -export-fixes 與 YAML 往返；
+需要 fixes 時才讀取匯出的 YAML（有 libyaml 時使用 C 版 loader）。
+另提供 --store-check-profile 輸出的各檢查耗時解析。
+"""
+
+import bisect
+import json
+import re
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # 未編譯 libyaml 時退回純 Python 版本
+    from yaml import SafeLoader as _YamlLoader
+
+
+class Diagnostic(NamedTuple):
+    check: str | None
+    file: str
+    line: int
+    column: int
+    message: str
+    severity: str
+
+
+# 例：/tmp/x/code.cpp:10:5: error: Loop statements ... [misc-forbid-loops,-warnings-as-errors]
+_DIAG_RE = re.compile(
+    r'^(?P<file>.+?):(?P<line>\d+):(?P<column>\d+): '
+    r'(?P<severity>warning|error|fatal error): (?P<message>.*?)(?: \[(?P<check>[^\]]+)\])?$'
+)
+
+
+def parse_line(line: str) -> Diagnostic | None:
+    """解析一行 clang-tidy 輸出；非診斷行（程式碼摘錄、note 等）回傳 None"""
+    # 大部分輸出是程式碼摘錄與 ^ 標記，先用字串搜尋排除再跑正規表示式
+    if ' warning: ' not in line and ' error: ' not in line:
+        return None
+    m = _DIAG_RE.match(line.rstrip('\r\n'))
+    if not m:
+        return None
+    check = m.group('check')
+    return Diagnostic(
+        check.split(',')[0] if check else None,
+        m.group('file').rpartition('/')[2],
+        int(m.group('line')),
+        int(m.group('column')),
+        m.group('message'),
+        m.group('severity'),
+    )
+
+
+def parse_output(lines: Iterable[str]) -> list[Diagnostic]:
+    """解析 clang-tidy 的 stdout（可傳入字串或逐行的可迭代物件）"""
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    return [d for d in map(parse_line, lines) if d is not None]
+
+
+def as_violation(diagnostic: Diagnostic) -> dict:
+    """轉成 lint_reports.violations 的項目格式（與 POST /lint/report 相同）"""
+    return {
+        'rule': diagnostic.check,
+        'message': diagnostic.message,
+        'file': diagnostic.file,
+        'line': diagnostic.line,
+        'column': diagnostic.column,
+        'severity': diagnostic.severity,
+    }
+
+
+def load_fixes(path: Path, sources: dict[str, str] | None = None) -> list[Diagnostic] | None:
+    """讀取 -export-fixes 產生的 YAML；檔案不存在時回傳 None
+
+    YAML 只記錄 FileOffset，若提供 sources（檔名 -> 原始碼）則換算成行列。
+    """
+    try:
+        with open(path, 'r') as f:
+            data = yaml.load(f, Loader=_YamlLoader)
+    except FileNotFoundError:
+        return None
+    if not data or 'Diagnostics' not in data:
+        return None
+
+    line_starts = {}
+    diagnostics = []
+    for entry in data['Diagnostics'] or []:
+        message = entry.get('DiagnosticMessage') or {}
+        name = Path(message.get('FilePath') or '').name
+        offset = message.get('FileOffset') or 0
+        line = column = 0
+        if sources and name in sources:
+            if name not in line_starts:
+                line_starts[name] = _line_starts(sources[name])
+            starts = line_starts[name]
+            line = bisect.bisect_right(starts, offset)
+            column = offset - starts[line - 1] + 1
+        diagnostics.append(Diagnostic(
+            entry.get('DiagnosticName'),
+            name,
+            line,
+            column,
+            message.get('Message', ''),
+            str(entry.get('Level', 'Warning')).lower(),
+        ))
+    return diagnostics
+
+
+def load_check_profile(directory: Path) -> dict[str, dict[str, float]]:
+    """讀取 --store-check-profile 產生的 JSON，回傳 {檢查名稱: {"wall", "user", "sys"}}（秒）
+
+    JSON 的 profile 鍵形如 time.clang-tidy.<檢查名稱>.<wall|user|sys>；多個檔案時加總。
+    """
+    checks = {}
+    for path in sorted(Path(directory).glob('*.json')):
+        with open(path, 'r') as f:
+            profile = json.load(f).get('profile') or {}
+        for key, seconds in profile.items():
+            if not key.startswith('time.clang-tidy.'):
+                continue
+            name, _, kind = key[len('time.clang-tidy.'):].rpartition('.')
+            if name and kind in ('wall', 'user', 'sys'):
+                entry = checks.setdefault(name, {'wall': 0.0, 'user': 0.0, 'sys': 0.0})
+                entry[kind] += float(seconds)
+    return checks
+
+
+def _line_starts(text: str) -> list[int]:
+    data = text.encode()
+    starts = [0]
+    index = data.find(b'\n')
+    while index != -1:
+        starts.append(index + 1)
+        index = data.find(b'\n', index + 1)
+    return starts
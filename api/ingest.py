@@ -0,0 +1,158 @@
+"""
+批次匯入的串流解析
+POST /submissions/bulk 的請求本體為 NDJSON（每行一個物件）或 JSON 陣列（依第一個非空白字元判斷），
+逐塊讀取並逐筆產出紀錄，記憶體用量只與單筆紀錄大小有關，與本體總長度無關。
+"""
+
+import codecs
+import json
+from typing import AsyncIterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = frozenset(_WHITESPACE + ',]')
+
+
+class BulkFormatError(ValueError):
+    """本體無法繼續解析（之後的內容全部放棄）"""
+
+
+async def iter_records(chunks: AsyncIterator[bytes], max_record_bytes: int):
+    """逐筆產出 (index, 物件, 錯誤訊息)；單筆不是物件或（NDJSON 的一行）不是合法 JSON 時，
+    物件為 None 並附錯誤訊息，可略過後繼續。陣列語法錯誤或單筆超過 max_record_bytes 時拋出 BulkFormatError。
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    parser = None
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        if parser is None:
+            head = buf.lstrip(_WHITESPACE)
+            if not head:
+                continue
+            parser = _ArrayParser() if head[0] == '[' else _NdjsonParser()
+        buf = parser.feed(buf, False)
+        for record in parser.drain():
+            yield record
+        if parser.error is not None:
+            raise parser.error
+        if len(buf.encode()) > max_record_bytes:
+            raise BulkFormatError(f"record {parser.index} is malformed or exceeds {max_record_bytes} bytes.")
+    buf += decoder.decode(b'', final=True)
+    if parser is not None:
+        parser.feed(buf, True)
+        for record in parser.drain():
+            yield record
+        if parser.error is not None:
+            raise parser.error
+
+
+class _NdjsonParser:
+    """以換行切分，每行獨立解析"""
+
+    def __init__(self):
+        self.index = 0
+        self.error = None
+        self._records = []
+
+    def feed(self, buf: str, final: bool) -> str:
+        lines = buf.split('\n')
+        rest = '' if final else lines.pop()
+        for line in lines:
+            if line.strip(_WHITESPACE):
+                self._records.append(_parse_line(self.index, line))
+                self.index += 1
+        return rest
+
+    def drain(self):
+        records, self._records = self._records, []
+        return records
+
+
+class _ArrayParser:
+    """以 JSONDecoder.raw_decode 逐個解析陣列元素；元素不完整時保留在緩衝區等待後續資料
+
+    語法錯誤記錄於 error（錯誤之前已解析的紀錄仍由 drain 取出），不受分塊位置影響。
+    """
+
+    def __init__(self):
+        self.index = 0
+        self.error = None
+        self._state = 'open'    # open -> first -> sep -> value -> sep ... -> end
+        self._records = []
+
+    def feed(self, buf: str, final: bool) -> str:
+        try:
+            return self._feed(buf, final)
+        except BulkFormatError as e:
+            self.error = e
+            return ''
+
+    def _feed(self, buf: str, final: bool) -> str:
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buf):
+                break
+            if self._state == 'end':
+                raise BulkFormatError("unexpected data after the closing bracket.")
+            if self._state == 'open':
+                if buf[pos] != '[':
+                    raise BulkFormatError("body must be a JSON array or NDJSON.")
+                self._state = 'first'
+                pos += 1
+                continue
+            if self._state in ('first', 'sep') and buf[pos] == ']':
+                self._state = 'end'
+                pos += 1
+                continue
+            if self._state == 'sep':
+                if buf[pos] != ',':
+                    raise BulkFormatError(f"expected ',' or ']' after record {self.index - 1}.")
+                self._state = 'value'
+                pos += 1
+                continue
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if final:
+                    raise BulkFormatError(f"invalid JSON in record {self.index}: {e.msg}.")
+                break
+            # 數字可能在區塊邊界被截斷（例如 2. | 5e10），看到分隔字元才確認已結束
+            if not final and not _token_closed(buf, end):
+                break
+            self._records.append(_as_record(self.index, value))
+            self.index += 1
+            self._state = 'sep'
+            pos = end
+        if final and self._state != 'end':
+            raise BulkFormatError("unterminated JSON array.")
+        return buf[pos:]
+
+    def drain(self):
+        records, self._records = self._records, []
+        return records
+
+
+def _token_closed(buf, end):
+    """raw_decode 解析出的值之後、緩衝區結束之前是否出現分隔字元（, ] 或空白）"""
+    while end < len(buf):
+        if buf[end] in _DELIMITERS:
+            return True
+        end += 1
+    return False
+
+
+def _parse_line(index, line):
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError as e:
+        return index, None, f"invalid JSON: {e.msg}."
+    return _as_record(index, value)
+
+
+def _as_record(index, value):
+    if not isinstance(value, dict):
+        return index, None, "record must be a JSON object."
+    return index, value, None
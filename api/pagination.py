@@ -0,0 +1,66 @@
+"""
+Keyset（cursor）分頁
+依 (created_at, id) 由新到舊排序，下一頁以上一頁最後一筆的鍵值作為起點，
+配合 (篩選欄位, created_at, id) 索引，深頁與第一頁的成本相同（不使用 OFFSET）。
+"""
+
+import base64
+import json
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    raw = json.dumps([created_at, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """解析 cursor；格式錯誤時拋出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError("invalid cursor.") from e
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise ValueError("invalid cursor.")
+    return created_at, row_id
+
+
+def build_page_query(table: str, columns: list[str], filters: dict, since: str | None = None,
+                     until: str | None = None, cursor: str | None = None, limit: int = 50):
+    """產生一頁的 SQL 與參數；filters 為 {欄位: 值}，值為 None 的欄位忽略
+
+    多取一筆以判斷是否還有下一頁。table、columns 與 filters 的鍵必須來自程式內的常數。
+    """
+    where = []
+    params = []
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f'{column} = ?')
+            params.append(value)
+    if since is not None:
+        where.append('created_at >= ?')
+        params.append(since)
+    if until is not None:
+        where.append('created_at < ?')
+        params.append(until)
+    if cursor is not None:
+        where.append('(created_at, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+
+    sql = f'SELECT {", ".join(columns)} FROM {table}'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+    params.append(max(1, min(limit, MAX_PAGE_SIZE)) + 1)
+    return sql, params
+
+
+def page(rows: list, limit: int, key) -> tuple[list, str | None]:
+    """截斷多取的那一筆並回傳 (本頁資料, 下一頁 cursor)；key(row) 回傳 (created_at, id)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
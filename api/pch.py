@@ -0,0 +1,190 @@
+"""
+預編譯標頭（PCH）管理
+clang-tidy 大部分時間花在解析 <iostream>、<vector>、<bits/stdc++.h> 等標頭，
+因此依語言、-std 旗標與提交引入的標頭集合建立 PCH，以 -include-pch 帶入。
+PCH 的內容必須與提交本身的 include 完全相同，否則會改變編譯結果（例如多引入 <algorithm> 後
+`using namespace std; int count;` 變成模稜兩可），因此只在提交開頭只有 #include 且集合相符時使用。
+PCH 以工具鏈版本為鍵，clang-tidy 或編譯器更新後會自動重建。
+"""
+
+import hashlib
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+# 依語言列出可建立 PCH 的標準標頭（提交的 include 必須全部在此清單內）
+PCH_HEADERS = {
+    0: [  # C
+        "assert.h", "ctype.h", "limits.h", "math.h", "stdbool.h", "stddef.h",
+        "stdint.h", "stdio.h", "stdlib.h", "string.h", "time.h",
+    ],
+    1: [  # C++
+        "algorithm", "array", "bitset", "cassert", "cctype", "climits", "cmath",
+        "cstdint", "cstdio", "cstdlib", "cstring", "deque", "functional",
+        "iomanip", "iostream", "iterator", "list", "map", "numeric", "queue",
+        "set", "sstream", "stack", "string", "tuple", "unordered_map",
+        "unordered_set", "utility", "vector", "math.h", "stdio.h", "stdlib.h",
+        "string.h", "bits/stdc++.h",
+    ],
+}
+
+# 啟動時預先建立的常見標頭集合
+WARM_SETS = {
+    0: [("stdio.h",), ("stdio.h", "stdlib.h")],
+    1: [("bits/stdc++.h",), ("iostream",)],
+}
+
+COMPILERS = {0: "clang", 1: "clang++"}
+
+_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+_SYSTEM_INCLUDE_RE = re.compile(r'#\s*include\s*<([^>]+)>')
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_VERSION_RE = re.compile(r'version\s+(\d+\.\d+\.\d+)')
+
+
+def parse_includes(code: str) -> list[tuple[bool, str]]:
+    """擷取 #include，回傳 [(是否為 <系統標頭>, 名稱), ...]"""
+    return [(m.group(1) == '<', m.group(2).strip()) for m in _INCLUDE_RE.finditer(code)]
+
+
+def preamble_headers(code: str) -> tuple[str, ...] | None:
+    """提交開頭（只有空行、註解與 #include <...>）引入的標頭集合（排序後）
+
+    開頭之後還有 #include、或開頭沒有 include 時回傳 None：PCH 相當於把標頭放在檔案最前面，
+    只有這種情況下與原本的編譯結果相同（標準標頭的引入順序不影響結果）。
+    """
+    lines = _BLOCK_COMMENT_RE.sub(' ', code).splitlines()
+    headers = set()
+    body = len(lines)
+    for i, line in enumerate(lines):
+        stripped = line.split('//', 1)[0].strip()
+        if not stripped:
+            continue
+        match = _SYSTEM_INCLUDE_RE.fullmatch(stripped)
+        if match is None:
+            body = i
+            break
+        headers.add(match.group(1).strip())
+    if not headers or _INCLUDE_RE.search('\n'.join(lines[body:])):
+        return None
+    return tuple(sorted(headers))
+
+
+class PchManager:
+    """依 (語言, -std, 標頭集合) 建立並快取 PCH（執行緒安全）"""
+
+    def __init__(self, cache_dir: Path, clang_tidy: str = "clang-tidy", compilers=None, headers=None,
+                 max_entries: int = 16):
+        self.cache_dir = cache_dir
+        self.clang_tidy = clang_tidy
+        self.compilers = compilers or COMPILERS
+        self.headers = headers or PCH_HEADERS
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._toolchain = {}         # 語言 -> (工具鏈簽章, 檔案狀態)
+        self._built = {}             # (語言, std, 工具鏈, 標頭集合) -> PCH 路徑（建置失敗為 None）
+        self.last_error = None
+
+    def args_for(self, code: str, language_type: int, std_flag: str) -> list[str]:
+        """提交開頭的 include 集合可建立 PCH 時回傳 clang 參數，否則回傳空清單"""
+        headers = preamble_headers(code)
+        if headers is None or any(h not in self.headers[language_type] for h in headers):
+            return []
+        pch_path = self._ensure(language_type, std_flag, headers)
+        return ['-include-pch', str(pch_path)] if pch_path else []
+
+    def warm(self):
+        """預先建立常見標頭集合的 PCH（啟動時於背景呼叫）"""
+        for language_type, std_flag in ((0, '-std=c17'), (1, '-std=c++17')):
+            for headers in WARM_SETS[language_type]:
+                self._ensure(language_type, std_flag, headers)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "built": sorted(str(path) for path in self._built.values() if path),
+                "last_error": self.last_error,
+            }
+
+    def _ensure(self, language_type: int, std_flag: str, headers: tuple[str, ...]):
+        with self._lock:
+            toolchain = self._toolchain_signature(language_type)
+            if toolchain is None:
+                return None
+            key = (language_type, std_flag, toolchain, headers)
+            if key in self._built:
+                return self._built[key]
+            # 每個 PCH 可能有數十 MB，超過上限後新的集合不建置
+            if sum(1 for path in self._built.values() if path) >= self.max_entries:
+                return None
+
+        # 建置期間其他請求不等待，直接不使用 PCH
+        if not self._build_lock.acquire(blocking=False):
+            return None
+        try:
+            with self._lock:
+                if key in self._built:
+                    return self._built[key]
+            built = self._build(language_type, std_flag, toolchain, headers)
+            with self._lock:
+                self._built[key] = built
+            return built
+        finally:
+            self._build_lock.release()
+
+    def _toolchain_signature(self, language_type: int) -> str | None:
+        """以 clang-tidy 與編譯器的版本、路徑與修改時間作為工具鏈簽章"""
+        binaries = [shutil.which(self.clang_tidy), shutil.which(self.compilers[language_type])]
+        if not all(binaries):
+            self.last_error = "clang-tidy or compiler not found."
+            return None
+        stamp = tuple((b, Path(b).stat().st_mtime_ns) for b in binaries)
+
+        cached = self._toolchain.get(language_type)
+        if cached and cached[1] == stamp:
+            return cached[0]
+
+        versions = []
+        for binary in binaries:
+            out = subprocess.run([binary, '--version'], capture_output=True, text=True).stdout
+            match = _VERSION_RE.search(out)
+            versions.append(match.group(1) if match else out)
+        # PCH 格式綁定 clang 版本，版本不一致時 clang-tidy 無法讀取
+        if versions[0] != versions[1]:
+            self.last_error = f"toolchain version mismatch: clang-tidy {versions[0]}, compiler {versions[1]}"
+            signature = None
+        else:
+            signature = hashlib.sha256(repr((stamp, versions)).encode()).hexdigest()[:16]
+
+        self._toolchain[language_type] = (signature, stamp)
+        return signature
+
+    def _build(self, language_type: int, std_flag: str, toolchain: str, headers: tuple[str, ...]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        lang = 'c' if language_type == 0 else 'c++'
+        prefix = f"{lang}-{std_flag.removeprefix('-std=')}-"
+        name = f"{prefix}{toolchain}-{hashlib.sha256(repr(headers).encode()).hexdigest()[:12]}"
+        header = self.cache_dir / f"{name}.h"
+        pch_path = self.cache_dir / f"{name}.pch"
+
+        # 清除同語言、同標準的舊版工具鏈 PCH
+        for stale in self.cache_dir.glob(f"{prefix}*"):
+            if not stale.name.startswith(f"{prefix}{toolchain}-"):
+                stale.unlink(missing_ok=True)
+
+        header.write_text("".join(f"#include <{h}>\n" for h in headers))
+        result = subprocess.run(
+            [self.compilers[language_type], '-x', f'{lang}-header', std_flag,
+             str(header), '-o', str(pch_path)],
+            capture_output=True,
+            text=True,
+        )
+        # 部分標頭（如 libc++ 下的 bits/stdc++.h）可能不存在：此集合不使用 PCH
+        if result.returncode != 0:
+            self.last_error = result.stderr.strip()[-500:]
+            return None
+        self.last_error = None
+        return pch_path
@@ -0,0 +1,175 @@
+"""
+clang-tidy 前的詞法預篩
+題目只啟用 misc-forbid-loops / misc-forbid-functions 時，若原始碼（略過註解與字串）
+完全沒有 for/while/do 或被禁止的名稱，即可判定通過而不啟動 clang-tidy。
+任何無法確定的情況都回傳「無法證明」，交由完整分析處理。
+
+預篩只判定 misc-forbid-* 規則；編譯錯誤與 clang 內建診斷仍需 clang-tidy 才能得知。
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import yaml
+
+from api.pch import PCH_HEADERS, parse_includes
+
+LOOP_KEYWORDS = frozenset({"for", "while", "do"})
+# 未出現在原始碼中也可能被隱含呼叫的函式（range-for、structured binding、運算子多載）
+IMPLICIT_CALLEES = frozenset({"begin", "end", "get"})
+# ForbiddenNames 中代表萬用字元樣式的字元
+GLOB_CHARS = frozenset("*?[")
+# 巨集不會展開成迴圈的標準標頭；其中的巨集仍可能展開成函式呼叫（assert -> __assert_fail、
+# C 的 isalpha -> __ctype_b_loc、MB_CUR_MAX -> __ctype_get_mb_cur_max），但被呼叫的都是
+# 底線開頭的保留名稱或 __builtin_*，因此 ForbiddenNames 含底線開頭的名稱時不預篩
+SAFE_HEADERS = frozenset(h for headers in PCH_HEADERS.values() for h in headers)
+
+_IDENT_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_IDENT_CHARS = _IDENT_START | frozenset("0123456789")
+_NUMBER_CHARS = _IDENT_CHARS | frozenset(".'")
+_RAW_PREFIXES = frozenset({"R", "LR", "uR", "UR", "u8R"})
+# 可能是引入指示的字（含 include_next、import）；所在的行必須是字面的 #include <...> / "..."
+_DIRECTIVE_WORD_RE = re.compile(r'\b(?:include\w*|import)\b')
+_LITERAL_INCLUDE_RE = re.compile(r'\s*#\s*include\s*(?:<[^<>"]+>|"[^"]+")\s*(?://.*)?')
+
+
+class Plan(NamedTuple):
+    forbid_loops: bool
+    forbidden_names: frozenset[str]
+
+
+@lru_cache(maxsize=256)
+def plan_from_config(config_bytes: bytes) -> Plan | None:
+    """由 .clang-tidy 內容判斷能否預篩；啟用了其他檢查時回傳 None"""
+    try:
+        config = yaml.safe_load(config_bytes) or {}
+    except yaml.YAMLError:
+        return None
+    if not isinstance(config, dict):
+        return None
+
+    enabled = set()
+    for item in str(config.get("Checks", "")).split(","):
+        item = item.strip()
+        if not item or item.startswith("-"):
+            continue
+        if item not in ("misc-forbid-loops", "misc-forbid-functions"):
+            return None
+        enabled.add(item)
+    if not enabled:
+        return None
+
+    names = frozenset()
+    if "misc-forbid-functions" in enabled:
+        raw = "sort"  # 與 ForbidFunctionsCheck 的預設值一致
+        for option in config.get("CheckOptions") or []:
+            if isinstance(option, dict) and option.get("key") == "misc-forbid-functions.ForbiddenNames":
+                raw = str(option.get("value", ""))
+        # 限定名稱以最後一段比對，例如 std::sort -> sort；萬用字元（str*）無法以 token 判定
+        names = frozenset(n.strip().rpartition("::")[2] for n in raw.split(",") if n.strip())
+        if any(n in IMPLICIT_CALLEES or n.startswith(("operator", "_")) or not GLOB_CHARS.isdisjoint(n)
+               for n in names):
+            return None
+
+    return Plan("misc-forbid-loops" in enabled, names)
+
+
+def identifiers(code: str) -> set[str] | None:
+    """回傳程式碼中（註解、字串與字元常值以外）的所有識別字；無法正確切分時回傳 None"""
+    # 三字元序列與 ## 可在不出現完整關鍵字的情況下產生 token，直接放棄
+    if "??" in code or "##" in code:
+        return None
+    # 轉譯階段 2：移除反斜線換行
+    code = code.replace("\\\r\n", "").replace("\\\n", "")
+
+    tokens = set()
+    i, n = 0, len(code)
+    while i < n:
+        ch = code[i]
+        if ch in _IDENT_START:
+            start = i
+            while i < n and code[i] in _IDENT_CHARS:
+                i += 1
+            word = code[start:i]
+            if i < n and code[i] == '"' and word in _RAW_PREFIXES:
+                i = _skip_raw_string(code, i)
+                if i < 0:
+                    return None
+                continue
+            tokens.add(word)
+        elif ch.isdigit() or (ch == "." and i + 1 < n and code[i + 1].isdigit()):
+            # pp-number（含 C++14 的 1'000 數字分隔符與 1e+5 指數）
+            i += 1
+            while i < n and (code[i] in _NUMBER_CHARS
+                             or (code[i] in "+-" and code[i - 1] in "eEpP")):
+                i += 1
+        elif ch == "/" and code.startswith("//", i):
+            end = code.find("\n", i)
+            i = n if end < 0 else end
+        elif ch == "/" and code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            if end < 0:
+                return None
+            i = end + 2
+        elif ch == '"' or ch == "'":
+            i = _skip_quoted(code, i, ch)
+            if i < 0:
+                return None
+        else:
+            i += 1
+    return tokens
+
+
+def prescreen(code: str, config_bytes: bytes) -> bool:
+    """能證明不會有 misc-forbid-* 違規時回傳 True"""
+    plan = plan_from_config(config_bytes)
+    if plan is None:
+        return False
+
+    # 以巨集指定（#include Q）、%: 二連符或其他無法解析成字面標頭名稱的引入，可能帶入任何標頭
+    spliced = code.replace("\\\r\n", "").replace("\\\n", "")
+    if "%:" in spliced:
+        return False
+    for line in spliced.splitlines():
+        if _DIRECTIVE_WORD_RE.search(line) and not _LITERAL_INCLUDE_RE.fullmatch(line):
+            return False
+
+    # 使用者標頭或未知標頭可能帶入展開成迴圈/呼叫的巨集
+    for system, name in parse_includes(spliced):
+        if not system or name not in SAFE_HEADERS:
+            return False
+
+    tokens = identifiers(code)
+    if tokens is None:
+        return False
+    if plan.forbid_loops and not tokens.isdisjoint(LOOP_KEYWORDS):
+        return False
+    return tokens.isdisjoint(plan.forbidden_names)
+
+
+def _skip_quoted(code: str, i: int, quote: str) -> int:
+    """略過字串或字元常值，回傳結尾之後的位置；未結束時回傳 -1"""
+    i += 1
+    n = len(code)
+    while i < n:
+        ch = code[i]
+        if ch == "\\":
+            i += 2
+        elif ch == quote:
+            return i + 1
+        elif ch == "\n":
+            return -1
+        else:
+            i += 1
+    return -1
+
+
+def _skip_raw_string(code: str, i: int) -> int:
+    """略過 R"delim( ... )delim"，i 指向開頭的引號"""
+    paren = code.find("(", i + 1)
+    if paren < 0 or paren - i - 1 > 16:
+        return -1
+    terminator = ")" + code[i + 1:paren] + '"'
+    end = code.find(terminator, paren + 1)
+    return -1 if end < 0 else end + len(terminator)
@@ -0,0 +1,234 @@
+"""
+各題目的違規統計
+每寫入一筆 lint_reports，就在同一個交易中累加題目的統計表（run 數、通過數、各檢查的違規數，
+以及伺服器執行時間的對數直方圖），查詢時只讀取彙總列，不必掃描 violations JSON。
+統計以題目設定（.clang-tidy）的雜湊為準：設定改變後清空重算，同一設定下每個提交只計入一次
+（重新檢查、重新評測不重複計算）。既有資料以 python -m api.stats rebuild 重新計算。
+
+用法：
+  python -m api.stats rebuild --db api/database.db [--problem-id 42]
+  python -m api.stats show --db api/database.db --problem-id 42
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sqlite3
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from api.db import Database
+
+# 執行時間直方圖：每倍增切成 8 格（相對誤差約 9%），第 b 格涵蓋 (2^((b-1)/8), 2^(b/8)] 毫秒
+BUCKETS_PER_DOUBLING = 8
+
+
+def bucket_of(ms: float) -> int:
+    if ms <= 1:
+        return 0
+    return math.ceil(BUCKETS_PER_DOUBLING * math.log2(ms))
+
+
+def bucket_upper(bucket: int) -> float:
+    return 2 ** (bucket / BUCKETS_PER_DOUBLING)
+
+
+def config_hash(config_bytes: bytes) -> str:
+    """題目設定的雜湊（統計與 lint_reports 以此區分規則集）"""
+    return hashlib.sha256(config_bytes).hexdigest()[:16]
+
+
+def record(c: sqlite3.Cursor, problem_id: int, config: str | None,
+           reports: list[tuple[int, bool, list[dict], int, int | None]]) -> int:
+    """在呼叫端的交易中累加統計，回傳計入的報告數
+
+    reports 為 (submission_id, passed, violations, total_violations, execution_time_ms) 清單，config 為 config_hash。
+    設定與現有統計不同時先清空該題統計；已計入的提交略過。
+    """
+    if not reports:
+        return 0
+    c.execute('SELECT config_hash FROM problem_stats WHERE problem_id = ?', (problem_id,))
+    row = c.fetchone()
+    if row is not None and row[0] != config:
+        _clear(c, problem_id)
+    fresh = []
+    for submission_id, *report in reports:
+        c.execute('''
+            INSERT OR IGNORE INTO problem_stats_submissions (problem_id, submission_id) VALUES (?, ?)
+        ''', (problem_id, submission_id))
+        if c.rowcount:
+            fresh.append(report)
+    if fresh:
+        _apply(c, problem_id, config, *_aggregate(fresh), datetime.now().isoformat())
+    return len(fresh)
+
+
+def fetch(c: sqlite3.Cursor, problem_id: int) -> dict | None:
+    """讀取題目的統計（查詢量與資料量無關），沒有任何報告時回傳 None"""
+    c.execute('''
+        SELECT runs, passes, violations, updated_at, config_hash FROM problem_stats WHERE problem_id = ?
+    ''', (problem_id,))
+    row = c.fetchone()
+    if row is None:
+        return None
+    runs, passes, violations, updated_at, config = row
+    c.execute('''
+        SELECT check_name, violations, runs FROM problem_check_stats
+        WHERE problem_id = ? ORDER BY violations DESC, check_name
+    ''', (problem_id,))
+    checks = c.fetchall()
+    c.execute('''
+        SELECT bucket, count FROM problem_runtime_buckets WHERE problem_id = ? ORDER BY bucket
+    ''', (problem_id,))
+    buckets = c.fetchall()
+    samples = sum(count for _bucket, count in buckets)
+    return {
+        "problem_id": problem_id,
+        "runs": runs,
+        "passes": passes,
+        "pass_rate": round(passes / runs, 4) if runs else 0.0,
+        "violations": violations,
+        "runtime_ms": {
+            "samples": samples,
+            "p50": _quantile(buckets, samples, 0.5),
+            "p95": _quantile(buckets, samples, 0.95),
+        },
+        "checks": [
+            {
+                "check": name,
+                "violations": count,
+                "runs": failing_runs,
+                "run_share": round(failing_runs / runs, 4) if runs else 0.0,
+            }
+            for name, count, failing_runs in checks
+        ],
+        "config_hash": config,
+        "updated_at": updated_at,
+    }
+
+
+def rebuild(db: Database, problem_id: int | None = None, batch_size: int = 1000) -> int:
+    """由 lint_reports 重新計算統計，回傳計入的報告數
+
+    只採用與該題最新報告相同設定的報告，每個提交取最早的一筆（與增量累加的結果相同）。
+    每個題目在一個交易中重算（期間新寫入的報告會等待交易結束，不會遺漏或重複計入）。
+    """
+    if problem_id is not None:
+        problem_ids = [problem_id]
+    else:
+        with db.connection() as c:
+            c.execute('''
+                SELECT problem_id FROM lint_reports
+                UNION SELECT problem_id FROM problem_stats
+            ''')
+            problem_ids = [row[0] for row in c.fetchall()]
+
+    total = 0
+    for pid in problem_ids:
+        with db.transaction() as c:
+            _clear(c, pid)
+            c.execute('SELECT config_hash FROM lint_reports WHERE problem_id = ? ORDER BY rowid DESC LIMIT 1', (pid,))
+            latest = c.fetchone()
+            if latest is None:
+                continue
+            c.execute('''
+                SELECT submission_id, passed, violations, total_violations, execution_time_ms FROM lint_reports
+                WHERE problem_id = ? AND config_hash IS ? ORDER BY rowid
+            ''', (pid, latest[0]))
+            # 以另一個游標寫入，避免中斷正在讀取的查詢
+            writer = c.connection.cursor()
+            while rows := c.fetchmany(batch_size):
+                total += record(writer, pid, latest[0], [
+                    (submission_id, bool(passed), json.loads(violations), n, ms)
+                    for submission_id, passed, violations, n, ms in rows
+                ])
+    return total
+
+
+def _clear(c, problem_id):
+    for table in ('problem_stats', 'problem_check_stats', 'problem_runtime_buckets', 'problem_stats_submissions'):
+        c.execute(f'DELETE FROM {table} WHERE problem_id = ?', (problem_id,))
+
+
+def _aggregate(reports):
+    passes = violations = 0
+    check_violations = Counter()
+    check_runs = Counter()
+    buckets = Counter()
+    for passed, items, total, execution_time_ms in reports:
+        passes += bool(passed)
+        violations += total
+        names = Counter(item.get('rule') or 'unknown' for item in items)
+        check_violations.update(names)
+        check_runs.update(names.keys())
+        if execution_time_ms is not None:
+            buckets[bucket_of(execution_time_ms)] += 1
+    return len(reports), passes, violations, check_violations, check_runs, buckets
+
+
+def _apply(c, problem_id, config, runs, passes, violations, check_violations, check_runs, buckets, now):
+    c.execute('''
+        INSERT INTO problem_stats (problem_id, runs, passes, violations, updated_at, config_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (problem_id) DO UPDATE SET
+            runs = runs + excluded.runs,
+            passes = passes + excluded.passes,
+            violations = violations + excluded.violations,
+            updated_at = excluded.updated_at
+    ''', (problem_id, runs, passes, violations, now, config))
+    c.executemany('''
+        INSERT INTO problem_check_stats (problem_id, check_name, violations, runs)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (problem_id, check_name) DO UPDATE SET
+            violations = violations + excluded.violations,
+            runs = runs + excluded.runs
+    ''', [(problem_id, name, count, check_runs[name]) for name, count in check_violations.items()])
+    c.executemany('''
+        INSERT INTO problem_runtime_buckets (problem_id, bucket, count)
+        VALUES (?, ?, ?)
+        ON CONFLICT (problem_id, bucket) DO UPDATE SET count = count + excluded.count
+    ''', [(problem_id, bucket, count) for bucket, count in buckets.items()])
+
+
+def _quantile(buckets, samples, q):
+    """直方圖的分位數（回傳所在格的上界，毫秒）"""
+    if not samples:
+        return None
+    rank = q * samples
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            return round(bucket_upper(bucket), 1)
+    return round(bucket_upper(buckets[-1][0]), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("rebuild", "show"))
+    parser.add_argument("--db", default=str(Path(__file__).parent / "database.db"), help="資料庫路徑")
+    parser.add_argument("--problem-id", type=int, help="只處理此題目（預設全部）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每次讀取的報告數")
+    args = parser.parse_args(argv)
+
+    db = Database(Path(args.db))
+    db.init_schema()
+    try:
+        if args.command == "rebuild":
+            total = rebuild(db, args.problem_id, args.batch_size)
+            print(f"rebuilt statistics from {total:,} reports")
+        elif args.problem_id is None:
+            parser.error("show requires --problem-id")
+        else:
+            with db.connection() as c:
+                print(json.dumps(fetch(c, args.problem_id), indent=2))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
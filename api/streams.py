@@ -0,0 +1,119 @@
+"""
+執行中檢查的診斷串流
+背景工作者逐行解析 clang-tidy 輸出並發佈到 RunStream，
+SSE 端點依序讀取；緩衝區有上限，診斷數量再多記憶體也維持固定。
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+
+class RunStream:
+    """單一 run 的事件緩衝（執行緒安全）
+
+    緩衝區滿且有讀者尚未讀取最舊事件時，發佈端最多等待 max_block 秒
+    （clang-tidy 的 stdout 管線因此自然形成背壓）；讀者停滯超過時限後改為丟棄最舊事件。
+    """
+
+    def __init__(self, buffer_size: int = 1000, max_block: float = 1.0):
+        self._events = deque(maxlen=buffer_size)
+        self._offset = 0          # _events[0] 的絕對序號
+        self._cond = threading.Condition()
+        self._readers = {}        # 讀者代號 -> 下一個要讀的序號
+        self._next_reader = 0
+        self._blocking = True
+        self.max_block = max_block
+        self.final = None         # 結束時的 run 結果
+
+    def attach(self) -> int:
+        with self._cond:
+            reader = self._next_reader
+            self._next_reader += 1
+            self._readers[reader] = self._offset
+            return reader
+
+    def detach(self, reader: int):
+        with self._cond:
+            self._readers.pop(reader, None)
+            self._cond.notify_all()
+
+    def publish(self, event: dict):
+        with self._cond:
+            deadline = None
+            while self._blocking and self._is_full() and self._has_lagging_reader():
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_block
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._blocking = False
+                    break
+                self._cond.wait(remaining)
+            self._append(event)
+
+    async def publish_async(self, event: dict):
+        """publish 的 asyncio 版本：等待讀者時讓出事件迴圈而不是阻塞執行緒"""
+        deadline = time.monotonic() + self.max_block
+        while True:
+            with self._cond:
+                if not (self._blocking and self._is_full() and self._has_lagging_reader()):
+                    self._append(event)
+                    return
+                if time.monotonic() >= deadline:
+                    self._blocking = False
+                    self._append(event)
+                    return
+            await asyncio.sleep(0.01)
+
+    def close(self, final: dict):
+        with self._cond:
+            self.final = final
+            self._cond.notify_all()
+
+    def read(self, reader: int):
+        """回傳 (事件清單, 因落後而略過的事件數, 結束結果)"""
+        with self._cond:
+            wanted = self._readers[reader]
+            start = max(wanted, self._offset)
+            events = list(itertools.islice(self._events, start - self._offset, None))
+            self._readers[reader] = start + len(events)
+            self._cond.notify_all()
+            return events, start - wanted, self.final
+
+    def _append(self, event: dict):
+        if self._is_full():
+            self._offset += 1
+        self._events.append(event)
+
+    def _is_full(self) -> bool:
+        return len(self._events) == self._events.maxlen
+
+    def _has_lagging_reader(self) -> bool:
+        return any(position <= self._offset for position in self._readers.values())
+
+
+class StreamRegistry:
+    """run_id -> RunStream 對照表"""
+
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def open(self, run_id: str) -> RunStream:
+        with self._lock:
+            stream = self._streams[run_id] = RunStream(self.buffer_size)
+            return stream
+
+    def get(self, run_id: str) -> RunStream | None:
+        with self._lock:
+            return self._streams.get(run_id)
+
+    def close(self, run_id: str, final: dict):
+        """結束串流並移除；已連線的讀者仍持有參考，可讀完剩餘事件"""
+        with self._lock:
+            stream = self._streams.pop(run_id, None)
+        if stream:
+            stream.close(final)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+詞法預篩正確性測試
+1. 以手寫案例確認註解、字串、raw string、反斜線換行等情況的判定
+2. 對 examples/ 與手寫案例中預篩判定通過者實際執行 clang-tidy，
+   確認確實沒有 misc-forbid-* 診斷（預篩不得放過任何違規）
+
+用法（於專案根目錄）：
+  python3 api/test_prescreen.py
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from api.diagnostics import parse_output  # noqa: E402
+from api.prescreen import prescreen  # noqa: E402
+
+MODULE_PATH = BASE_DIR / "build" / "libMiscTidyModule.so"
+
+LOOPS = b"Checks: misc-forbid-loops\nWarningsAsErrors: misc-forbid-*\n"
+FUNCTIONS = (b"Checks: misc-forbid-functions\nWarningsAsErrors: misc-forbid-*\n"
+             b"CheckOptions:\n  - key: misc-forbid-functions.ForbiddenNames\n"
+             b"    value: 'printf,malloc,std::sort'\n")
+BOTH = (b"Checks: misc-forbid-loops,misc-forbid-functions\nWarningsAsErrors: misc-forbid-*\n"
+        b"CheckOptions:\n  - key: misc-forbid-functions.ForbiddenNames\n"
+        b"    value: 'printf,malloc,std::sort'\n")
+WILDCARD = (b"Checks: misc-forbid-functions\nWarningsAsErrors: misc-forbid-*\n"
+            b"CheckOptions:\n  - key: misc-forbid-functions.ForbiddenNames\n"
+            b"    value: 'str*,std::*sort'\n")
+RESERVED = (b"Checks: misc-forbid-functions\nWarningsAsErrors: misc-forbid-*\n"
+            b"CheckOptions:\n  - key: misc-forbid-functions.ForbiddenNames\n"
+            b"    value: '__assert_fail'\n")
+OTHER = b"Checks: misc-forbid-loops,misc-forbid-arrays\n"
+
+# (名稱, 語言, 配置, 程式碼, 預期預篩結果)
+CASES = [
+    ("no loop", 0, LOOPS, '#include <stdio.h>\nint main() { puts("hi"); return 0; }\n', True),
+    ("for loop", 0, LOOPS, "int main() { for (;;) {} }\n", False),
+    ("loop in comment", 0, LOOPS, "// for (;;)\n/* while (1) */\nint main() { return 0; }\n", True),
+    ("loop in string", 0, LOOPS, 'const char *s = "for while do";\nint main() { return 0; }\n', True),
+    ("loop in char", 1, LOOPS, "char c = '\\'';\nint main() { return 0; }\n", True),
+    ("raw string", 1, LOOPS, 'const char *s = R"x(for ")" while)x";\nint main() { return 0; }\n', True),
+    ("raw string hides nothing", 1, LOOPS,
+     'const char *s = R"(a)";\nint main() { while (0) {} }\n', False),
+    ("line splice", 0, LOOPS, "int main() { fo\\\nr (;;) {} }\n", False),
+    ("comment splice", 0, LOOPS, "// note \\\nfor\nint main() { return 0; }\n", True),
+    ("digit separator", 1, LOOPS, "int x = 1'000;\nint main() { while (x) {} }\n", False),
+    ("token paste", 0, LOOPS, "#define L(a, b) a##b\nint main() { L(fo, r) (;;) {} }\n", False),
+    ("user header", 0, LOOPS, '#include "loops.h"\nint main() { return 0; }\n', False),
+    ("macro include", 0, LOOPS,
+     "#define Q <sys/queue.h>\n#include Q\nint main() { return 0; }\n", False),
+    ("digraph include", 0, LOOPS, "%:include <sys/queue.h>\nint main() { return 0; }\n", False),
+    ("spliced include", 0, LOOPS, "#inc\\\nlude <stdio.h>\nint main() { return 0; }\n", True),
+    ("unterminated comment", 0, LOOPS, "int main() { return 0; } /*\n", False),
+    ("forbidden call", 0, FUNCTIONS, '#include <stdio.h>\nint main() { printf("x"); }\n', False),
+    ("qualified name", 1, FUNCTIONS,
+     "#include <algorithm>\nint a[2];\nint main() { std::sort(a, a + 2); }\n", False),
+    ("allowed call", 0, FUNCTIONS, '#include <stdio.h>\nint main() { puts("printf"); }\n', True),
+    ("both rules", 0, BOTH, "int main() { int x = 0; do { x++; } while (x < 3); }\n", False),
+    ("wildcard names", 0, WILDCARD, "int main() { return 0; }\n", False),
+    ("reserved name via macro", 0, RESERVED,
+     "#include <assert.h>\nint main() { assert(1); }\n", False),
+    ("other check", 0, OTHER, "int main() { return 0; }\n", False),
+]
+
+
+def run_clang_tidy(code, language_type, config):
+    """執行 clang-tidy，回傳 misc-forbid-* 診斷清單"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        code_file = tmpdir / ("code.c" if language_type == 0 else "code.cpp")
+        code_file.write_text(code)
+        (tmpdir / ".clang-tidy").write_bytes(config)
+        std_flag = "-std=c17" if language_type == 0 else "-std=c++17"
+        result = subprocess.run(
+            ["clang-tidy", str(code_file), "-load", str(MODULE_PATH), "--", std_flag],
+            capture_output=True, text=True, cwd=tmpdir, timeout=60,
+        )
+    return [d for d in parse_output(result.stdout) if (d.check or "").startswith("misc-forbid-")]
+
+
+def test_1_lexical_cases():
+    """測試預篩判定"""
+    print("\n1️⃣  預篩判定...")
+    mismatches = []
+    for name, _, config, code, expected in CASES:
+        actual = prescreen(code, config)
+        mark = "✅" if actual == expected else "❌"
+        if actual != expected:
+            mismatches.append(name)
+        print(f"  {mark} {name:26s} expected={expected} actual={actual}")
+    assert not mismatches, f"prescreen mismatches: {', '.join(mismatches)}"
+
+
+def test_2_compare_with_clang_tidy():
+    """對預篩判定通過者實際執行 clang-tidy"""
+    print("\n2️⃣  與 clang-tidy 比對...")
+    if not MODULE_PATH.exists():
+        print(f"  ⚠️  {MODULE_PATH} 不存在，略過（請先建置模組）")
+        return
+
+    samples = [(name, language_type, code) for name, language_type, _, code, _ in CASES]
+    for path in sorted([*(BASE_DIR / "examples").glob("*.c"), *(BASE_DIR / "examples").glob("*.cpp")]):
+        samples.append((path.name, 0 if path.suffix == ".c" else 1, path.read_text(errors="replace")))
+
+    mismatches = []
+    checked = 0
+    for name, language_type, code in samples:
+        for config in (LOOPS, FUNCTIONS, BOTH):
+            if not prescreen(code, config):
+                continue
+            checked += 1
+            diagnostics = run_clang_tidy(code, language_type, config)
+            if diagnostics:
+                mismatches.append(name)
+                print(f"  ❌ {name}: prescreen passed but clang-tidy reported {diagnostics[0]}")
+    print(f"  checked {checked} prescreen passes, {len(mismatches)} mismatches")
+    assert not mismatches, f"prescreen passed but clang-tidy reported violations: {', '.join(mismatches)}"
+
+
+def run_full_test():
+    """執行完整測試"""
+    print("=" * 60)
+    print("🚀 詞法預篩測試")
+    print("=" * 60)
+
+    failed = False
+    for test in (test_1_lexical_cases, test_2_compare_with_clang_tidy):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ {e}")
+            failed = True
+
+    print("\n" + "=" * 60)
+    print("✅ 測試完成！" if not failed else "❌ 測試失敗")
+    print("=" * 60)
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_full_test() else 0)
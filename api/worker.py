@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+獨立的 lint worker
+從 lint_queue 領取 /lint/run 的非同步工作（API 設定 LINT_QUEUE_BACKEND=db 時寫入），
+以租約 + 心跳避免重複執行；worker 中斷時，租約到期後工作由其他 worker 重新領取，
+原 worker 發現租約遺失即取消該工作，結果只由持有租約者寫回。
+多台機器或容器共用同一個資料庫（DB_PATH）與題目配置（CONFIG_DIR）即可一起消化佇列。
+收到 SIGTERM / SIGINT 時停止領取，等待執行中的工作最多 --drain-sec 秒，其餘歸還佇列。
+
+用法（於專案根目錄）：
+  python -m api.worker --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import uuid
+
+from api.app import (
+    LINT_CONCURRENCY, LINT_PCH, LINT_QUEUE_LEASE_SEC, _execute_lint, _fetch_submission_code, _finish_run,
+    db, init_db, pch_manager, work_queue, workspace_pool,
+)
+
+
+class Worker:
+    """領取並執行 lint_queue 中的工作，同時執行數上限為 concurrency"""
+
+    def __init__(self, concurrency: int, poll_interval: float = 0.5, drain_sec: float = 30.0):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.drain_sec = drain_sec
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.active = {}    # run_id -> task
+        self.processed = 0
+        self._stopping = False
+        self._wakeup = None
+
+    def stop(self):
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not self._stopping:
+                free = self.concurrency - len(self.active)
+                jobs = await asyncio.to_thread(work_queue.claim, self.owner, free) if free else []
+                for job in jobs:
+                    self.active[job.run_id] = asyncio.create_task(self._process(job))
+                # 佇列還有工作且仍有空位時立即再領取，否則等待工作完成或輪詢間隔
+                if jobs and len(jobs) == free:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            await self._drain()
+        finally:
+            heartbeat.cancel()
+
+    async def _drain(self):
+        if not self.active:
+            return
+        _done, pending = await asyncio.wait(list(self.active.values()), timeout=self.drain_sec)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _process(self, job):
+        params = job.params
+        try:
+            row = await asyncio.to_thread(_fetch_submission_code, job.submission_id)
+            if row is None:
+                await asyncio.to_thread(
+                    _finish_run, job.run_id, job.submission_id, job.problem_id, 'failed', [], False,
+                    "submission not found.", None, None, None, None, self.owner)
+            else:
+                await _execute_lint(
+                    job.run_id, job.submission_id, row[0], job.problem_id, params["language_type"],
+                    params["timeout_sec"], params["export_fixes"], params["use_prescreen"], params["profile"],
+                    priority=job.priority, fair_key=job.fair_key, admitted=True, lease_owner=self.owner)
+            await asyncio.to_thread(work_queue.complete, job.run_id, self.owner)
+        except subprocess.TimeoutExpired:
+            # 逾時已記錄於 lint_runs，重試也不會有不同結果
+            await asyncio.to_thread(work_queue.complete, job.run_id, self.owner)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(work_queue.release, job.run_id, self.owner))
+            raise
+        except Exception as e:
+            retried = await asyncio.to_thread(work_queue.retry, job.run_id, self.owner, str(e))
+            print(f"⚠️  {job.run_id} attempt {job.attempts} failed: {e}"
+                  f"{' (will retry)' if retried else ''}", file=sys.stderr)
+        finally:
+            self.processed += 1
+            self.active.pop(job.run_id, None)
+            self._wakeup.set()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(work_queue.lease_sec / 3)
+            # 只檢查送出心跳前已領取的工作（之後才領取的不在這次查詢的結果中）
+            active = set(self.active)
+            if not active:
+                continue
+            try:
+                owned = await asyncio.to_thread(work_queue.heartbeat, self.owner)
+            except Exception as e:
+                print(f"⚠️  heartbeat failed: {e}", file=sys.stderr)
+                continue
+            # 租約已被重新排隊（可能已由其他 worker 領取）：取消執行，結果也不會寫回
+            for run_id in active - owned:
+                task = self.active.get(run_id)
+                if task is not None:
+                    print(f"⚠️  lease lost, cancelling: {run_id}", file=sys.stderr)
+                    task.cancel()
+
+
+async def serve(worker: Worker):
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    init_db()
+    workspace_pool.cleanup_stale()
+    if LINT_PCH:
+        loop.run_in_executor(None, pch_manager.warm)
+    print(f"✅ Lint worker {worker.owner} (concurrency {worker.concurrency}, lease {work_queue.lease_sec:g}s)")
+    try:
+        await worker.run()
+    finally:
+        workspace_pool.close()
+        db.close()
+    print(f"✅ Lint worker stopped ({worker.processed} jobs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=LINT_CONCURRENCY,
+                        help="同時執行的工作數（預設 LINT_CONCURRENCY）")
+    parser.add_argument("--lease-sec", type=float, default=LINT_QUEUE_LEASE_SEC,
+                        help="租約秒數（預設 LINT_QUEUE_LEASE_SEC）")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="佇列為空時的輪詢間隔（秒）")
+    parser.add_argument("--drain-sec", type=float, default=30.0, help="關閉時等待執行中工作的秒數")
+    args = parser.parse_args()
+
+    work_queue.lease_sec = args.lease_sec
+    asyncio.run(serve(Worker(args.concurrency, args.poll_interval, args.drain_sec)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
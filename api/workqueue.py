@@ -0,0 +1,233 @@
+"""
+持久的 lint 工作佇列
+/lint/run 的非同步工作寫入 SQLite 的 lint_queue 表，由 api.worker 以租約領取：
+worker 定期送心跳延長租約，租約到期（worker 中斷或失聯）的工作自動重新排隊，
+執行失敗的工作延遲後重試，超過嘗試次數上限即放棄並將 run 記錄為 failed。
+領取順序：優先類別（interactive 先於 batch）-> 同類別內各公平鍵輪流
+（已有工作在執行或最近才被領取的鍵往後排）-> 排入時間。
+各鍵的排隊/執行中數量維護於 lint_queue_cursors，領取時只讀取此表並以索引查詢各鍵最早的工作，
+成本與公平鍵數量有關，與佇列長度無關。
+多個行程、機器共用同一個資料庫時，領取以 BEGIN IMMEDIATE 交易序列化，不會重複領取。
+"""
+
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+from api.admission import PRIORITIES
+from api.db import Database
+
+
+class Job(NamedTuple):
+    run_id: str
+    submission_id: int
+    problem_id: int
+    params: dict
+    attempts: int
+    enqueued_at: float
+    priority: str
+    fair_key: str | None
+
+
+class WorkQueue:
+    """lint_queue 表的存取（狀態：queued -> leased -> 完成時刪除）"""
+
+    def __init__(self, db: Database, lease_sec: float = 60.0, max_attempts: int = 3,
+                 retry_delay_sec: float = 5.0):
+        self.db = db
+        self.lease_sec = lease_sec
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay_sec = retry_delay_sec
+
+    def enqueue(self, c, run_id: str, submission_id: int, problem_id: int, params: dict,
+                priority: str = PRIORITIES[0], fair_key: str | None = None):
+        """在呼叫端的交易中加入工作（與 lint_runs 記錄一起提交）"""
+        now = time.time()
+        rank = PRIORITIES.index(priority)
+        c.execute('''
+            INSERT INTO lint_queue
+            (run_id, submission_id, problem_id, params, status, attempts, max_attempts,
+             available_at, enqueued_at, priority, fair_key)
+            VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?, ?)
+        ''', (run_id, submission_id, problem_id, json.dumps(params), self.max_attempts, now, now,
+              rank, fair_key))
+        _count(c, rank, fair_key, queued=1)
+
+    def claim(self, owner: str, limit: int) -> list[Job]:
+        """領取最多 limit 筆工作（先將到期的租約重新排隊）"""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self.db.transaction() as c:
+            self._requeue_expired(c, now)
+            # 有排隊工作的鍵（數量與題目/使用者數相當）；同一個鍵的執行中數量跨類別合計
+            c.execute('''
+                SELECT priority, fair_key, queued, leased, last_claimed_at FROM lint_queue_cursors
+                WHERE queued > 0 OR leased > 0
+            ''')
+            cursors = c.fetchall()
+            leased = Counter()
+            for _priority, fair_key, _queued, n, _last in cursors:
+                leased[fair_key] += n
+            candidates = {(priority, fair_key): last for priority, fair_key, queued, _n, last in cursors if queued}
+
+            rows = []
+            while candidates and len(rows) < limit:
+                # 類別 -> 該鍵執行中的工作數（含這次領取的）-> 最近被領取的時間
+                priority, fair_key = min(candidates, key=lambda k: (k[0], leased[k[1]], candidates[k]))
+                c.execute('''
+                    SELECT run_id, submission_id, problem_id, params, attempts, enqueued_at FROM lint_queue
+                    WHERE status = 'queued' AND priority = ? AND fair_key IS ? AND available_at <= ?
+                    ORDER BY available_at LIMIT 1
+                ''', (priority, fair_key or None, now))
+                row = c.fetchone()
+                if row is None:
+                    # 只剩延遲重試中的工作
+                    del candidates[priority, fair_key]
+                    continue
+                c.execute('''
+                    UPDATE lint_queue
+                    SET status = 'leased', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1
+                    WHERE run_id = ?
+                ''', (owner, now + self.lease_sec, row[0]))
+                _count(c, priority, fair_key, queued=-1, leased=1, claimed_at=now)
+                leased[fair_key] += 1
+                candidates[priority, fair_key] = now
+                rows.append((*row, priority, fair_key or None))
+        return [Job(run_id, submission_id, problem_id, json.loads(params), attempts + 1, enqueued_at,
+                    PRIORITIES[priority], fair_key)
+                for run_id, submission_id, problem_id, params, attempts, enqueued_at, priority, fair_key in rows]
+
+    def heartbeat(self, owner: str) -> set[str]:
+        """延長 owner 持有的所有租約，回傳仍由 owner 持有的 run_id"""
+        with self.db.transaction() as c:
+            c.execute('''
+                UPDATE lint_queue SET lease_expires_at = ?
+                WHERE lease_owner = ? AND status = 'leased'
+            ''', (time.time() + self.lease_sec, owner))
+            c.execute('''
+                SELECT run_id FROM lint_queue WHERE lease_owner = ? AND status = 'leased'
+            ''', (owner,))
+            return {row[0] for row in c.fetchall()}
+
+    def holds_lease(self, c, run_id: str, owner: str) -> bool:
+        """在呼叫端的交易中確認 owner 仍持有 run_id 的租約（寫回結果前檢查）"""
+        c.execute('''
+            SELECT 1 FROM lint_queue WHERE run_id = ? AND lease_owner = ? AND status = 'leased'
+        ''', (run_id, owner))
+        return c.fetchone() is not None
+
+    def complete(self, run_id: str, owner: str):
+        """工作完成（結果已寫入 lint_runs），自佇列移除"""
+        with self.db.transaction() as c:
+            if self.holds_lease(c, run_id, owner):
+                _delete(c, run_id)
+
+    def retry(self, run_id: str, owner: str, error: str) -> bool:
+        """執行失敗：未達嘗試上限時延遲後重新排隊並回傳 True，否則移除（run 維持 failed）"""
+        with self.db.transaction() as c:
+            c.execute('''
+                SELECT attempts, max_attempts FROM lint_queue
+                WHERE run_id = ? AND lease_owner = ? AND status = 'leased'
+            ''', (run_id, owner))
+            row = c.fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                _delete(c, run_id)
+                return False
+            delay = self.retry_delay_sec * 2 ** (attempts - 1)
+            self._requeue(c, run_id, time.time() + delay, error)
+            return True
+
+    def release(self, run_id: str, owner: str):
+        """worker 關閉時歸還租約，立即重新排隊且不計入嘗試次數"""
+        with self.db.transaction() as c:
+            c.execute('''
+                UPDATE lint_queue SET attempts = attempts - 1
+                WHERE run_id = ? AND lease_owner = ? AND status = 'leased'
+            ''', (run_id, owner))
+            if c.rowcount:
+                self._requeue(c, run_id, time.time(), None)
+
+    def stats(self) -> dict:
+        """各狀態的數量，以及各優先類別排隊中的數量與最久等待秒數"""
+        with self.db.connection() as c:
+            c.execute('''
+                SELECT status, priority, COUNT(*), MIN(enqueued_at) FROM lint_queue GROUP BY status, priority
+            ''')
+            rows = c.fetchall()
+        now = time.time()
+        classes = {p: {"queued": 0, "leased": 0, "oldest_queued_sec": None} for p in PRIORITIES}
+        for status, priority, count, oldest in rows:
+            entry = classes[PRIORITIES[priority]]
+            entry[status] = count
+            if status == 'queued':
+                entry["oldest_queued_sec"] = round(now - oldest, 3)
+        waits = [e["oldest_queued_sec"] for e in classes.values() if e["oldest_queued_sec"] is not None]
+        return {
+            "queued": sum(e["queued"] for e in classes.values()),
+            "leased": sum(e["leased"] for e in classes.values()),
+            "oldest_queued_sec": max(waits) if waits else None,
+            "classes": classes,
+        }
+
+    def _requeue_expired(self, c, now: float) -> int:
+        c.execute('''
+            SELECT run_id, attempts, max_attempts FROM lint_queue
+            WHERE status = 'leased' AND lease_expires_at < ?
+        ''', (now,))
+        expired = c.fetchall()
+        for run_id, attempts, max_attempts in expired:
+            if attempts < max_attempts:
+                self._requeue(c, run_id, now, 'lease expired.')
+                continue
+            _delete(c, run_id)
+            c.execute('''
+                UPDATE lint_runs SET status = 'failed', completed_at = ?, error_message = ?
+                WHERE id = ?
+            ''', (datetime.now().isoformat(), f"lint worker lost after {attempts} attempts.", run_id))
+        return len(expired)
+
+    def _requeue(self, c, run_id: str, available_at: float, error: str | None):
+        c.execute("SELECT priority, fair_key FROM lint_queue WHERE run_id = ? AND status = 'leased'", (run_id,))
+        row = c.fetchone()
+        if row is None:
+            return
+        _count(c, *row, queued=1, leased=-1)
+        c.execute('''
+            UPDATE lint_queue
+            SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL,
+                available_at = ?, last_error = COALESCE(?, last_error)
+            WHERE run_id = ?
+        ''', (available_at, error, run_id))
+        c.execute('''
+            UPDATE lint_runs SET status = 'queued', completed_at = NULL, error_message = NULL
+            WHERE id = ?
+        ''', (run_id,))
+
+
+def _count(c, priority: int, fair_key: str | None, queued: int = 0, leased: int = 0, claimed_at: float = 0):
+    """調整 lint_queue_cursors 中該鍵的排隊/執行中數量（與 lint_queue 的變更在同一交易中）"""
+    c.execute('''
+        INSERT INTO lint_queue_cursors (priority, fair_key, queued, leased, last_claimed_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (priority, fair_key) DO UPDATE SET
+            queued = queued + excluded.queued,
+            leased = leased + excluded.leased,
+            last_claimed_at = MAX(last_claimed_at, excluded.last_claimed_at)
+    ''', (priority, fair_key or '', queued, leased, claimed_at))
+
+
+def _delete(c, run_id: str):
+    """自佇列移除工作並扣除所屬鍵的數量"""
+    c.execute('SELECT priority, fair_key, status FROM lint_queue WHERE run_id = ?', (run_id,))
+    row = c.fetchone()
+    if row is None:
+        return
+    priority, fair_key, status = row
+    c.execute('DELETE FROM lint_queue WHERE run_id = ?', (run_id,))
+    _count(c, priority, fair_key, queued=-(status == 'queued'), leased=-(status == 'leased'))
@@ -0,0 +1,134 @@
+"""
+clang-tidy 工作目錄池
+預先在 tmpfs（預設 /dev/shm）建立工作目錄並重複使用，每次檢查只覆寫程式碼檔；
+題目 .clang-tidy 內容未變時保留原檔，避免每次請求都建立並刪除整個目錄樹。
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+WORKSPACE_PREFIX = "clang-tidy-ws-"
+CONFIG_NAME = ".clang-tidy"
+
+
+class Workspace:
+    """單一工作目錄；同一時間只由一個執行緒使用"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._config = None       # 目前 .clang-tidy 的內容（None 表示不存在）
+        path.mkdir(parents=True, exist_ok=True)
+
+    def prepare(self, filename: str, code: str, config_bytes: bytes) -> Path:
+        """寫入程式碼與配置，回傳程式碼檔路徑"""
+        config = config_bytes or None
+        if config != self._config:
+            config_path = self.path / CONFIG_NAME
+            if config is None:
+                config_path.unlink(missing_ok=True)
+            else:
+                tmp = self.path / (CONFIG_NAME + ".tmp")
+                tmp.write_bytes(config)
+                os.replace(tmp, config_path)
+            self._config = config
+
+        code_file = self.path / filename
+        code_file.write_text(code)
+        return code_file
+
+    def reset(self):
+        """移除 .clang-tidy 以外的所有檔案（程式碼、fixes.yaml 等）"""
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name == CONFIG_NAME:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+    def destroy(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class WorkspacePool:
+    """以 LIFO 重複使用工作目錄（剛釋放的目錄最可能還在快取中）
+
+    閒置目錄最多保留 size 個；同時使用超過 size 時臨時建立，釋放後刪除。
+    每個行程使用 <root>/clang-tidy-ws-<pid>，啟動時清除已結束行程留下的目錄。
+    """
+
+    def __init__(self, root: Path, size: int = 8):
+        if not root.is_dir():
+            root = Path(tempfile.gettempdir())
+        self.root = root / f"{WORKSPACE_PREFIX}{os.getpid()}"
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._next = 0
+
+    @contextmanager
+    def acquire(self):
+        """取得工作目錄，離開時重設並歸還"""
+        try:
+            workspace = self._idle.get_nowait()
+        except queue.Empty:
+            workspace = self._create()
+        try:
+            yield workspace
+        finally:
+            self._release(workspace)
+
+    def cleanup_stale(self) -> int:
+        """刪除已結束行程留下的工作目錄，回傳刪除數量"""
+        removed = 0
+        parent = self.root.parent
+        if not parent.is_dir():
+            return removed
+        for path in parent.glob(f"{WORKSPACE_PREFIX}*"):
+            pid = path.name[len(WORKSPACE_PREFIX):]
+            if not pid.isdigit() or path == self.root or _pid_alive(int(pid)):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _create(self) -> Workspace:
+        with self._lock:
+            index = self._next
+            self._next += 1
+        return Workspace(self.root / str(index))
+
+    def _release(self, workspace: Workspace):
+        try:
+            workspace.reset()
+        except OSError:
+            workspace.destroy()
+            return
+        if self._idle.qsize() < self.size:
+            self._idle.put(workspace)
+        else:
+            workspace.destroy()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
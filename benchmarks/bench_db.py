@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+SQLite 存取層微基準測試
+以多個並行寫入者模擬 API 端點的資料庫操作，比較：
+  before: 每次請求 sqlite3.connect + 預設 rollback journal
+  after:  api.db.Database 連線池 + WAL
+
+用法：
+  python3 benchmarks/bench_db.py --writers 16 --requests 500
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.db import SCHEMA, Database  # noqa: E402
+
+
+def request_before(db_path, i):
+    """舊寫法：每個步驟各自連線、提交、關閉"""
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(db_path, timeout=30)
+    c = conn.cursor()
+    c.execute('INSERT INTO submissions (problem_id, code, language, created_at) VALUES (?, ?, ?, ?)',
+              (1, f"int main() {{ return {i}; }}", 'cpp', now))
+    submission_id = c.lastrowid
+    conn.commit()
+    conn.close()
+
+    run_id = f"run_{submission_id}_{i}"
+    conn = sqlite3.connect(db_path, timeout=30)
+    c = conn.cursor()
+    c.execute('SELECT code, language FROM submissions WHERE id = ?', (submission_id,))
+    c.fetchone()
+    c.execute('INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at) VALUES (?, ?, ?, ?, ?)',
+              (run_id, submission_id, 1, 'running', now))
+    conn.commit()
+    c.execute('UPDATE lint_runs SET status = ?, violations_count = ?, completed_at = ? WHERE id = ?',
+              ('finished', 0, now, run_id))
+    conn.commit()
+    conn.close()
+
+
+def request_after(db, i):
+    """新寫法：連線池 + 短交易"""
+    now = datetime.now().isoformat()
+    with db.transaction() as c:
+        c.execute('INSERT INTO submissions (problem_id, code, language, created_at) VALUES (?, ?, ?, ?)',
+                  (1, f"int main() {{ return {i}; }}", 'cpp', now))
+        submission_id = c.lastrowid
+
+    run_id = f"run_{submission_id}_{i}"
+    with db.connection() as c:
+        c.execute('SELECT code, language FROM submissions WHERE id = ?', (submission_id,))
+        c.fetchone()
+    with db.transaction() as c:
+        c.execute('INSERT INTO lint_runs (id, submission_id, problem_id, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                  (run_id, submission_id, 1, 'running', now))
+    with db.transaction() as c:
+        c.execute('UPDATE lint_runs SET status = ?, violations_count = ?, completed_at = ? WHERE id = ?',
+                  ('finished', 0, now, run_id))
+
+
+def run(label, worker, target, writers, requests):
+    errors = []
+
+    def loop(offset):
+        for i in range(requests):
+            try:
+                worker(target, offset * requests + i)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = writers * requests
+    print(f"{label:7s} {total / elapsed:10.1f} req/s  ({total} requests, {elapsed:.2f}s, {len(errors)} errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16, help="並行寫入執行緒數")
+    parser.add_argument("--requests", type=int, default=300, help="每個執行緒的請求數")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        before_path = Path(tmpdir) / "before.db"
+        conn = sqlite3.connect(before_path)
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+        run("before", request_before, before_path, args.writers, args.requests)
+
+        db = Database(Path(tmpdir) / "after.db", pool_size=args.writers)
+        db.init_schema()
+        run("after", request_after, db, args.writers, args.requests)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
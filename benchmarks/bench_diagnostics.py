@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+診斷解析基準測試
+以合成的 clang-tidy 輸出（預設 5000 筆診斷）比較：
+  yaml.safe_load     舊做法：匯出 fixes 後以純 Python loader 讀取
+  load_fixes         以 C 版 loader（若可用）讀取 fixes 並轉為 Diagnostic
+  parse_output       直接解析 stdout，完全不匯出 fixes
+
+用法：
+  python3 benchmarks/bench_diagnostics.py --diagnostics 5000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.diagnostics import load_fixes, parse_output  # noqa: E402
+
+MESSAGE = "Loop statements (for/while/do) are forbidden."
+
+
+def synthesize(n, path):
+    """產生 n 筆診斷的原始碼、stdout 與 fixes YAML"""
+    source = "int main() {\n" + "    for (;;) {}\n" * n + "}\n"
+    stdout = []
+    fixes = ["---", f"MainSourceFile:  '{path}'", "Diagnostics:"]
+    offset = len("int main() {\n")
+    for i in range(n):
+        line = i + 2
+        stdout.append(f"{path}:{line}:5: error: {MESSAGE} [misc-forbid-loops,-warnings-as-errors]")
+        stdout.append("    for (;;) {}")
+        stdout.append("    ^")
+        fixes.extend([
+            "  - DiagnosticName:  misc-forbid-loops",
+            "    DiagnosticMessage:",
+            f"      Message:         '{MESSAGE}'",
+            f"      FilePath:        '{path}'",
+            f"      FileOffset:      {offset + 4}",
+            "      Replacements:    []",
+            "    Level:           Error",
+            "    BuildDirectory:  '/tmp'",
+        ])
+        offset += len("    for (;;) {}\n")
+    fixes.append("...")
+    return source, "\n".join(stdout) + "\n", "\n".join(fixes) + "\n"
+
+
+def bench(label, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:18s} {best * 1000:9.2f} ms  ({len(result)} diagnostics)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagnostics", type=int, default=5000, help="合成的診斷筆數")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數（取最佳值）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        code_path = Path(tmpdir) / "code.cpp"
+        source, stdout, fixes = synthesize(args.diagnostics, code_path)
+        fixes_path = Path(tmpdir) / "fixes.yaml"
+        fixes_path.write_text(fixes)
+        sources = {code_path.name: source}
+
+        print(f"libyaml available: {yaml.__with_libyaml__}")
+        bench("yaml.safe_load", lambda: yaml.safe_load(fixes_path.read_text())["Diagnostics"], args.repeat)
+        bench("load_fixes", lambda: load_fixes(fixes_path, sources), args.repeat)
+        bench("parse_output", lambda: parse_output(stdout), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+misc-forbid-functions 禁用清單規模基準測試
+禁用清單由 1 增加到 1000 個名稱（先放常見的 libc/STL 函式，不足的以合成名稱補齊），
+對 examples/sample_bad.cpp 執行 clang-tidy，記錄整體執行時間（中位數）與
+--store-check-profile 量到的 misc-forbid-functions 本身耗時。需要已建置的 build/libMiscTidyModule.so。
+
+用法：
+  python3 benchmarks/bench_forbid_functions.py --repeat 5
+  python3 benchmarks/bench_forbid_functions.py --style qualified   # std::sort 形式
+  python3 benchmarks/bench_forbid_functions.py --style wildcard    # 每 10 個名稱含一個 str* 形式
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from api.diagnostics import load_check_profile  # noqa: E402
+
+MODULE_PATH = BASE_DIR / "build" / "libMiscTidyModule.so"
+CHECK = "misc-forbid-functions"
+SIZES = (1, 10, 50, 100, 200, 500, 1000)
+
+# sort 放在最前面：每種規模都至少有一筆違規，確認清單確實生效
+COMMON_NAMES = """
+sort printf scanf puts gets malloc calloc realloc free memcpy memmove memset memcmp strcpy strncpy
+strcat strncat strcmp strncmp strlen strchr strrchr strstr strtok atoi atol atof strtol strtoul
+strtod qsort bsearch abs labs rand srand exit abort system getchar putchar fopen fclose fread
+fwrite fprintf fscanf fgets fputs sprintf snprintf sscanf stable_sort partial_sort nth_element
+lower_bound upper_bound binary_search equal_range find find_if count count_if accumulate reverse
+unique rotate shuffle next_permutation prev_permutation min_element max_element fill copy
+transform for_each remove remove_if replace swap iota merge make_heap push_heap pop_heap
+sort_heap is_sorted lexicographical_compare all_of any_of none_of partition stable_partition
+set_union set_intersection set_difference includes adjacent_find search mismatch equal
+""".split()
+
+
+def deny_list(size, style):
+    names = COMMON_NAMES[:size]
+    names += [f"forbidden_fn_{i}" for i in range(size - len(names))]
+    if style == "qualified":
+        names = [n if n.startswith("forbidden_fn_") else f"std::{n}" for n in names]
+    elif style == "wildcard":
+        names = [f"{n[:3]}*" if i % 10 == 9 else n for i, n in enumerate(names)]
+    return names
+
+
+def run(cmd, profile_dir):
+    for stale in profile_dir.glob("*.json"):
+        stale.unlink()
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    check_ms = load_check_profile(profile_dir).get(CHECK, {}).get("wall", 0.0) * 1000
+    violations = proc.stdout.count(f"[{CHECK}")
+    return elapsed, check_ms, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="每種規模執行次數（取中位數）")
+    parser.add_argument("--style", choices=("plain", "qualified", "wildcard"), default="plain",
+                        help="名稱形式")
+    parser.add_argument("--clang-tidy", default="clang-tidy", help="clang-tidy 執行檔")
+    parser.add_argument("--file", default=str(BASE_DIR / "examples" / "sample_bad.cpp"), help="要檢查的檔案")
+    args = parser.parse_args()
+
+    if not MODULE_PATH.exists():
+        print(f"{MODULE_PATH} not found; build the module first (cmake --build build)")
+        return 1
+
+    print(f"{'names':>6s} {'total (ms)':>11s} {'check (ms)':>11s} {'violations':>11s}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        profile_dir = Path(tmpdir)
+        for size in SIZES:
+            config = {
+                "Checks": f"-*,{CHECK}",
+                "CheckOptions": [{"key": f"{CHECK}.ForbiddenNames", "value": ",".join(deny_list(size, args.style))}],
+            }
+            cmd = [args.clang_tidy, args.file, '-load', str(MODULE_PATH), f'--config={json.dumps(config)}',
+                   '--enable-check-profile', f'--store-check-profile={profile_dir}', '--', '-std=c++17']
+            samples = [run(cmd, profile_dir) for _ in range(args.repeat)]
+            total = statistics.median(s[0] for s in samples)
+            check = statistics.median(s[1] for s in samples)
+            print(f"{size:6d} {total:11.1f} {check:11.2f} {samples[-1][2]:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+misc-forbid-stl 比對範圍基準測試
+對 examples/test_stl.cpp（以及改為 #include <bits/stdc++.h> 的版本）執行 clang-tidy，
+記錄整體執行時間（中位數）與 --store-check-profile 量到的 misc-forbid-stl 本身耗時。
+需要已建置的 build/libMiscTidyModule.so；以 --baseline 指定舊版模組即可比較修改前後。
+
+用法：
+  python3 benchmarks/bench_forbid_stl.py --repeat 5
+  python3 benchmarks/bench_forbid_stl.py --baseline /tmp/old/libMiscTidyModule.so
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from api.diagnostics import load_check_profile  # noqa: E402
+
+MODULE_PATH = BASE_DIR / "build" / "libMiscTidyModule.so"
+CHECK = "misc-forbid-stl"
+SAMPLE = BASE_DIR / "examples" / "test_stl.cpp"
+
+
+def run(cmd, profile_dir):
+    for stale in profile_dir.glob("*.json"):
+        stale.unlink()
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    check_ms = load_check_profile(profile_dir).get(CHECK, {}).get("wall", 0.0) * 1000
+    violations = proc.stdout.count(f"[{CHECK}")
+    return elapsed, check_ms, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="每種設定執行次數（取中位數）")
+    parser.add_argument("--baseline", help="修改前的 libMiscTidyModule.so（選用）")
+    parser.add_argument("--clang-tidy", default="clang-tidy", help="clang-tidy 執行檔")
+    args = parser.parse_args()
+
+    if not MODULE_PATH.exists():
+        print(f"{MODULE_PATH} not found; build the module first (cmake --build build)")
+        return 1
+
+    # (名稱, 模組, IncludeUserHeaders)
+    variants = [("main file", MODULE_PATH, False), ("user headers", MODULE_PATH, True)]
+    if args.baseline:
+        variants.insert(0, ("baseline", Path(args.baseline), False))
+
+    print(f"{'source':18s} {'variant':14s} {'total (ms)':>11s} {'check (ms)':>11s} {'violations':>11s}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        profile_dir = tmpdir / "profile"
+        profile_dir.mkdir()
+        code = SAMPLE.read_text()
+        bits = tmpdir / "test_stl_bits.cpp"
+        bits.write_text("#include <bits/stdc++.h>\n" + code)
+
+        for source in (SAMPLE, bits):
+            for name, module, user_headers in variants:
+                config = {
+                    "Checks": f"-*,{CHECK}",
+                    "CheckOptions": [{"key": f"{CHECK}.IncludeUserHeaders",
+                                      "value": "true" if user_headers else "false"}],
+                }
+                cmd = [args.clang_tidy, str(source), '-load', str(module), f'--config={json.dumps(config)}',
+                       '--enable-check-profile', f'--store-check-profile={profile_dir}', '--', '-std=c++17']
+                samples = [run(cmd, profile_dir) for _ in range(args.repeat)]
+                total = statistics.median(s[0] for s in samples)
+                check = statistics.median(s[1] for s in samples)
+                print(f"{source.name:18s} {name:14s} {total:11.1f} {check:11.2f} {samples[-1][2]:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
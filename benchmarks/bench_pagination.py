@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+列表分頁基準測試
+建立含大量 lint_runs 的合成資料庫（預設 5,000,000 筆），比較 GET /lint/runs 使用的
+keyset 分頁與 OFFSET 分頁在第一頁與深頁（50%、90% 位置）的查詢時間。
+--no-indexes 會先刪除 api.db.INDEXES 的索引，呈現加上索引前的全表掃描。
+
+用法：
+  python3 benchmarks/bench_pagination.py --rows 5000000 --db /tmp/bench_pagination.db
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.db import INDEXES, Database  # noqa: E402
+from api.pagination import build_page_query, encode_cursor  # noqa: E402
+
+COLUMNS = ['id', 'submission_id', 'problem_id', 'status', 'violations_count', 'fixes_available',
+           'created_at', 'completed_at', 'error_message', 'duration_ms']
+STATUSES = ['finished'] * 90 + ['failed'] * 6 + ['timeout'] * 4
+PAGE_SIZE = 50
+
+
+def populate(db_path, rows, problems):
+    """以單一交易大量寫入；先不建索引，寫完再由 init_schema 建立"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = OFF')
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+
+    def generate():
+        for i in range(rows):
+            created = (start + timedelta(milliseconds=i * 37)).isoformat()
+            yield (f"run_{i}_{i:08x}", rng.randrange(rows // 3 + 1), rng.randrange(1, problems + 1),
+                   rng.choice(STATUSES), rng.randrange(10), 0, created, created, None, rng.randrange(50, 2000))
+
+    conn.execute('BEGIN')
+    conn.executemany(f'''
+        INSERT INTO lint_runs ({", ".join(COLUMNS)}) VALUES ({", ".join("?" * len(COLUMNS))})
+    ''', generate())
+    conn.execute('COMMIT')
+    conn.close()
+
+
+def timed(conn, sql, params, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def cursor_at(conn, filters, offset):
+    """取得位於 offset 的那一筆作為 keyset 起點（不計時）"""
+    where = ' AND '.join(f'{k} = ?' for k in filters) or '1'
+    row = conn.execute(f'''
+        SELECT created_at, id FROM lint_runs WHERE {where}
+        ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?
+    ''', (*filters.values(), offset)).fetchone()
+    return encode_cursor(*row) if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="合成的 lint_runs 筆數")
+    parser.add_argument("--problems", type=int, default=1000, help="題目數")
+    parser.add_argument("--db", default="/tmp/bench_pagination.db", help="資料庫路徑（已存在且筆數相同時沿用）")
+    parser.add_argument("--repeat", type=int, default=3, help="每個查詢重複次數（取最佳值）")
+    parser.add_argument("--no-indexes", action="store_true", help="刪除索引後再量測")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    db = Database(db_path)
+    db.init_schema()
+    with db.connection() as c:
+        c.execute('SELECT COUNT(*) FROM lint_runs')
+        existing = c.fetchone()[0]
+    db.close()
+
+    if existing != args.rows:
+        db_path.unlink()
+        for suffix in ('-wal', '-shm'):
+            Path(str(db_path) + suffix).unlink(missing_ok=True)
+        Database(db_path).init_schema()
+        with sqlite3.connect(db_path) as conn:
+            for statement in INDEXES:
+                conn.execute(f'DROP INDEX IF EXISTS {statement.split()[5]}')
+        start = time.perf_counter()
+        populate(db_path, args.rows, args.problems)
+        print(f"inserted {args.rows:,} rows in {time.perf_counter() - start:.1f} s")
+
+    db = Database(db_path)
+    start = time.perf_counter()
+    db.init_schema()  # 建立（或確認）索引
+    print(f"init_schema (indexes) in {time.perf_counter() - start:.1f} s")
+    db.close()
+
+    conn = sqlite3.connect(db_path)
+    if args.no_indexes:
+        for statement in INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {statement.split()[5]}')
+    conn.execute('ANALYZE')
+
+    scenarios = [
+        ("all", {}),
+        ("problem_id", {"problem_id": args.problems // 2}),
+        ("status", {"status": "timeout"}),
+    ]
+    print(f"\n{'filter':12s} {'depth':>6s} {'keyset (ms)':>12s} {'offset (ms)':>12s}")
+    for name, filters in scenarios:
+        where = ' AND '.join(f'{k} = ?' for k in filters)
+        total = conn.execute(f'SELECT COUNT(*) FROM lint_runs{" WHERE " + where if where else ""}',
+                             tuple(filters.values())).fetchone()[0]
+        for depth in (0.0, 0.5, 0.9):
+            offset = int(total * depth)
+            cursor = cursor_at(conn, filters, offset) if offset else None
+            sql, params = build_page_query('lint_runs', COLUMNS, filters, cursor=cursor, limit=PAGE_SIZE)
+            keyset_ms = timed(conn, sql, params, args.repeat)
+
+            offset_sql, offset_params = build_page_query('lint_runs', COLUMNS, filters, limit=PAGE_SIZE)
+            offset_sql += f' OFFSET {offset}'
+            offset_ms = timed(conn, offset_sql, offset_params, args.repeat)
+            print(f"{name:12s} {depth:6.0%} {keyset_ms:12.2f} {offset_ms:12.2f}")
+
+        plan = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        print(f"{'':12s} plan: {'; '.join(row[-1] for row in plan)}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+預編譯標頭（PCH）基準測試
+對 examples/ 內的每個檔案分別以「不使用 PCH」與「使用 PCH」執行 clang-tidy，
+比較單次執行的延遲。需要 clang-tidy 與相同版本的 clang/clang++。
+
+用法：
+  python3 benchmarks/bench_pch.py --repeat 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from api.pch import PchManager  # noqa: E402
+
+MODULE_PATH = BASE_DIR / "build" / "libMiscTidyModule.so"
+
+
+def time_run(cmd, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="每種設定執行次數（取中位數）")
+    parser.add_argument("files", nargs="*", help="要測試的檔案（預設為 examples/*.c 與 examples/*.cpp）")
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files] or sorted(
+        [*(BASE_DIR / "examples").glob("*.c"), *(BASE_DIR / "examples").glob("*.cpp")])
+
+    if MODULE_PATH.exists():
+        base_cmd = ['clang-tidy', '-load', str(MODULE_PATH), '-checks=-*,misc-forbid-*']
+    else:
+        print(f"[note] {MODULE_PATH} not found; using built-in checks only")
+        base_cmd = ['clang-tidy', '-checks=-*,bugprone-*']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pch = PchManager(Path(tmpdir))
+        start = time.perf_counter()
+        pch.warm()
+        print(f"PCH build: {(time.perf_counter() - start) * 1000:.0f} ms  {pch.status()}")
+        print()
+        print(f"{'file':28s} {'no PCH (ms)':>12s} {'PCH (ms)':>10s} {'speedup':>8s}")
+
+        for path in files:
+            language_type = 0 if path.suffix == '.c' else 1
+            std_flag = '-std=c17' if language_type == 0 else '-std=c++17'
+            cmd = [*base_cmd, str(path), '--', std_flag]
+            pch_args = pch.args_for(path.read_text(errors="replace"), language_type, std_flag)
+
+            without = time_run(cmd, args.repeat)
+            if not pch_args:
+                print(f"{path.name:28s} {without:12.1f} {'n/a':>10s} {'-':>8s}  (includes not eligible for a PCH)")
+                continue
+            with_pch = time_run([*cmd, *pch_args], args.repeat)
+            print(f"{path.name:28s} {without:12.1f} {with_pch:10.1f} {without / with_pch:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
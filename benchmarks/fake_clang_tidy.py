@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+壓力測試用的假 clang-tidy
+不做任何分析：等待固定延遲後，對每個輸入檔輸出固定數量的合成診斷，
+輸出格式與 -export-fixes 的 YAML 與真正的 clang-tidy 相同。
+
+環境變數：
+  FAKE_CLANG_TIDY_LATENCY_MS   每次執行的延遲（預設 50）
+  FAKE_CLANG_TIDY_DIAGNOSTICS  每個檔案的診斷數（預設 3）
+
+用法（透過 api.app 的 CLANG_TIDY 環境變數指定）：
+  CLANG_TIDY=benchmarks/fake_clang_tidy.py uvicorn api.app:app
+"""
+
+import json
+import os
+import sys
+import time
+
+MESSAGE = "Loop statements (for/while/do) are forbidden."
+CHECK = "misc-forbid-loops"
+
+
+def main(argv):
+    if "--version" in argv:
+        print("LLVM version 0.0.0 (fake clang-tidy)")
+        return 0
+
+    if "--" in argv:
+        argv = argv[:argv.index("--")]
+    files = [a for a in argv if a.endswith((".c", ".cpp")) and not a.startswith("-")]
+    fixes_path = None
+    profile_dir = None
+    for i, arg in enumerate(argv):
+        if arg == "-export-fixes" and i + 1 < len(argv):
+            fixes_path = argv[i + 1]
+        elif arg.startswith("-export-fixes="):
+            fixes_path = arg.split("=", 1)[1]
+        elif arg.startswith("--store-check-profile="):
+            profile_dir = arg.split("=", 1)[1]
+
+    time.sleep(int(os.environ.get("FAKE_CLANG_TIDY_LATENCY_MS", 50)) / 1000)
+    count = int(os.environ.get("FAKE_CLANG_TIDY_DIAGNOSTICS", 3))
+
+    out = []
+    fixes = []
+    for path in files:
+        for line in range(1, count + 1):
+            out.append(f"{path}:{line}:5: error: {MESSAGE} [{CHECK},-warnings-as-errors]\n"
+                       f"    for (;;) {{}}\n    ^\n")
+            fixes.append(f"  - DiagnosticName:  {CHECK}\n"
+                         f"    DiagnosticMessage:\n"
+                         f"      Message:         '{MESSAGE}'\n"
+                         f"      FilePath:        '{path}'\n"
+                         f"      FileOffset:      0\n"
+                         f"      Replacements:    []\n"
+                         f"    Level:           Error\n")
+    sys.stdout.write("".join(out))
+
+    # 與 clang-tidy 相同：沒有任何診斷時不寫出 fixes 檔
+    if fixes_path and fixes:
+        with open(fixes_path, "w") as f:
+            f.write("---\nMainSourceFile:  ''\nDiagnostics:\n" + "".join(fixes) + "...\n")
+
+    if profile_dir:
+        # 與 --store-check-profile 相同的 JSON 格式，耗時全部算在單一檢查上
+        os.makedirs(profile_dir, exist_ok=True)
+        seconds = int(os.environ.get("FAKE_CLANG_TIDY_LATENCY_MS", 50)) / 1000
+        for path in files:
+            profile = {f"time.clang-tidy.{CHECK}.{kind}": seconds for kind in ("wall", "user")}
+            profile[f"time.clang-tidy.{CHECK}.sys"] = 0.0
+            with open(os.path.join(profile_dir, f"{int(time.time())}-{os.path.basename(path)}.json"), "w") as f:
+                json.dump({"file": path, "timestamp": "", "profile": profile}, f)
+
+    total = count * len(files)
+    if total:
+        print(f"{total} warnings generated.", file=sys.stderr)
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+API 壓力測試
+在同一行程內以 uvicorn 啟動 api.app（使用臨時資料庫與配置目錄），
+以指定並行度重複執行「建立提交 -> 生成配置 -> 執行分析 -> 儲存報告」流程，
+統計各端點 p50/p95/p99 延遲、每秒請求數與資料庫大小，結果存成 JSON 以便比較。
+
+clang-tidy 可使用假執行檔（固定延遲、合成診斷）或真正的 clang-tidy：
+  --clang-tidy fake   benchmarks/fake_clang_tidy.py（預設）
+  --clang-tidy real   PATH 上的 clang-tidy（需要已建置的 build/libMiscTidyModule.so）
+  --clang-tidy PATH   任意執行檔
+
+用法：
+  python3 benchmarks/load_test.py --flows 500 --concurrency 16 --output results.json
+  python3 benchmarks/load_test.py --flows 500 --concurrency 16 --baseline results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+FAKE_CLANG_TIDY = BASE_DIR / "benchmarks" / "fake_clang_tidy.py"
+HEADERS = {"Authorization": "Bearer load_test", "Content-Type": "application/json"}
+ENDPOINTS = ["/submission", "/lint/generate", "/lint/run", "/lint/report"]
+RULES = [["--forbid-loops"], ["--forbid-loops", "--forbid-functions=printf"]]
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, errors, rejected=0):
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "rejected": rejected,
+        "mean_ms": round(statistics.fmean(samples), 2) if samples else None,
+        "p50_ms": _round(percentile(samples, 50)),
+        "p95_ms": _round(percentile(samples, 95)),
+        "p99_ms": _round(percentile(samples, 99)),
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def load_samples():
+    """examples/ 內的程式碼，依副檔名決定語言"""
+    samples = []
+    for path in sorted([*(BASE_DIR / "examples").glob("*.c"), *(BASE_DIR / "examples").glob("*.cpp")]):
+        samples.append(("c" if path.suffix == ".c" else "cpp", path.read_text(errors="replace")))
+    return samples or [("cpp", "int main() { for (;;) {} }\n")]
+
+
+class Client:
+    """每個執行緒一條 keep-alive 連線，記錄每次請求的延遲"""
+
+    def __init__(self, port, stats):
+        self.port = port
+        self.stats = stats
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+
+    def post(self, endpoint, body, ok=None):
+        """送出請求；HTTP 錯誤或回應不符合 ok 時記為錯誤並回傳 None"""
+        payload = json.dumps(body)
+        start = time.perf_counter()
+        try:
+            self.conn.request("POST", endpoint, payload, HEADERS)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+            self.stats.record(endpoint, None)
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status == 429:
+            self.stats.record_rejected(endpoint)
+            return None
+        if response.status >= 400:
+            self.stats.record(endpoint, None)
+            return None
+        result = json.loads(data)
+        if ok is not None and not ok(result):
+            self.stats.record(endpoint, None)
+            return None
+        self.stats.record(endpoint, elapsed)
+        return result
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.rejected = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.flows = []
+
+    def record(self, endpoint, elapsed_ms):
+        with self._lock:
+            if elapsed_ms is None:
+                self.errors[endpoint] += 1
+            else:
+                self.samples[endpoint].append(elapsed_ms)
+
+    def record_rejected(self, endpoint):
+        """429（准入控制拒絕）與錯誤分開計算"""
+        with self._lock:
+            self.rejected[endpoint] += 1
+
+    def record_flow(self, elapsed_ms):
+        with self._lock:
+            self.flows.append(elapsed_ms)
+
+
+def run_flow(client, index, samples, args, stats):
+    """一次完整的出題者/學生流程"""
+    start = time.perf_counter()
+    language, code = samples[index % len(samples)]
+    if not args.repeat_code:
+        # 加上唯一註解避免命中結果快取
+        code = f"{code}\n// load_test {index}\n"
+    problem_id = index % args.problems + 1
+
+    created = client.post("/submission", {"problem_id": problem_id, "code": code, "language": language})
+    if created is None:
+        return
+    client.post("/lint/generate", {"problem_id": problem_id, "rules": RULES[problem_id % len(RULES)]})
+    run = client.post("/lint/run", {
+        "submission_id": created["submission_id"],
+        "problem_id": problem_id,
+        "language_type": 0 if language == "c" else 1,
+        "export_fixes": args.export_fixes,
+    }, ok=lambda result: result.get("status") == "finished")
+    # 未完成的 run（clang-tidy 無法執行、逾時）計為錯誤，不計入延遲
+    if run is None:
+        return
+    violations = run.get("violations_count") or 0
+    client.post("/lint/report", {
+        "submission_id": created["submission_id"],
+        "problem_id": problem_id,
+        "run_id": run["run_id"],
+        "result": {"passed": violations == 0, "total_violations": violations},
+    })
+    stats.record_flow((time.perf_counter() - start) * 1000)
+
+
+def configure_environment(args, workdir):
+    """必須在匯入 api.app 之前設定"""
+    if args.clang_tidy == "fake":
+        clang_tidy = str(FAKE_CLANG_TIDY)
+    elif args.clang_tidy == "real":
+        clang_tidy = "clang-tidy"
+    else:
+        clang_tidy = args.clang_tidy
+    os.environ["CLANG_TIDY"] = clang_tidy
+    os.environ["FAKE_CLANG_TIDY_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_CLANG_TIDY_DIAGNOSTICS"] = str(args.diagnostics)
+    os.environ["DB_PATH"] = str(workdir / "database.db")
+    os.environ["CONFIG_DIR"] = str(workdir / "configs")
+    os.environ.setdefault("LINT_PCH", "1" if args.clang_tidy == "real" else "0")
+    return clang_tidy
+
+
+def db_size(db_path):
+    return sum(p.stat().st_size for p in db_path.parent.glob(db_path.name + "*"))
+
+
+def compare(result, baseline_path):
+    """印出與先前結果的差異"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nvs {baseline_path}:")
+    for endpoint, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] is not None and previous.get(key):
+                deltas.append(f"{key[:-3]} {(current[key] / previous[key] - 1) * 100:+.1f}%")
+        print(f"  {endpoint:16s} {'  '.join(deltas)}")
+    if baseline.get("requests_per_sec"):
+        change = (result["requests_per_sec"] / baseline["requests_per_sec"] - 1) * 100
+        print(f"  {'req/s':16s} {change:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, default=200, help="執行的流程數（每個流程 4 個請求）")
+    parser.add_argument("--concurrency", type=int, default=8, help="並行的客戶端數")
+    parser.add_argument("--problems", type=int, default=4, help="輪流使用的題目數")
+    parser.add_argument("--clang-tidy", default="fake", help="fake、real 或執行檔路徑")
+    parser.add_argument("--latency-ms", type=int, default=50, help="假 clang-tidy 的延遲")
+    parser.add_argument("--diagnostics", type=int, default=3, help="假 clang-tidy 每個檔案的診斷數")
+    parser.add_argument("--export-fixes", action="store_true", help="/lint/run 使用 export_fixes")
+    parser.add_argument("--repeat-code", action="store_true", help="不加唯一註解，允許命中結果快取")
+    parser.add_argument("--output", help="結果 JSON 的輸出路徑")
+    parser.add_argument("--baseline", help="與先前的結果 JSON 比較")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="clang-tidy-load-") as tmpdir:
+        workdir = Path(tmpdir)
+        clang_tidy = configure_environment(args, workdir)
+
+        import uvicorn
+        from api.app import app, DB_PATH
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                sys.exit("server failed to start")
+            time.sleep(0.05)
+
+        stats = Stats()
+        samples = load_samples()
+        local = threading.local()
+
+        def worker(index):
+            if not hasattr(local, "client"):
+                local.client = Client(port, stats)
+            run_flow(local.client, index, samples, args, stats)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(worker, range(args.flows)))
+        duration = time.perf_counter() - start
+
+        server.should_exit = True
+        thread.join(timeout=10)
+
+        total_requests = (sum(len(s) for s in stats.samples.values()) + sum(stats.errors.values())
+                          + sum(stats.rejected.values()))
+        result = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": {"platform": platform.platform(), "cpus": os.cpu_count()},
+            "config": {
+                "flows": args.flows,
+                "concurrency": args.concurrency,
+                "problems": args.problems,
+                "clang_tidy": clang_tidy,
+                "latency_ms": args.latency_ms if args.clang_tidy == "fake" else None,
+                "diagnostics": args.diagnostics if args.clang_tidy == "fake" else None,
+                "export_fixes": args.export_fixes,
+                "repeat_code": args.repeat_code,
+                "lint_workers": os.environ.get("LINT_WORKERS"),
+            },
+            "duration_s": round(duration, 3),
+            "requests": total_requests,
+            "requests_per_sec": round(total_requests / duration, 1),
+            "flows_per_sec": round(len(stats.flows) / duration, 1),
+            "endpoints": {e: summarize(stats.samples[e], stats.errors[e], stats.rejected[e]) for e in ENDPOINTS},
+            "flow": summarize(stats.flows, args.flows - len(stats.flows) - sum(stats.rejected.values()),
+                              sum(stats.rejected.values())),
+            "db_size_bytes": db_size(DB_PATH),
+        }
+
+    print(f"{'endpoint':16s} {'count':>6s} {'errors':>6s} {'429':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s}  (ms)")
+    for name, row in [*result["endpoints"].items(), ("flow", result["flow"])]:
+        print(f"{name:16s} {row['count']:6d} {row['errors']:6d} {row['rejected']:6d} "
+              + " ".join(f"{row[k]:9.1f}" if row[k] is not None else f"{'-':>9s}"
+                         for k in ("p50_ms", "p95_ms", "p99_ms")))
+    print(f"\n{result['requests']} requests in {result['duration_s']:.2f} s: "
+          f"{result['requests_per_sec']} req/s, {result['flows_per_sec']} flows/s")
+    print(f"database size: {result['db_size_bytes'] / 1024:.0f} KiB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+        print(f"results saved to {args.output}")
+    if args.baseline:
+        compare(result, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
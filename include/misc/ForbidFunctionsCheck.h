@@ -2,6 +2,10 @@
 
 #include "clang-tidy/ClangTidyCheck.h"
 #include "clang/ASTMatchers/ASTMatchFinder.h"
+#include "llvm/ADT/DenseMap.h"
+#include "llvm/ADT/StringMap.h"
+#include "llvm/ADT/StringSet.h"
+#include "llvm/Support/GlobPattern.h"
 #include <vector>
 #include <string>
 
@@ -18,9 +22,23 @@ public:
   void check(const ast_matchers::MatchFinder::MatchResult &Result) override;
   void storeOptions(ClangTidyOptions::OptionMap &Opts) override;
 
+  // True if the function matches any entry of ForbiddenNames.
+  bool isForbidden(const FunctionDecl &Function) const;
+
 private:
-  std::vector<std::string> Forbidden;
+  bool matchesAnyName(const FunctionDecl &Function) const;
+
   std::string ForbiddenNamesRaw;
+  // "printf": compared with the unqualified name.
+  llvm::StringSet<> Names;
+  // "std::sort", "::printf": keyed by the last component, so the
+  // qualified name is only built when the unqualified name matches.
+  llvm::StringMap<std::vector<std::string>> QualifiedNames;
+  // "str*": unqualified glob; "std::*sort": glob over the qualified name.
+  std::vector<llvm::GlobPattern> NamePatterns;
+  std::vector<llvm::GlobPattern> QualifiedPatterns;
+  // Each callee is classified once per translation unit.
+  mutable llvm::DenseMap<const FunctionDecl *, bool> Classified;
 };
 
 } // namespace clang::tidy::misc
@@ -7,14 +7,20 @@ namespace clang::tidy::misc {
 
 class ForbidSTLCheck : public ClangTidyCheck {
 public:
-  ForbidSTLCheck(StringRef Name, ClangTidyContext *Context)
-      : ClangTidyCheck(Name, Context) {}
+  ForbidSTLCheck(StringRef Name, ClangTidyContext *Context);
   
   bool isLanguageVersionSupported(const LangOptions &LangOpts) const override {
     return LangOpts.CPlusPlus; // Only for C++
   }
   void registerMatchers(ast_matchers::MatchFinder *Finder) override;
   void check(const ast_matchers::MatchFinder::MatchResult &Result) override;
+  void storeOptions(ClangTidyOptions::OptionMap &Opts) override;
+
+private:
+  bool isInSubmission(const Decl *D, const SourceManager &SM) const;
+
+  // Also match in non-system headers, not only in the main file.
+  const bool IncludeUserHeaders;
 };
 
 } // namespace clang::tidy::misc
@@ -1,113 +1,166 @@
 #!/usr/bin/env python3
 import sys
+import tempfile
 import yaml
 import os
 
-# 解析命令列參數
-options = {
-    "loops": "--forbid-loops" in sys.argv,
-    "arrays": "--forbid-arrays" in sys.argv,
-    "functions": "--forbid-functions" in sys.argv,
-    "stl": "--forbid-stl" in sys.argv,
-    "id_naming": "--identifier-naming" in sys.argv,
-    "include_cleaner": "--include-cleaner" in sys.argv,
-}
-
-# 擷取禁止函式清單，例如：
-#   python3 generate_tidy_config.py --forbid-functions --function-names printf,scanf,malloc
-forbidden_funcs = []
-if "--function-names" in sys.argv:
-    idx = sys.argv.index("--function-names")
-    if idx + 1 < len(sys.argv):
-        # 支援逗號分隔的函式清單
-        forbidden_funcs = sys.argv[idx + 1].split(",")
-
-# 輸出目錄（預設為當前目錄）
-output_dir = "."
-if "--output-dir" in sys.argv:
-    idx = sys.argv.index("--output-dir")
-    if idx + 1 < len(sys.argv):
-        output_dir = sys.argv[idx + 1]
-os.makedirs(output_dir, exist_ok=True)
-
-# 檢查要啟用的自訂規則
-checks = []
-if options["loops"]:
-    checks.append("misc-forbid-loops")
-if options["arrays"]:
-    checks.append("misc-forbid-arrays")
-if options["functions"]:
-    checks.append("misc-forbid-functions")
-if options["stl"]:
-    checks.append("misc-forbid-stl")
-if options["id_naming"]:
-    checks.append("readability-identifier-naming")
-if options["include_cleaner"]:
-    checks.append("misc-include-cleaner")
-
-# 解析命名規則
-allowed_cases = {
+# 允許的命名規則
+ALLOWED_CASES = {
     "camelBack",
     "CamelCase",
     "snake_case",
     "UPPER_CASE",
     "lower_case",
 }
-case_flags = {
+CASE_FLAGS = {
     "--fn-case": "FunctionCase",
     "--var-case": "VariableCase",
     "--class-case": "ClassCase",
     "--param-case": "ParameterCase",
     "--enum-case": "EnumConstantCase",
 }
-naming_options = {}
-for flag, key in case_flags.items():
-    if flag in sys.argv:
-        idx = sys.argv.index(flag)
-        if idx + 1 < len(sys.argv):
-            val = sys.argv[idx + 1]
-            if val not in allowed_cases:
-                print(f"[warn] {flag} unsupported case: {val} (allowed: {', '.join(sorted(allowed_cases))})")
-            else:
-                naming_options[key] = val
-
-# clang-tidy 設定
-config = {
-    "Checks": ",".join(checks) if checks else "-*",
-    # 只將自訂 misc 規則視為錯誤，新加入的內建規則維持警告級別
-    "WarningsAsErrors": "misc-forbid-*",
-}
 
-# 若有禁止函式清單則加入自訂參數
-check_options = []
 
-if forbidden_funcs and options["functions"]:
-    check_options.append({
-        "key": "misc-forbid-functions.ForbiddenNames",
-        "value": ",".join(forbidden_funcs)
-    })
+def parse_args(argv):
+    """解析命令列參數，回傳 (build_config 的參數, 輸出目錄, 警告訊息清單)"""
+    options = {
+        "loops": "--forbid-loops" in argv,
+        "arrays": "--forbid-arrays" in argv,
+        "functions": "--forbid-functions" in argv,
+        "stl": "--forbid-stl" in argv,
+        "id_naming": "--identifier-naming" in argv,
+        "include_cleaner": "--include-cleaner" in argv,
+    }
+
+    # 擷取禁止函式清單，例如：
+    #   python3 generate_tidy_config.py --forbid-functions --function-names printf,scanf,malloc
+    warnings = []
+    forbidden_funcs = []
+    if "--function-names" in argv:
+        idx = argv.index("--function-names")
+        if idx + 1 < len(argv):
+            # 支援逗號分隔的函式清單
+            forbidden_funcs = argv[idx + 1].split(",")
+    # 若沒有啟用 --forbid-functions，則忽略 --function-names 並提示
+    if forbidden_funcs and not options["functions"]:
+        warnings.append("--function-names provided without --forbid-functions; names will be ignored.")
+
+    # 輸出目錄（預設為當前目錄）
+    output_dir = "."
+    if "--output-dir" in argv:
+        idx = argv.index("--output-dir")
+        if idx + 1 < len(argv):
+            output_dir = argv[idx + 1]
+
+    # 解析命名規則
+    naming_options = {}
+    for flag, key in CASE_FLAGS.items():
+        if flag in argv:
+            idx = argv.index(flag)
+            if idx + 1 < len(argv):
+                val = argv[idx + 1]
+                if val not in ALLOWED_CASES:
+                    warnings.append(f"{flag} unsupported case: {val} (allowed: {', '.join(sorted(ALLOWED_CASES))})")
+                else:
+                    naming_options[key] = val
+
+    return dict(options, forbidden_funcs=forbidden_funcs, naming_options=naming_options), output_dir, warnings
+
+
+def build_config(loops=False, arrays=False, functions=False, stl=False,
+                 id_naming=False, include_cleaner=False,
+                 forbidden_funcs=(), naming_options=None):
+    """依選項建立 clang-tidy 設定（dict）"""
+    # 檢查要啟用的自訂規則
+    checks = []
+    if loops:
+        checks.append("misc-forbid-loops")
+    if arrays:
+        checks.append("misc-forbid-arrays")
+    if functions:
+        checks.append("misc-forbid-functions")
+    if stl:
+        checks.append("misc-forbid-stl")
+    if id_naming:
+        checks.append("readability-identifier-naming")
+    if include_cleaner:
+        checks.append("misc-include-cleaner")
+
+    # clang-tidy 設定
+    config = {
+        "Checks": ",".join(checks) if checks else "-*",
+        # 只將自訂 misc 規則視為錯誤，新加入的內建規則維持警告級別
+        "WarningsAsErrors": "misc-forbid-*",
+    }
 
-if options["id_naming"]:
-    for k, v in naming_options.items():
+    # 若有禁止函式清單則加入自訂參數
+    check_options = []
+
+    if forbidden_funcs and functions:
         check_options.append({
-            "key": f"readability-identifier-naming.{k}",
-            "value": v
+            "key": "misc-forbid-functions.ForbiddenNames",
+            "value": ",".join(forbidden_funcs)
         })
 
-if check_options:
-    config["CheckOptions"] = check_options
+    if id_naming:
+        for k, v in (naming_options or {}).items():
+            check_options.append({
+                "key": f"readability-identifier-naming.{k}",
+                "value": v
+            })
+
+    if check_options:
+        config["CheckOptions"] = check_options
+
+    return config
+
+
+def render_config(config):
+    """將設定轉為 .clang-tidy 的 YAML 內容"""
+    return yaml.dump(config)
+
+
+def write_config(output_dir, content):
+    """寫入 .clang-tidy；內容未變時不寫檔。回傳 (路徑, 是否有寫入)"""
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, ".clang-tidy")
+    try:
+        with open(output_path, "r") as f:
+            if f.read() == content:
+                return output_path, False
+    except FileNotFoundError:
+        pass
+
+    # 先寫暫存檔再替換，避免執行中的 clang-tidy 讀到寫一半的設定
+    # 暫存檔名唯一，同一行程內同時生成也不會互相覆蓋
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=".clang-tidy.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return output_path, True
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    kwargs, output_dir, warnings = parse_args(argv)
+    for warning in warnings:
+        print(f"[warn] {warning}")
+    config = build_config(**kwargs)
+    output_path, _ = write_config(output_dir, render_config(config))
+    forbidden_funcs = kwargs["forbidden_funcs"]
 
-# 若沒有啟用 --forbid-functions，則忽略 --function-names 並提示
-if forbidden_funcs and not options["functions"]:
-    print("[note] --function-names provided without --forbid-functions; names will be ignored.")
+    # 顯示結果
+    checks = config["Checks"].split(",") if config["Checks"] != "-*" else []
+    print("✅ Generated .clang-tidy at:", output_path)
+    print("✅ Checks:", checks or ["none"])
+    if forbidden_funcs:
+        print("🚫 Forbidden functions:", ", ".join(forbidden_funcs))
 
-# 寫入設定檔
-output_path = os.path.join(output_dir, ".clang-tidy")
-with open(output_path, "w") as f:
-    yaml.dump(config, f)
 
-# 顯示結果
-print("✅ Generated .clang-tidy at:", output_path)
-print("✅ Checks:", checks or ["none"])
-if forbidden_funcs:
-    print("🚫 Forbidden functions:", ", ".join(forbidden_funcs))
+if __name__ == "__main__":
+    main()
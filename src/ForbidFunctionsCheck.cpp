@@ -1,11 +1,55 @@
 #include "misc/ForbidFunctionsCheck.h"
+#include "clang/AST/Decl.h"
 #include "clang/ASTMatchers/ASTMatchFinder.h"
+#include "clang/ASTMatchers/ASTMatchersMacros.h"
+#include "llvm/ADT/STLExtras.h"
 #include <sstream>
 
 using namespace clang::ast_matchers;
 
 namespace clang::tidy::misc {
 
+namespace {
+
+AST_MATCHER_P(FunctionDecl, isForbiddenBy, const ForbidFunctionsCheck *, Check) {
+  return Check->isForbidden(Node);
+}
+
+bool isPattern(StringRef Name) {
+  return Name.find_first_of("*?[") != StringRef::npos;
+}
+
+// Fully qualified name without inline namespaces (std::__1::sort -> std::sort),
+// the same form hasName() compares against.
+std::string qualifiedName(const FunctionDecl &Function) {
+  std::string Result = Function.getNameAsString();
+  for (const DeclContext *Ctx = Function.getDeclContext(); Ctx; Ctx = Ctx->getParent()) {
+    if (const auto *NS = dyn_cast<NamespaceDecl>(Ctx)) {
+      if (NS->isInline())
+        continue;
+      Result = (NS->isAnonymousNamespace() ? std::string("(anonymous namespace)")
+                                           : NS->getName().str()) + "::" + Result;
+    } else if (const auto *Record = dyn_cast<RecordDecl>(Ctx)) {
+      Result = Record->getName().str() + "::" + Result;
+    }
+  }
+  return Result;
+}
+
+// "::sort" must match the whole qualified name; "vector::push_back" may also
+// match a suffix that starts at a "::" boundary, as hasName() does.
+bool matchesQualified(StringRef Qualified, StringRef Wanted) {
+  if (Wanted.consume_front("::"))
+    return Qualified == Wanted;
+  if (Qualified == Wanted)
+    return true;
+  return Qualified.size() > Wanted.size() + 2 &&
+         Qualified.take_back(Wanted.size()) == Wanted &&
+         Qualified.drop_back(Wanted.size()).take_back(2) == "::";
+}
+
+} // namespace
+
 ForbidFunctionsCheck::ForbidFunctionsCheck(StringRef Name, ClangTidyContext *Context)
     : ClangTidyCheck(Name, Context),
       ForbiddenNamesRaw(Options.get("ForbiddenNames", "sort")) {
@@ -16,28 +60,76 @@ ForbidFunctionsCheck::ForbidFunctionsCheck(StringRef Name, ClangTidyContext *Con
     // Trim whitespace
     size_t start = item.find_first_not_of(" \t");
     size_t end = item.find_last_not_of(" \t");
-    if (start != std::string::npos && end != std::string::npos) {
-      Forbidden.push_back(item.substr(start, end - start + 1));
+    if (start == std::string::npos || end == std::string::npos)
+      continue;
+    StringRef Entry = StringRef(item).slice(start, end + 1);
+    bool Qualified = Entry.contains("::");
+
+    if (isPattern(Entry)) {
+      // Qualified patterns are anchored at the global namespace.
+      Entry.consume_front("::");
+      auto Pattern = llvm::GlobPattern::create(Entry);
+      if (!Pattern) {
+        llvm::consumeError(Pattern.takeError());
+        continue;
+      }
+      (Qualified ? QualifiedPatterns : NamePatterns).push_back(std::move(*Pattern));
+    } else if (Qualified) {
+      QualifiedNames[Entry.rsplit("::").second].push_back(Entry.str());
+    } else {
+      Names.insert(Entry);
     }
   }
 }
 
 void ForbidFunctionsCheck::registerMatchers(MatchFinder *Finder) {
-  // Create a matcher that matches calls to any of the forbidden names.
-  for (const auto &Name : Forbidden) {
-    Finder->addMatcher(callExpr(callee(functionDecl(hasName(Name)))).bind("call"), this);
+  // A single matcher for the whole list: the callee is looked up in the
+  // name sets instead of evaluating one hasName() matcher per entry.
+  Finder->addMatcher(callExpr(callee(functionDecl(isForbiddenBy(this)))).bind("call"), this);
+}
+
+bool ForbidFunctionsCheck::isForbidden(const FunctionDecl &Function) const {
+  auto Inserted = Classified.try_emplace(Function.getCanonicalDecl(), false);
+  if (Inserted.second)
+    Inserted.first->second = matchesAnyName(Function);
+  return Inserted.first->second;
+}
+
+bool ForbidFunctionsCheck::matchesAnyName(const FunctionDecl &Function) const {
+  std::string Name = Function.getNameAsString();
+  if (Names.count(Name))
+    return true;
+  for (const auto &Pattern : NamePatterns) {
+    if (Pattern.match(Name))
+      return true;
   }
+
+  auto Candidates = QualifiedNames.find(Name);
+  if (Candidates == QualifiedNames.end() && QualifiedPatterns.empty())
+    return false;
+
+  std::string Qualified = qualifiedName(Function);
+  if (Candidates != QualifiedNames.end() &&
+      llvm::any_of(Candidates->second, [&](const std::string &Wanted) {
+        return matchesQualified(Qualified, Wanted);
+      }))
+    return true;
+  for (const auto &Pattern : QualifiedPatterns) {
+    if (Pattern.match(Qualified))
+      return true;
+  }
+  return false;
 }
 
 void ForbidFunctionsCheck::check(const MatchFinder::MatchResult &Result) {
   const auto *Call = Result.Nodes.getNodeAs<CallExpr>("call");
   if (!Call)
     return;
-  
+
   // Get the function declaration from the call expression
   const FunctionDecl *Callee = Call->getDirectCallee();
   std::string FuncName = Callee ? Callee->getNameAsString() : "unknown";
-  
+
   diag(Call->getBeginLoc(), "Use of forbidden function '%0'") << FuncName;
 }
 
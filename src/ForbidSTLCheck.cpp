@@ -1,46 +1,72 @@
 #include "misc/ForbidSTLCheck.h"
+#include "clang/AST/ASTContext.h"
 #include "clang/ASTMatchers/ASTMatchFinder.h"
+#include "clang/Basic/SourceManager.h"
 
 using namespace clang::ast_matchers;
 
 namespace clang::tidy::misc {
 
+ForbidSTLCheck::ForbidSTLCheck(StringRef Name, ClangTidyContext *Context)
+    : ClangTidyCheck(Name, Context),
+      IncludeUserHeaders(Options.get("IncludeUserHeaders", false)) {}
+
 void ForbidSTLCheck::registerMatchers(MatchFinder *Finder) {
-  // Match any declaration or reference from std namespace
-  // This includes std::vector, std::string, std::cout, std::sort, etc.
-  Finder->addMatcher(
-      declRefExpr(to(decl(isInStdNamespace()))).bind("stl_ref"),
-      this);
-  
-  // Match variable declarations using std types (e.g., std::vector<int> v;)
-  Finder->addMatcher(
-      varDecl(hasType(qualType(hasDeclaration(decl(isInStdNamespace()))))).bind("stl_var"),
-      this);
-  
-  // Match type aliases and typedefs from std
-  Finder->addMatcher(
-      typedefNameDecl(hasType(qualType(hasDeclaration(decl(isInStdNamespace()))))).bind("stl_typedef"),
-      this);
+  // Only the translation unit itself is registered: MatchFinder dispatches
+  // matchers by node kind, so this check costs nothing on the nodes of the
+  // standard headers (<bits/stdc++.h> alone has hundreds of thousands). The
+  // submission's own declarations are searched in check().
+  Finder->addMatcher(translationUnitDecl().bind("tu"), this);
+}
+
+bool ForbidSTLCheck::isInSubmission(const Decl *D,
+                                    const SourceManager &SM) const {
+  SourceLocation Loc = SM.getExpansionLoc(D->getBeginLoc());
+  if (Loc.isInvalid())
+    return false;
+  if (SM.isInMainFile(Loc))
+    return true;
+  return IncludeUserHeaders && !SM.isInSystemHeader(Loc);
 }
 
 void ForbidSTLCheck::check(const MatchFinder::MatchResult &Result) {
-  // Check for std reference
-  if (const auto *Ref = Result.Nodes.getNodeAs<DeclRefExpr>("stl_ref")) {
-    diag(Ref->getBeginLoc(), "Use of STL (Standard Template Library) is forbidden.");
-    return;
-  }
-  
-  // Check for std type declaration
-  if (const auto *Var = Result.Nodes.getNodeAs<VarDecl>("stl_var")) {
-    diag(Var->getBeginLoc(), "Use of STL (Standard Template Library) type is forbidden.");
-    return;
-  }
-  
-  // Check for std typedef
-  if (const auto *Typedef = Result.Nodes.getNodeAs<TypedefNameDecl>("stl_typedef")) {
-    diag(Typedef->getBeginLoc(), "Use of STL (Standard Template Library) type is forbidden.");
+  const auto *TU = Result.Nodes.getNodeAs<TranslationUnitDecl>("tu");
+  if (!TU)
     return;
+  ASTContext &Ctx = *Result.Context;
+  const SourceManager &SM = Ctx.getSourceManager();
+
+  auto StdType = qualType(hasDeclaration(decl(isInStdNamespace())));
+  // References to std declarations: std::cout, std::sort, etc.
+  auto StlRef = declRefExpr(to(decl(isInStdNamespace())));
+  // Variables and typedefs/aliases of std types (e.g., std::vector<int> v;)
+  auto StlType = decl(anyOf(varDecl(hasType(StdType)),
+                            typedefNameDecl(hasType(StdType))));
+
+  // Traverse only the top-level declarations written in the submission;
+  // everything the headers declared is skipped without being visited.
+  for (const Decl *D : TU->decls()) {
+    if (!isInSubmission(D, SM))
+      continue;
+
+    for (const BoundNodes &Nodes :
+         match(decl(forEachDescendant(StlRef.bind("stl_ref"))), *D, Ctx)) {
+      const auto *Ref = Nodes.getNodeAs<DeclRefExpr>("stl_ref");
+      diag(Ref->getBeginLoc(), "Use of STL (Standard Template Library) is forbidden.");
+    }
+
+    for (const BoundNodes &Nodes :
+         match(decl(eachOf(StlType.bind("stl_type"),
+                           forEachDescendant(StlType.bind("stl_type")))),
+               *D, Ctx)) {
+      const auto *Type = Nodes.getNodeAs<Decl>("stl_type");
+      diag(Type->getBeginLoc(), "Use of STL (Standard Template Library) type is forbidden.");
+    }
   }
 }
 
+void ForbidSTLCheck::storeOptions(ClangTidyOptions::OptionMap &Opts) {
+  Options.store(Opts, "IncludeUserHeaders", IncludeUserHeaders);
+}
+
 } // namespace clang::tidy::misc